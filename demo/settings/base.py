@@ -31,23 +31,27 @@ INSTALLED_APPS = [
     'django_extensions',
 
     # 'mptt',
-    # 'easy_thumbnails',
+    'easy_thumbnails',
     # 'django_select2',
     # 'rest_framework',
     # 'rest_framework.authtoken',
 
     'djapps.core',
     'djapps.accounts',
+    'djapps.search',
 ]
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'djapps.core.log.RequestIDMiddleware',
+    'djapps.core.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'djapps.core.introspection.TemplateDebugMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.static',
                 'django.template.context_processors.tz',
                 'django.contrib.messages.context_processors.messages',
+                'djapps.core.context_processors.public_settings',
             ],
             'loaders': [
                 'django.template.loaders.filesystem.Loader',
@@ -154,15 +159,18 @@ SESSION_COOKIE_DOMAIN = config('SESSION_COOKIE_DOMAIN', default=None)
 CSRF_COOKIE_SAMESITE = None
 SESSION_COOKIE_SAMESITE = None
 
-# THUMBNAIL_BASEDIR = 'thumbs'
-# THUMBNAIL_ALIASES = {
-#     '': {
-#         'avatar': {
-#             'size': (200, 200),
-#             'background': '#cccccc',
-#         },
-#     },
-# }
+THUMBNAIL_BASEDIR = 'thumbs'
+THUMBNAIL_ALIASES = {
+    '': {
+        'avatar': {
+            'size': (200, 200),
+            'background': '#cccccc',
+        },
+    },
+}
+# Thumbnails are named by the content of the source, see djapps.core.thumbnails
+THUMBNAIL_NAMER = 'djapps.core.thumbnails.content_hashed'
+THUMBNAIL_SOURCE_GENERATORS = ('djapps.core.thumbnails.pil_draft_image',)
 
 # REST_FRAMEWORK = {
 #     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -180,7 +188,152 @@ USE_HTTPS = False
 # Google integration
 GOOGLE_TAG_MANAGER = os.environ.get('GOOGLE_TAG_MANAGER', '')
 
-# ELASTICSEARCH_URLS = config('ELASTICSEARCH_URLS', default='http://localhost:9200', cast=Csv())
-# ELASTICSEARCH_INDICES_PREFIX = config('ELASTICSEARCH_INDICES_PREFIX', default=PROJECT_NAME)
+ELASTICSEARCH_URLS = config('ELASTICSEARCH_URLS', default='http://localhost:9200', cast=Csv())
+ELASTICSEARCH_INDICES_PREFIX = config('ELASTICSEARCH_INDICES_PREFIX', default=PROJECT_NAME)
+ELASTICSEARCH_TIMEOUT = config('ELASTICSEARCH_TIMEOUT', default=5, cast=float)
 
 SITE_URL = config('SITE_URL', default='')
+
+# Maximum number of rows a template may fetch with {% for_queryset %}
+TEMPLATE_QUERYSET_LIMIT = config('TEMPLATE_QUERYSET_LIMIT', default=500, cast=int)
+
+# Admin exports with more users than this are generated by Celery
+USERS_EXPORT_ASYNC_THRESHOLD = config('USERS_EXPORT_ASYNC_THRESHOLD', default=50000, cast=int)
+# Not served by the web server, the user admin checks permissions and serves the files
+USERS_EXPORT_ROOT = config('USERS_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'private', 'exports'))
+
+# Mailings of the user admin, see djapps.accounts.mailings. Messages are sent
+# by Celery tasks of MAILING_CHUNK_SIZE users over one connection, at most
+# MAILING_RATE messages a second (0 is unlimited), to stay under the limits
+# of the email provider.
+MAILING_CHUNK_SIZE = config('MAILING_CHUNK_SIZE', default=100, cast=int)
+MAILING_RATE = config('MAILING_RATE', default=10, cast=float)
+
+# Avatars of users without an uploaded image, see djapps.accounts.avatars
+AVATAR_GRAVATAR_URL = config('AVATAR_GRAVATAR_URL', default='https://www.gravatar.com/avatar/')
+AVATAR_DEFAULT = config('AVATAR_DEFAULT', default='identicon')
+# Fetch Gravatar images once and serve them from AVATAR_CACHE_DIR
+AVATAR_PROXY = config('AVATAR_PROXY', default=False, cast=bool)
+AVATAR_PROXY_MAX_AGE = config('AVATAR_PROXY_MAX_AGE', default=24 * 60 * 60, cast=int)
+AVATAR_PROXY_TIMEOUT = config('AVATAR_PROXY_TIMEOUT', default=5, cast=float)
+AVATAR_CACHE_DIR = config('AVATAR_CACHE_DIR', default=os.path.join(MEDIA_ROOT, 'avatar-cache'))
+AVATAR_CACHE_MAX_FILES = config('AVATAR_CACHE_MAX_FILES', default=100000, cast=int)
+# Proxied images are cached in these sizes only, other sizes are rounded up
+AVATAR_SIZES = (40, 80, 160)
+
+# Superusers may enable the inspect/debug_context tags with ?template_debug=1
+TEMPLATE_DEBUG_PARAM = config('TEMPLATE_DEBUG_PARAM', default='template_debug')
+
+# Settings available to templates as {{ settings.NAME }} and {% load_option %}.
+# Names which look like secrets are never exposed.
+PUBLIC_SETTINGS = [
+    'GOOGLE_TAG_MANAGER',
+    'SITE_URL',
+    'PROJECT_CONFIGURATION',
+    'USE_HTTPS',
+]
+
+# A part of all ETags and cached page keys, change it to invalidate them on deploy
+HTTP_CACHE_VERSION = config('HTTP_CACHE_VERSION', default='1')
+# Pages of anonymous users are cached in this cache for the number of seconds
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Outputs of {% capture ... cached %} blocks, see djapps.core.fragment_cache.
+# Kept in a per-process LRU of CAPTURE_CACHE_SIZE entries, and in the
+# CAPTURE_CACHE_ALIAS cache shared by processes if set.
+CAPTURE_CACHE_SIZE = config('CAPTURE_CACHE_SIZE', default=1024, cast=int)
+CAPTURE_CACHE_ALIAS = config('CAPTURE_CACHE_ALIAS', default='')
+CAPTURE_CACHE_TIMEOUT = config('CAPTURE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Static files, see djapps.core.staticfiles. Hashed files are cached for a year,
+# other files for STATIC_MAX_AGE seconds.
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=60, cast=int)
+# Files smaller than this are not compressed by collectstatic
+STATIC_COMPRESS_MIN_SIZE = config('STATIC_COMPRESS_MIN_SIZE', default=512, cast=int)
+# Number of processes compressing files, defaults to the number of CPU cores
+STATIC_COMPRESS_PROCESSES = config('STATIC_COMPRESS_PROCESSES', default=0, cast=int) or None
+
+# Libraries loaded from CDNs. Run `./manage.py bundle_vendor_assets` and set
+# VENDOR_ASSETS_LOCAL=True to serve them from STATIC_URL/vendor/ instead.
+VENDOR_ASSETS = {
+    'bootstrap.min.css': {
+        'url': 'https://stackpath.bootstrapcdn.com/bootstrap/4.3.1/css/bootstrap.min.css',
+        'integrity': 'sha384-ggOyR0iXCbMQv3Xipma34MD+dH/1fQ784/j6cY/iJTQUOhcWr7x9JvoRxT2MZw1T',
+    },
+    'jquery.min.js': {
+        'url': 'https://code.jquery.com/jquery-3.4.1.min.js',
+    },
+    'popper.min.js': {
+        'url': 'https://cdnjs.cloudflare.com/ajax/libs/popper.js/1.14.7/umd/popper.min.js',
+        'integrity': 'sha384-UO2eT0CpHqdSJQ6hJty5KVphtPhzWj9WO1clHTMGa3JDZwrnQq4sF86dIHNDz0W1',
+    },
+    'bootstrap.min.js': {
+        'url': 'https://stackpath.bootstrapcdn.com/bootstrap/4.3.1/js/bootstrap.min.js',
+        'integrity': 'sha384-JjSmVgyd0p3pXB1rRibZUAYoIIy6OrQ6VrjIEaFf/nJGzIxFDsf4x0xIM+B07jRM',
+    },
+}
+VENDOR_ASSETS_LOCAL = config('VENDOR_ASSETS_LOCAL', default=False, cast=bool)
+VENDOR_ASSETS_DIR = os.path.join(BASE_DIR, PROJECT_NAME, 'static', 'vendor')
+
+# Search indexes, see djapps.search. Nothing is indexed without a backend,
+# and the admin search falls back to `icontains` lookups of search_fields.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='')
+SEARCH_LIMIT = 100
+SEARCH_ADMIN_LIMIT = config('SEARCH_ADMIN_LIMIT', default=1000, cast=int)
+# Index changed objects by Celery tasks of up to SEARCH_INDEX_BATCH_SIZE objects
+SEARCH_INDEX_ASYNC = config('SEARCH_INDEX_ASYNC', default=True, cast=bool)
+SEARCH_INDEX_BATCH_SIZE = 500
+
+# Error reporting, see djapps.core.telemetry. Sentry is initialized when the
+# apps are ready, with the keyword arguments of init_sentry() in SENTRY_OPTIONS.
+SENTRY_DSN = ''
+SENTRY_OPTIONS = {}
+
+# Logging, see djapps.core.log. Records are written by a background thread,
+# as JSON lines with LOG_JSON. Records of LOG_BUFFER_LEVEL and above which are
+# below LOG_LEVEL are kept in a ring buffer and written before an error of
+# the same request. LOG_SAMPLE_RATES keep a share of records of noisy loggers.
+LOG_LEVEL = config('LOG_LEVEL', default='WARNING')
+LOG_BUFFER_LEVEL = config('LOG_BUFFER_LEVEL', default='INFO')
+LOG_BUFFER_SIZE = config('LOG_BUFFER_SIZE', default=200, cast=int)
+LOG_JSON = config('LOG_JSON', default=True, cast=bool)
+LOG_SAMPLE_RATES = {
+    'django.request': 0.1,
+    'django.security.DisallowedHost': 0.01,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'djapps.core.log.RequestIDFilter',
+        },
+        'sampling': {
+            '()': 'djapps.core.log.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'djapps.core.log.QueueHandler',
+            'output_level': LOG_LEVEL,
+            'buffer_size': LOG_BUFFER_SIZE,
+            'json': LOG_JSON,
+            'filters': ['request_id', 'sampling'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_BUFFER_LEVEL,
+    },
+    'loggers': {
+        # Without the console handler of Django's default configuration,
+        # which would write records a second time, bypassing the queue
+        'django': {
+            'handlers': [],
+            'level': 'INFO',
+        },
+    },
+}
@@ -3,6 +3,10 @@ from .base import *
 DEBUG = True
 ALLOWED_HOSTS = ['*']
 
+# Readable records, including {% debug_print %}
+LOGGING['handlers']['queue'].update(json=False, output_level=config('LOG_LEVEL', default='DEBUG'))
+LOGGING['root']['level'] = 'DEBUG'
+
 INTERNAL_IPS = ['127.0.0.1']
 
 CELERY_BROKER_URL = config('REDIS_URL')
@@ -1,4 +1,5 @@
 from .base import *
+from djapps.core.telemetry import parse_rates
 from urllib.parse import urlparse
 import logging
 import os
@@ -10,34 +11,25 @@ INTERNAL_IPS = ['127.0.0.1']
 CELERY_BROKER_URL = config('REDIS_URL')
 CELERY_RESULT_BACKEND = config('REDIS_URL')
 
-SENTRY_DSN = config('SENTRY_DSN')
-
-if SENTRY_DSN:
-    import sentry_sdk
-    from sentry_sdk.integrations.django import DjangoIntegration
-    from sentry_sdk.integrations.celery import CeleryIntegration
-    from sentry_sdk.integrations.redis import RedisIntegration
-
-    sentry_sdk.init(
-        dsn=SENTRY_DSN,
-        integrations=[DjangoIntegration(), CeleryIntegration(), RedisIntegration()],
+# Templates are compiled once per process, gunicorn compiles them before forking workers
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', TEMPLATES[0]['OPTIONS']['loaders']),
+]
 
-        # If you wish to associate users to errors (assuming you are using
-        # django.contrib.auth) you may enable sending PII data.
-        send_default_pii=True
-    )
+STATICFILES_STORAGE = 'djapps.core.staticfiles.CompressedManifestStaticFilesStorage'
 
-    # INSTALLED_APPS += [
-    #     'raven.contrib.django.raven_compat',
-    # ]
-    #
-    # RAVEN_CONFIG = {
-    #     'dsn': os.environ['SENTRY_DSN'],
-    # }
-
-    # MIDDLEWARE = (
-    #     'raven.contrib.django.raven_compat.middleware.Sentry404CatchMiddleware',
-    # ) + MIDDLEWARE
+SENTRY_DSN = config('SENTRY_DSN')
+SENTRY_OPTIONS = {
+    'environment': config('SENTRY_ENVIRONMENT', default='production'),
+    'sample_rate': config('SENTRY_SAMPLE_RATE', default=1.0, cast=float),
+    'traces_sample_rate': config('SENTRY_TRACES_SAMPLE_RATE', default=0.05, cast=float),
+    # Rates by URL name or Celery task name
+    'route_sample_rates': config(
+        'SENTRY_ROUTE_SAMPLE_RATES', default='login=1,register=1,index=0.01', cast=parse_rates),
+    # The same error is sent at most this many times a minute
+    'events_per_minute': config('SENTRY_EVENTS_PER_MINUTE', default=10, cast=int),
+    'integrations': config('SENTRY_INTEGRATIONS', default='django,celery,redis', cast=Csv()),
+}
 
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -0,0 +1,18 @@
+from .production import *
+
+# Slim profile of short-lived processes, cron management commands and Celery beat:
+#   DJANGO_SETTINGS_MODULE=demo.settings.slim ./manage.py clear_cache
+#   DJANGO_SETTINGS_MODULE=demo.settings.slim celery -A demo beat
+# The production settings without what only web requests, Celery workers
+# and development use. Compare with `./manage.py import_profile --command NAME`.
+
+# Admin modules are not imported, the models of the admin app stay available
+INSTALLED_APPS = [
+    'django.contrib.admin.apps.SimpleAdminConfig' if x == 'django.contrib.admin' else x
+    for x in INSTALLED_APPS if x != 'django_extensions'
+]
+
+# Errors are reported by the default integrations, the Django, Celery and
+# Redis ones only trace requests and tasks
+SENTRY_OPTIONS['integrations'] = config('SENTRY_INTEGRATIONS', default='', cast=Csv())
+SENTRY_OPTIONS['traces_sample_rate'] = 0.0
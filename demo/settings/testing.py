@@ -17,3 +17,6 @@ CACHES = {
 
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 DEFAULT_FROM_EMAIL = 'test@test.com'
+
+# Tests check records with assertLogs(), nothing is written
+LOGGING['handlers']['queue'].update(output_level='CRITICAL', buffer_size=0)
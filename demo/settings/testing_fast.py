@@ -0,0 +1,18 @@
+from .testing import *
+
+# Fast test profile:
+#   DJANGO_SETTINGS_MODULE=demo.settings.testing_fast ./manage.py test
+# Uses an in-memory SQLite database which is created from the models without
+# running migrations and cloned for every parallel worker.
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {
+            'MIGRATE': False,
+        },
+    },
+}
+
+TEST_RUNNER = 'djapps.core.testing.FastTestRunner'
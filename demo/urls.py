@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, re_path, include
 from django.conf import settings
 from django.views.generic import TemplateView
+from djapps.core.http_cache import anonymous_cache_page
 
 
 admin.site.site_header = 'Admin console'
@@ -11,7 +12,8 @@ urlpatterns = [
     path('', include('djapps.core.urls')),
     path('', include('djapps.accounts.urls')),
     # path('select2/', include('django_select2.urls')),
-    path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain')),
+    path('robots.txt', anonymous_cache_page()(
+        TemplateView.as_view(template_name='robots.txt', content_type='text/plain'))),
 ]
 
 
@@ -1,17 +1,20 @@
+import secrets
 from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from djapps.search.admin import SearchAdminMixin
+from .models import Mailing, MailingFailure, User
 from .forms import UserChangeForm, UserCreationForm
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(SearchAdminMixin, BaseUserAdmin):
     # add_form_template = 'accounts/admin/auth/user/add_form.html'
     fieldsets = (
         (None, {
             'fields': (
                 'email', 'name',
+                'avatar',
                 'password',
             )}),
         (_('Permissions'), {
@@ -55,6 +58,9 @@ class UserAdmin(BaseUserAdmin):
         'activate',
         'deactivate',
         'set_unusable_password',
+        'export_csv',
+        'export_jsonl',
+        'send_email',
     ]
 
     def get_urls(self):
@@ -65,8 +71,31 @@ class UserAdmin(BaseUserAdmin):
                 self.admin_site.admin_view(self.user_change_password),
                 name='auth_user_password_change',
             ),
+            url(
+                r'^exports/(?P<name>[\w.-]+)$',
+                self.admin_site.admin_view(self.download_export),
+                name='accounts_user_export',
+            ),
         ] + super().get_urls()
 
+    def download_export(self, request, name):
+        """Serve an export written by `export_users_task` from the non-public
+        `USERS_EXPORT_ROOT`."""
+        import os
+        from django.conf import settings
+        from django.core.exceptions import PermissionDenied
+        from django.http import FileResponse
+        from django.shortcuts import redirect
+
+        if not self.has_export_permission(request):
+            raise PermissionDenied
+        try:
+            f = open(os.path.join(settings.USERS_EXPORT_ROOT, os.path.basename(name)), 'rb')
+        except FileNotFoundError:
+            self.message_user(request, _('The export is not ready yet, try again later.'))
+            return redirect('admin:accounts_user_changelist')
+        return FileResponse(f, as_attachment=True, filename=name, content_type='application/gzip')
+
     def activate(self, request, queryset):
         queryset.update(is_active=True)
     activate.short_description = \
@@ -83,3 +112,121 @@ class UserAdmin(BaseUserAdmin):
             q.save()
     set_unusable_password.short_description = \
         _('Set unusable password')
+
+    def export_users(self, request, queryset, fmt):
+        from django.conf import settings
+        from django.http import StreamingHttpResponse
+        from django.utils import timezone
+        from django.urls import reverse
+        from django.utils.html import format_html
+        from .export import EXPORT_FORMATS, iter_users, stream_users
+        from .tasks import export_users_task
+
+        content_type, ext = EXPORT_FORMATS[fmt]
+        filename = 'users-%s.%s' % (timezone.now().strftime('%Y%m%d-%H%M%S'), ext)
+
+        if queryset.count() > settings.USERS_EXPORT_ASYNC_THRESHOLD:
+            # The export is served through download_export, the token keeps names unguessable
+            filename = '%s-%s.gz' % (filename, secrets.token_hex(32))
+            if request.POST.get('select_across') == '1':
+                # The filters of the changelist are in the URL, the task repeats the query
+                export_users_task.delay(filename, fmt, changelist=(request.user.pk, request.GET.urlencode()))
+            else:
+                export_users_task.delay(filename, fmt, pks=list(queryset.values_list('pk', flat=True)))
+            self.message_user(request, format_html(
+                _('The export is too large and is being generated in the background. '
+                  'Download it when it is ready: <a href="{0}">{1}</a>.'),
+                reverse('admin:accounts_user_export', args=[filename]), filename,
+            ))
+            return None
+
+        response = StreamingHttpResponse(
+            stream_users(iter_users(queryset), fmt),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+        return response
+
+    def has_export_permission(self, request):
+        return request.user.has_perm('accounts.export_user')
+
+    def has_email_permission(self, request):
+        return request.user.has_perm('accounts.email_user')
+
+    def export_csv(self, request, queryset):
+        return self.export_users(request, queryset, 'csv')
+    export_csv.short_description = \
+        _('Export to CSV')
+    export_csv.allowed_permissions = ('export',)
+
+    def export_jsonl(self, request, queryset):
+        return self.export_users(request, queryset, 'jsonl')
+    export_jsonl.short_description = \
+        _('Export to JSON Lines')
+    export_jsonl.allowed_permissions = ('export',)
+
+    def send_email(self, request, queryset):
+        """Queue a mailing to the active users of the selection, after
+        the message is written on an intermediate page."""
+        from django.contrib.admin import helpers
+        from django.template.response import TemplateResponse
+        from django.urls import reverse
+        from django.utils.html import format_html
+        from .forms import MailingForm
+        from .mailings import queue_mailing
+
+        queryset = queryset.filter(is_active=True)
+        if request.POST.get('post'):
+            form = MailingForm(request.POST)
+            if form.is_valid():
+                mailing = form.save(commit=False)
+                mailing.created_by = request.user
+                queue_mailing(mailing, queryset.values_list('pk', flat=True))
+                self.message_user(request, format_html(
+                    _('The message to {0} users is queued, see <a href="{1}">its progress</a>.'),
+                    mailing.total, reverse('admin:accounts_mailing_change', args=[mailing.pk]),
+                ))
+                return None
+        else:
+            form = MailingForm()
+        return TemplateResponse(request, 'accounts/admin/send_email.html', {
+            **self.admin_site.each_context(request),
+            'title': _('Send email'),
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            # Selections across all pages are sent as the filters of the URL
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    send_email.short_description = \
+        _('Send email')
+    send_email.allowed_permissions = ('email',)
+
+
+class MailingFailureInline(admin.TabularInline):
+    model = MailingFailure
+    fields = ('email', 'error', 'created_at')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Mailing)
+class MailingAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'language', 'status', 'total', 'sent', 'failed', 'created_at', 'finished_at')
+    list_filter = ('status', 'language')
+    fields = (
+        'subject', 'body', 'language', 'status',
+        'total', 'sent', 'failed', 'created_by', 'created_at', 'finished_at',
+    )
+    readonly_fields = fields
+    inlines = [MailingFailureInline]
+
+    def has_add_permission(self, request):
+        # Mailings are created by the "Send email" action of users
+        return False
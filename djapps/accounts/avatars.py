@@ -0,0 +1,200 @@
+"""Avatar URLs of users.
+
+Uploaded avatars are served as thumbnails, other users get a Gravatar image
+by the stored `User.email_md5`. With `AVATAR_PROXY` enabled Gravatar images
+of existing users are fetched by a Celery task in one of `AVATAR_SIZES` and
+served from `AVATAR_CACHE_DIR` by the `avatar` view; the cache keeps at most
+`AVATAR_CACHE_MAX_FILES` images.
+
+Listings should resolve all URLs at once:
+
+    users = annotate_avatars(User.objects.filter(is_active=True), size=40)
+    {% for user in users %}<img src="{{ user.avatar_url }}">{% endfor %}
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from urllib.parse import urlencode
+from django.conf import settings
+from django.urls import reverse
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 80
+MAX_SIZE = 2048
+# Seconds before the same avatar can be queued for fetching again
+FETCH_LOCK_TIMEOUT = 60
+
+
+def allowed_size(size):
+    """The smallest of `AVATAR_SIZES` not less than `size`, or the largest one."""
+    sizes = sorted(settings.AVATAR_SIZES)
+    return next((x for x in sizes if x >= size), sizes[-1])
+
+
+def gravatar_url(email_md5, size=DEFAULT_SIZE):
+    return '%s%s?%s' % (
+        settings.AVATAR_GRAVATAR_URL, email_md5,
+        urlencode({'s': size, 'd': settings.AVATAR_DEFAULT}))
+
+
+def proxy_url(email_md5, size=DEFAULT_SIZE):
+    return '%s?s=%d' % (reverse('avatar', args=[email_md5]), allowed_size(size))
+
+
+def get_avatar_url(user, size=DEFAULT_SIZE):
+    if user.avatar:
+        from djapps.core.thumbnails import thumbnail_url_or_placeholder
+        return thumbnail_url_or_placeholder(user.avatar, 'avatar')
+    url = proxy_url if settings.AVATAR_PROXY else gravatar_url
+    return url(user.get_email_md5_hash(), size)
+
+
+def annotate_avatars(users, size=DEFAULT_SIZE, attr='avatar_url'):
+    """Set the avatar URL to every user and return the list of users.
+
+    The URL prefix is built once, so the cost per row is a string
+    concatenation for users without an uploaded avatar.
+    """
+    from django.db.models import QuerySet
+    if isinstance(users, QuerySet):
+        fields, defer = users.query.deferred_loading
+        if fields and not defer:
+            # Avoid a query per row for fields skipped by only()
+            users = users.only(*fields, 'email', 'email_md5', 'avatar')
+    users = list(users)
+    if settings.AVATAR_PROXY:
+        placeholder = '0' * 32
+        prefix, suffix = reverse('avatar', args=[placeholder]).rsplit(placeholder, 1)
+        suffix += '?s=%d' % allowed_size(size)
+    else:
+        prefix = settings.AVATAR_GRAVATAR_URL
+        suffix = '?' + urlencode({'s': size, 'd': settings.AVATAR_DEFAULT})
+    for user in users:
+        # The raw value, the `avatar` descriptor would build a FieldFile per row
+        if user.__dict__.get('avatar'):
+            setattr(user, attr, get_avatar_url(user, size))
+        else:
+            setattr(user, attr, prefix + (user.email_md5 or user.get_email_md5_hash()) + suffix)
+    return users
+
+
+class CachedAvatar:
+    """An avatar image stored in `AVATAR_CACHE_DIR` with its metadata."""
+    def __init__(self, email_md5, size):
+        self.path = os.path.join(settings.AVATAR_CACHE_DIR, email_md5[:2], '%s_%d' % (email_md5, size))
+        self.meta_path = self.path + '.json'
+        self.email_md5 = email_md5
+        self.size = size
+        self.meta = None
+
+    def load(self):
+        try:
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError):
+            self.meta = None
+        return self.meta
+
+    @property
+    def is_fresh(self):
+        return bool(self.meta) and time.time() - self.meta['fetched'] < settings.AVATAR_PROXY_MAX_AGE
+
+    @property
+    def etag(self):
+        return self.meta and self.meta['etag']
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def save(self, content, content_type, upstream_etag=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to temporary names first, so concurrent readers never see a partial file
+        tmp_path = '%s.%d.part' % (self.path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+        self.touch(content_type, '"%s"' % hashlib.md5(content).hexdigest(), upstream_etag)
+
+    def touch(self, content_type=None, etag=None, upstream_etag=None):
+        meta = dict(self.meta or {})
+        meta['fetched'] = time.time()
+        meta.update({k: v for k, v in (
+            ('content_type', content_type), ('etag', etag),
+            ('upstream_etag', upstream_etag)) if v is not None})
+        tmp_path = '%s.%d.part' % (self.meta_path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self.meta = meta
+
+
+def fetch_avatar(email_md5, size=DEFAULT_SIZE):
+    """Return a fresh `CachedAvatar`, revalidating it with the upstream
+    server when it is older than `AVATAR_PROXY_MAX_AGE`.
+
+    A stale copy is returned when the upstream server is not available.
+    """
+    import urllib.error
+    import urllib.request
+
+    cached = CachedAvatar(email_md5, size)
+    if cached.load() and cached.is_fresh:
+        return cached
+
+    request = urllib.request.Request(gravatar_url(email_md5, size))
+    if cached.meta and cached.meta.get('upstream_etag'):
+        request.add_header('If-None-Match', cached.meta['upstream_etag'])
+    try:
+        with urllib.request.urlopen(request, timeout=settings.AVATAR_PROXY_TIMEOUT) as response:
+            cached.save(
+                response.read(), response.headers.get('Content-Type', 'image/png'),
+                response.headers.get('ETag'))
+    except (OSError, ValueError) as e:
+        if isinstance(e, urllib.error.HTTPError) and e.code == 304:
+            cached.touch()
+        elif cached.meta:
+            logger.warning('Serving a stale avatar %s: %s', email_md5, e)
+        else:
+            raise
+    return cached
+
+
+def queue_fetch_avatar(email_md5, size):
+    """Fetch the avatar in Celery, once per `email_md5` and size at a time."""
+    from django.core.cache import cache
+    from .tasks import fetch_avatar_task
+
+    if cache.add('avatar-fetch:%s_%d' % (email_md5, size), True, FETCH_LOCK_TIMEOUT):
+        fetch_avatar_task.delay(email_md5, size)
+
+
+def prune_avatar_cache(max_files=None):
+    """Remove the least recently fetched images above `AVATAR_CACHE_MAX_FILES`,
+    return the number of removed images."""
+    if max_files is None:
+        max_files = settings.AVATAR_CACHE_MAX_FILES
+    images = []
+    try:
+        directories = [x.path for x in os.scandir(settings.AVATAR_CACHE_DIR) if x.is_dir()]
+    except FileNotFoundError:
+        return 0
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(('.json', '.part')):
+                images.append((entry.stat().st_mtime, entry.path))
+    if len(images) <= max_files:
+        return 0
+    images.sort()
+    removed = images[:len(images) - max_files]
+    for _, path in removed:
+        for name in (path, path + '.json'):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+    return len(removed)
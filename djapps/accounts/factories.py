@@ -0,0 +1,64 @@
+import itertools
+import functools
+from django.conf import settings
+from django.utils import timezone
+from .models import User, get_email_md5, split_name
+
+
+@functools.lru_cache(maxsize=16)
+def _hash_password(password, hasher):
+    # `hasher` is only a part of the cache key, so the cache is not reused
+    # when PASSWORD_HASHERS are overridden
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def hash_password(password):
+    """Hash a password once and reuse the hash for all users with that password."""
+    if password is None:
+        from django.contrib.auth.hashers import make_password
+        return make_password(None)
+    return _hash_password(password, settings.PASSWORD_HASHERS[0])
+
+
+class UserFactory:
+    """Build users for tests and data seeding.
+
+        UserFactory.create(name='John Doe')
+        UserFactory.create_batch(1000, is_active=False)
+
+    Every user gets a unique email by default, and all users with the same
+    password share a single hash, so creating many users is cheap.
+    """
+    password = 'demo'
+    sequence = itertools.count()
+
+    @classmethod
+    def build(cls, **kwargs):
+        """Return an unsaved user."""
+        n = next(cls.sequence)
+        password = kwargs.pop('password', cls.password)
+        kwargs.setdefault('email', 'user%d@example.com' % n)
+        kwargs.setdefault('name', 'User %d' % n)
+        kwargs.setdefault('date_joined', timezone.now())
+        # bulk_create() does not call save(), which keeps these fields in sync
+        kwargs.setdefault('email_md5', get_email_md5(kwargs['email']))
+        first_name, last_name = split_name(kwargs['name'])
+        kwargs.setdefault('first_name', first_name)
+        kwargs.setdefault('last_name', last_name)
+        return User(password=hash_password(password), **kwargs)
+
+    @classmethod
+    def create(cls, **kwargs):
+        groups = kwargs.pop('groups', None)
+        user = cls.build(**kwargs)
+        user.save()
+        if groups:
+            user.groups.set(groups)
+        return user
+
+    @classmethod
+    def create_batch(cls, size, batch_size=1000, **kwargs):
+        """Create users with a single INSERT per `batch_size` users."""
+        users = [cls.build(**kwargs) for _ in range(size)]
+        return User.objects.bulk_create(users, batch_size=batch_size)
@@ -8,7 +8,7 @@ from django.contrib.auth.forms import (
     AuthenticationForm,
 )
 from django.conf import settings
-from .models import User
+from .models import Mailing, User
 
 
 class UserChangeForm(BaseUserChangeForm):
@@ -162,3 +162,30 @@ class EditUserEmailForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ('email',)
+
+
+class MailingForm(forms.ModelForm):
+    class Meta:
+        model = Mailing
+        fields = ('subject', 'body', 'language')
+        help_texts = {
+            'body': _(
+                'A template, {{ user.name }}, {{ user.first_name }}, {{ user.email }} '
+                'and {{ SITE_URL }} are available.'),
+        }
+
+    def clean_template(self, name):
+        from django.template import TemplateSyntaxError
+        from .mailings import mailing_engine
+        value = self.cleaned_data[name]
+        try:
+            mailing_engine().from_string(value)
+        except TemplateSyntaxError as e:
+            raise forms.ValidationError(str(e))
+        return value
+
+    def clean_subject(self):
+        return self.clean_template('subject')
+
+    def clean_body(self):
+        return self.clean_template('body')
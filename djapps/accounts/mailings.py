@@ -0,0 +1,193 @@
+"""Bulk email to users, queued by the "Send email" action of the user admin.
+
+`queue_mailing` stores the recipients as `MailingRecipient` rows and queues
+one `send_mailing_task`. The task sends the next `MAILING_CHUNK_SIZE`
+pending recipients, at most `MAILING_RATE` messages a second, and queues
+itself again while recipients are pending. So no task waits in the broker
+(an ETA task would be redelivered after the Redis visibility timeout) and
+the whole mailing stays under the limit of the email provider. Every
+recipient is claimed before its message is sent, so a repeated task skips
+users which were already sent to or failed.
+
+A task compiles the subject and the body and selects the layouts of the
+mailing language once, then renders them for every user and sends all
+messages of the chunk over a single connection. Progress is counted in
+`Mailing.sent` and `Mailing.failed`, failed recipients are kept as
+`MailingFailure` rows. Layouts can be overridden per language with
+`accounts/email/<language>/mailing.html` and `mailing.txt`.
+
+The subject and the body are written by staff, so they are compiled by
+`mailing_engine`, without template libraries and loaders, and rendered with
+a few values of the user only.
+"""
+import time
+import logging
+import smtplib
+import functools
+from collections import namedtuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone, translation
+from .models import Mailing, MailingFailure, MailingRecipient
+
+
+logger = logging.getLogger(__name__)
+
+MailingTemplates = namedtuple('MailingTemplates', 'subject body html text')
+
+
+class Throttle:
+    """Space calls of `wait()` at least `1 / rate` seconds apart,
+    a rate of 0 does not wait."""
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = self.clock()
+        if self.next is not None and now < self.next:
+            self.sleep(self.next - now)
+            now = self.next
+        self.next = now + self.interval
+
+
+@functools.lru_cache(maxsize=None)
+def mailing_engine():
+    """A template engine with the built-in tags and filters only: `{% load %}`
+    finds no libraries, `{% include %}` and `{% extends %}` find no templates."""
+    from django.template import Engine
+    return Engine(libraries={}, loaders=[])
+
+
+def get_context(user):
+    return {
+        'user': {'name': user.name, 'first_name': user.get_first_name(), 'email': user.email},
+        'SITE_URL': settings.SITE_URL,
+    }
+
+
+def get_templates(mailing):
+    """Compile the templates of the mailing in its language."""
+    from django.template.loader import select_template
+
+    def layout(name):
+        return select_template([
+            'accounts/email/%s/%s' % (mailing.language, name),
+            'accounts/email/%s' % name,
+        ])
+
+    with translation.override(mailing.language):
+        engine = mailing_engine()
+        return MailingTemplates(
+            engine.from_string(mailing.subject), engine.from_string(mailing.body),
+            layout('mailing.html'), layout('mailing.txt'))
+
+
+def build_message(templates, user, connection=None):
+    from django.core.mail import EmailMultiAlternatives
+    from django.template import Context
+
+    context = get_context(user)
+    # The subject and the body are plain text, the HTML layout escapes the body
+    # (rendered templates are marked safe)
+    subject = ' '.join(templates.subject.render(Context(context, autoescape=False)).split())
+    context['body'] = templates.body.render(Context(context, autoescape=False))
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=templates.text.render(context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        connection=connection,
+    )
+    message.attach_alternative(templates.html.render(context), 'text/html')
+    return message
+
+
+def queue_mailing(mailing, pks):
+    """Save the mailing with its recipients and queue the first chunk once
+    the transaction commits."""
+    from .tasks import send_mailing_task
+
+    pks = sorted(pks)
+    mailing.total = len(pks)
+    mailing.status = Mailing.SENDING if pks else Mailing.DONE
+    if not pks:
+        mailing.finished_at = timezone.now()
+    mailing.save()
+    MailingRecipient.objects.bulk_create(
+        (MailingRecipient(mailing=mailing, user_id=pk) for pk in pks), batch_size=1000)
+    if pks:
+        transaction.on_commit(lambda: send_mailing_task.delay(mailing.pk))
+    return mailing
+
+
+def claim(recipient, status):
+    """Move the recipient from pending to `status`, False if another task
+    has already done it."""
+    return bool(MailingRecipient.objects.filter(
+        pk=recipient.pk, status=MailingRecipient.PENDING).update(status=status))
+
+
+def send_mailing_chunk(mailing_pk):
+    """Send the mailing to the next `MAILING_CHUNK_SIZE` pending recipients,
+    return the number of sent and failed messages and whether recipients
+    are still pending."""
+    from django.core.mail import get_connection
+
+    mailing = Mailing.objects.get(pk=mailing_pk)
+    templates = get_templates(mailing)
+    recipients = list(
+        mailing.recipients.filter(status=MailingRecipient.PENDING)
+        .select_related('user').order_by('pk')[:settings.MAILING_CHUNK_SIZE])
+    failures = []
+    for recipient in recipients:
+        if (recipient.user is None or not recipient.user.is_active) and claim(recipient, MailingRecipient.FAILED):
+            failures.append(MailingFailure(
+                mailing=mailing, user=recipient.user, email=getattr(recipient.user, 'email', ''),
+                error='The user is inactive or deleted.'))
+    sent = 0
+    throttle = Throttle(settings.MAILING_RATE)
+    connection = get_connection()
+    try:
+        with translation.override(mailing.language):
+            connection.open()
+            for recipient in recipients:
+                user = recipient.user
+                if user is None or not user.is_active:
+                    continue
+                throttle.wait()
+                # Claimed before sending: a message is never sent twice, and one
+                # lost with a crashed worker is not retried
+                if not claim(recipient, MailingRecipient.SENT):
+                    continue
+                broken = False
+                try:
+                    if connection.send_messages([build_message(templates, user, connection)]):
+                        sent += 1
+                        continue
+                    error = 'The message was not sent.'
+                except (smtplib.SMTPException, OSError, ValueError) as e:
+                    logger.warning('Mailing %s to %s failed: %r', mailing.pk, user.email, e)
+                    error = repr(e)
+                    broken = True
+                MailingRecipient.objects.filter(pk=recipient.pk).update(status=MailingRecipient.FAILED)
+                failures.append(MailingFailure(mailing=mailing, user=user, email=user.email, error=error))
+                if broken:
+                    # The connection may be broken, send the next message over a new one
+                    connection.close()
+                    connection.open()
+    finally:
+        connection.close()
+        # Progress is kept when the connection cannot be opened again
+        MailingFailure.objects.bulk_create(failures)
+        Mailing.objects.filter(pk=mailing.pk).update(sent=F('sent') + sent, failed=F('failed') + len(failures))
+        Mailing.objects.filter(
+            pk=mailing.pk, status=Mailing.SENDING, total__lte=F('sent') + F('failed'),
+        ).update(status=Mailing.DONE, finished_at=timezone.now())
+    pending = mailing.recipients.filter(status=MailingRecipient.PENDING).exists()
+    return sent, len(failures), pending
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Export users as CSV or JSON Lines without loading them all into memory.'
+
+    def add_arguments(self, parser):
+        from ...export import EXPORT_FORMATS, EXPORT_FIELDS, EXPORT_BATCH_SIZE
+        parser.add_argument(
+            '--format', dest='fmt', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument(
+            '--fields', default=','.join(EXPORT_FIELDS),
+            help='Comma separated list of fields to export.')
+        parser.add_argument(
+            '--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+        parser.add_argument(
+            '--active-only', action='store_true',
+            help='Export active users only.')
+        parser.add_argument(
+            '-o', '--output',
+            help='Output file. Files ending with ".gz" are compressed. '
+                 'Defaults to stdout.')
+
+    def handle(self, *args, **options):
+        import gzip
+        from ...export import iter_users, validate_fields, write_users
+        from ...models import User
+
+        try:
+            fields = validate_fields([x.strip() for x in options['fields'].split(',') if x.strip()])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = User.objects.all()
+        if options['active_only']:
+            queryset = queryset.filter(is_active=True)
+        users = iter_users(queryset, fields, options['batch_size'])
+
+        output = options['output']
+        if not output:
+            self.stdout.ending = ''
+            write_users(users, self.stdout, options['fmt'], fields)
+            return
+
+        opener = gzip.open if output.endswith('.gz') else open
+        with opener(output, 'wt', encoding='utf-8', newline='') as f:
+            write_users(users, f, options['fmt'], fields)
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:03
+
+from django.db import migrations, models
+import djapps.core.thumbnails
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, storage=djapps.core.thumbnails.ContentAddressedStorage(), upload_to='avatars', verbose_name='Avatar'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:20
+
+import hashlib
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def get_email_md5(email):
+    # A frozen copy of djapps.accounts.models.get_email_md5
+    return hashlib.md5(email.strip().lower().encode('utf-8')).hexdigest()
+
+
+def fill_email_md5(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = User.objects.using(schema_editor.connection.alias).filter(email_md5='').only('pk', 'email')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        for user in batch:
+            user.email_md5 = get_email_md5(user.email)
+        User.objects.using(schema_editor.connection.alias).bulk_update(batch, ['email_md5'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_md5',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_email_md5, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def split_name(name):
+    # A frozen copy of djapps.accounts.models.split_name
+    chunks = name.split(None, 2)
+    return (chunks[0] if chunks else ''), (chunks[1] if len(chunks) >= 2 else '')
+
+
+def fill_name_parts(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = User.objects.using(schema_editor.connection.alias).exclude(name='').only('pk', 'name')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        for user in batch:
+            user.first_name, user.last_name = split_name(user.name)
+        User.objects.using(schema_editor.connection.alias).bulk_update(batch, ['first_name', 'last_name'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_md5'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='first_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='First name'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='Last name'),
+        ),
+        migrations.RunPython(fill_name_parts, migrations.RunPython.noop),
+    ]
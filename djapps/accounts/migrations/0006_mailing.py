@@ -0,0 +1,53 @@
+# Generated by Django 3.2.10 on 2026-10-19 11:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mailing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Subject')),
+                ('body', models.TextField(verbose_name='Body')),
+                ('language', models.CharField(choices=[('en', 'English')], default='en', max_length=10, verbose_name='Language')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('done', 'Done')], default='queued', max_length=10, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Recipients')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Sent')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Failed')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+            ],
+            options={
+                'verbose_name': 'Mailing',
+                'verbose_name_plural': 'Mailings',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MailingFailure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(blank=True, max_length=255, verbose_name='Email')),
+                ('error', models.TextField(verbose_name='Error')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created at')),
+                ('mailing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='failures', to='accounts.mailing')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mailing failure',
+                'verbose_name_plural': 'Mailing failures',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
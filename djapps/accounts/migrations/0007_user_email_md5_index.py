@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_mailing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='email_md5',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 12:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_email_md5_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailingRecipient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('mailing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='accounts.mailing')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mailing recipient',
+                'verbose_name_plural': 'Mailing recipients',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mailingrecipient',
+            index=models.Index(fields=['mailing', 'status'], name='accounts_ma_mailing_58cb45_idx'),
+        ),
+    ]
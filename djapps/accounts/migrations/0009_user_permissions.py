@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 12:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_mailingrecipient'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ['name', '-date_joined'], 'permissions': [('export_user', 'Can export users'), ('email_user', 'Can email users')], 'verbose_name': 'User', 'verbose_name_plural': 'Users'},
+        ),
+    ]
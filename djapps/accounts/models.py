@@ -9,12 +9,36 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
+from djapps.core.thumbnails import ContentAddressedStorage
 import pytz
 import random
 import string
 
 
-class UserManager(BaseUserManager):
+def get_email_md5(email):
+    import hashlib
+    return hashlib.md5(email.strip().lower().encode('utf-8')).hexdigest()
+
+
+def split_name(name):
+    """Return `(first_name, last_name)`, the first two words of the full name."""
+    chunks = name.split(None, 2)
+    return (chunks[0] if chunks else ''), (chunks[1] if len(chunks) >= 2 else '')
+
+
+class UserQuerySet(models.QuerySet):
+    def with_days_on_site(self):
+        """Annotate `time_on_site`, the time since joining, which can be used
+        in filter() and order_by(). `User.days_on_site` uses the annotation."""
+        from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
+        # The application clock, as in `days_on_site`. Now() is truncated
+        # to seconds by SQLite.
+        now = Value(timezone.now(), output_field=DateTimeField())
+        return self.annotate(time_on_site=ExpressionWrapper(
+            now - F('date_joined'), output_field=DurationField()))
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """
     Creates and saves a User with the given email, phone, password and optional extra info.
     """
@@ -68,6 +92,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     """
     email = models.EmailField(_('Email'), max_length=255, unique=True)
     name = models.CharField(_('Full name'), max_length=255)
+    # The first two words of the name, kept in sync on save
+    first_name = models.CharField(_('First name'), max_length=255, editable=False, blank=True, db_index=True)
+    last_name = models.CharField(_('Last name'), max_length=255, editable=False, blank=True, db_index=True)
+    avatar = models.ImageField(
+        _('Avatar'), upload_to='avatars', storage=ContentAddressedStorage(), blank=True)
+    # MD5 hash of the email for Gravatar, kept in sync on save
+    email_md5 = models.CharField(max_length=32, editable=False, blank=True, db_index=True)
+    # Incremented on every save, a part of the ETags of the user pages
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     is_staff = models.BooleanField(
         _('staff status'),
@@ -94,36 +127,49 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('User')
         verbose_name_plural = _('Users')
         ordering = ['name', '-date_joined']
+        permissions = [
+            ('export_user', _('Can export users')),
+            ('email_user', _('Can email users')),
+        ]
 
-    def get_first_name(self):
-        chunks = self.name.split()
-        if len(chunks) >= 1:
-            return chunks[0]
-        else:
-            return ''
+    # first_name and last_name are stored for queries, the getters derive
+    # them from name, which may have changed since the last save
 
-    @property
-    def first_name(self):
-        return self.get_first_name()
+    def get_first_name(self):
+        return split_name(self.name)[0]
 
     def get_last_name(self):
-        chunks = self.name.split()
-        if len(chunks) >= 2:
-            return chunks[1]
-        else:
-            return ''
-
-    @property
-    def last_name(self):
-        return self.get_last_name()
+        return split_name(self.name)[1]
 
     def __str__(self):
         return self.name
 
     def get_email_md5_hash(self):
-        import hashlib
-        m = hashlib.md5(self.email.lower().encode('utf-8')).hexdigest()
-        return m
+        if not self.email_md5:
+            self.email_md5 = get_email_md5(self.email)
+        return self.email_md5
+
+    def save(self, *args, **kwargs):
+        self.email_md5 = get_email_md5(self.email)
+        self.first_name, self.last_name = split_name(self.name)
+        adding, version = self._state.adding, self.version
+        # Incremented by the UPDATE itself, so concurrent saves are all counted
+        self.version = self.version + 1 if adding else models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'version'}
+            if 'email' in update_fields:
+                update_fields.add('email_md5')
+            if 'name' in update_fields:
+                update_fields.update(('first_name', 'last_name'))
+            kwargs['update_fields'] = update_fields
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = version
+            raise
+        if not adding:
+            self.refresh_from_db(fields=['version'])
 
     def has_usable_password(self) -> bool:
         return super().has_usable_password()
@@ -131,6 +177,88 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     @property
     def days_on_site(self):
+        if 'time_on_site' in self.__dict__:
+            # Annotated by User.objects.with_days_on_site()
+            return self.time_on_site.days
         from django.utils.timezone import now
         delta = now() - self.date_joined
         return delta.days
+
+
+class Mailing(models.Model):
+    """A message sent by staff to many users, see djapps.accounts.mailings.
+
+    `subject` and `body` are templates rendered with `user` (its name, first
+    name and email) and `SITE_URL`.
+    """
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    DONE = 'done'
+    STATUS_CHOICES = (
+        (QUEUED, _('Queued')),
+        (SENDING, _('Sending')),
+        (DONE, _('Done')),
+    )
+
+    subject = models.CharField(_('Subject'), max_length=255)
+    body = models.TextField(_('Body'))
+    language = models.CharField(
+        _('Language'), max_length=10, choices=settings.LANGUAGES, default=settings.LANGUAGE_CODE)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, verbose_name=_('Created by'), null=True, blank=True,
+        on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(_('Created at'), default=timezone.now)
+    finished_at = models.DateTimeField(_('Finished at'), null=True, blank=True)
+    status = models.CharField(_('Status'), max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    total = models.PositiveIntegerField(_('Recipients'), default=0)
+    sent = models.PositiveIntegerField(_('Sent'), default=0)
+    failed = models.PositiveIntegerField(_('Failed'), default=0)
+
+    class Meta:
+        verbose_name = _('Mailing')
+        verbose_name_plural = _('Mailings')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.subject
+
+
+class MailingRecipient(models.Model):
+    """A user a mailing is sent to. Tasks claim pending recipients one at
+    a time, so a repeated task never sends the message twice."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    )
+
+    mailing = models.ForeignKey(Mailing, on_delete=models.CASCADE, related_name='recipients')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name='+')
+    status = models.CharField(_('Status'), max_length=10, choices=STATUS_CHOICES, default=PENDING)
+
+    class Meta:
+        verbose_name = _('Mailing recipient')
+        verbose_name_plural = _('Mailing recipients')
+        indexes = [models.Index(fields=['mailing', 'status'])]
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class MailingFailure(models.Model):
+    mailing = models.ForeignKey(Mailing, on_delete=models.CASCADE, related_name='failures')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name='+')
+    email = models.EmailField(_('Email'), max_length=255, blank=True)
+    error = models.TextField(_('Error'))
+    created_at = models.DateTimeField(_('Created at'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('Mailing failure')
+        verbose_name_plural = _('Mailing failures')
+        ordering = ['pk']
+
+    def __str__(self):
+        return self.email
@@ -0,0 +1,8 @@
+from djapps.search.indexes import SearchIndex, register
+from .models import User
+
+
+@register
+class UserIndex(SearchIndex):
+    model = User
+    fields = ('email', 'name')
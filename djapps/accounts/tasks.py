@@ -0,0 +1,59 @@
+from celery import shared_task
+from django.conf import settings
+
+
+@shared_task
+def export_users_task(filename, fmt='csv', fields=None, pks=None, changelist=None):
+    """Write a gzipped export of users to `USERS_EXPORT_ROOT/filename` (not
+    public, staff download it through the user admin) and return its path.
+
+    Users are either the given `pks` or, for selections of all users of the
+    admin changelist, `changelist` is a `(user pk, query string)` pair and
+    the task runs the filtered query itself.
+    """
+    import os
+    import gzip
+    from .export import EXPORT_FIELDS, changelist_queryset, iter_users, iter_users_by_pks, write_users
+
+    fields = tuple(fields or EXPORT_FIELDS)
+    path = os.path.join(settings.USERS_EXPORT_ROOT, os.path.basename(filename))
+    os.makedirs(settings.USERS_EXPORT_ROOT, exist_ok=True)
+
+    # Write to a temporary name first, so the download never serves a partial file
+    tmp_path = path + '.part'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+        if changelist is not None:
+            users = iter_users(changelist_queryset(*changelist), fields)
+        else:
+            users = iter_users_by_pks(pks, fields)
+        write_users(users, f, fmt, fields)
+    os.replace(tmp_path, path)
+    return path
+
+
+@shared_task(ignore_result=True)
+def send_mailing_task(mailing_pk):
+    """Send the next chunk of a mailing and queue the one after it,
+    see djapps.accounts.mailings."""
+    from .mailings import send_mailing_chunk
+    sent, failed, pending = send_mailing_chunk(mailing_pk)
+    if pending:
+        # Keeps the interval of MAILING_RATE between the chunks
+        send_mailing_task.apply_async(
+            (mailing_pk,), countdown=1 / settings.MAILING_RATE if settings.MAILING_RATE else 0)
+
+
+@shared_task(ignore_result=True)
+def fetch_avatar_task(email_md5, size):
+    """Fetch a Gravatar image into `AVATAR_CACHE_DIR`, see djapps.accounts.avatars."""
+    import logging
+    from django.core.cache import cache
+    from .avatars import fetch_avatar, prune_avatar_cache
+
+    try:
+        fetch_avatar(email_md5, size)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).warning('Cannot fetch the avatar %s: %s', email_md5, e)
+    # The directory is scanned at most once an hour
+    if cache.add('avatar-cache-prune', True, 60 * 60):
+        prune_avatar_cache()
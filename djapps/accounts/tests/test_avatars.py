@@ -0,0 +1,154 @@
+import shutil
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from ..avatars import allowed_size, annotate_avatars, fetch_avatar, gravatar_url, prune_avatar_cache
+from ..factories import UserFactory
+from ..models import User
+
+
+class StubGravatarHandler(BaseHTTPRequestHandler):
+    """Serves the same image for every hash and honours If-None-Match."""
+    content = b'\x89PNG stub avatar'
+    etag = '"stub-v1"'
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):
+        pass
+
+
+class AvatarTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), StubGravatarHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.gravatar_url = 'http://127.0.0.1:%d/avatar/' % cls.server.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(' Demo@Mail.com', 'John Doe', 'demo')
+
+    def setUp(self):
+        StubGravatarHandler.requests = []
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(
+            AVATAR_GRAVATAR_URL=self.gravatar_url, AVATAR_CACHE_DIR=cache_dir,
+            AVATAR_PROXY=True, AVATAR_DEFAULT='identicon')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_email_md5(self):
+        expected = hashlib.md5(b'demo@mail.com').hexdigest()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.email_md5, expected)
+        self.assertEqual(user.get_email_md5_hash(), expected)
+
+        user.email = 'new@mail.com'
+        user.save(update_fields=['email'])
+        self.assertEqual(
+            User.objects.get(pk=user.pk).email_md5, hashlib.md5(b'new@mail.com').hexdigest())
+        self.assertEqual(
+            UserFactory.build(email='Other@Mail.com').email_md5,
+            hashlib.md5(b'other@mail.com').hexdigest())
+
+    def test_annotate_avatars(self):
+        UserFactory.create_batch(3)
+        with self.assertNumQueries(1):
+            users = annotate_avatars(User.objects.only('name'), size=40)
+            for user in users:
+                self.assertEqual(user.avatar_url, '/avatar/%s/?s=40' % user.email_md5)
+        with self.settings(AVATAR_PROXY=False):
+            user = annotate_avatars([self.user])[0]
+        self.assertEqual(user.avatar_url, gravatar_url(self.user.email_md5))
+        self.assertTrue(user.avatar_url.endswith('?s=80&d=identicon'))
+
+    def test_fetch_avatar(self):
+        cached = fetch_avatar(self.user.email_md5, 40)
+        self.assertEqual(cached.read(), StubGravatarHandler.content)
+        self.assertEqual(StubGravatarHandler.requests, [
+            '/avatar/%s?s=40&d=identicon' % self.user.email_md5])
+        # Fresh copies are served from the cache
+        fetch_avatar(self.user.email_md5, 40)
+        self.assertEqual(len(StubGravatarHandler.requests), 1)
+        # Stale copies are revalidated with the upstream ETag
+        with self.settings(AVATAR_PROXY_MAX_AGE=0):
+            self.assertEqual(fetch_avatar(self.user.email_md5, 40).etag, cached.etag)
+        self.assertEqual(len(StubGravatarHandler.requests), 2)
+        # A stale copy is served when the upstream is not available
+        with self.settings(AVATAR_PROXY_MAX_AGE=0, AVATAR_GRAVATAR_URL='http://127.0.0.1:1/'):
+            with self.assertLogs('djapps.accounts.avatars', 'WARNING'):
+                self.assertEqual(fetch_avatar(self.user.email_md5, 40).read(), StubGravatarHandler.content)
+
+    def test_allowed_size(self):
+        self.assertEqual([allowed_size(x) for x in (1, 40, 41, 2048)], [40, 40, 80, 160])
+
+    def test_view(self):
+        url = '/avatar/%s/?s=40' % self.user.email_md5
+        # A missing image is fetched in the background
+        with patch('djapps.accounts.tasks.fetch_avatar_task.delay') as delay:
+            response = self.client.get(url)
+        self.assertRedirects(response, gravatar_url(self.user.email_md5, 40), fetch_redirect_response=False)
+        delay.assert_called_once_with(self.user.email_md5, 40)
+        self.assertEqual(StubGravatarHandler.requests, [])
+
+        from ..tasks import fetch_avatar_task
+        fetch_avatar_task(self.user.email_md5, 40)
+        with patch('djapps.accounts.tasks.fetch_avatar_task.delay') as delay:
+            response = self.client.get(url)
+        delay.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, StubGravatarHandler.content)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(StubGravatarHandler.requests), 1)
+
+        with self.settings(AVATAR_PROXY=False):
+            response = self.client.get(url)
+        self.assertRedirects(response, gravatar_url(self.user.email_md5, 40), fetch_redirect_response=False)
+        self.assertEqual(self.client.get('/avatar/not-a-hash/').status_code, 404)
+
+    def test_view_limits(self):
+        with patch('djapps.accounts.tasks.fetch_avatar_task.delay') as delay:
+            # Only hashes of users are served
+            self.assertEqual(self.client.get('/avatar/%s/?s=40' % ('0' * 32)).status_code, 404)
+            # Sizes are rounded up to one of AVATAR_SIZES
+            response = self.client.get('/avatar/%s/?s=50' % self.user.email_md5)
+        self.assertRedirects(response, gravatar_url(self.user.email_md5, 80), fetch_redirect_response=False)
+        delay.assert_called_once_with(self.user.email_md5, 80)
+
+    def test_prune_avatar_cache(self):
+        import os
+        for i, user in enumerate(UserFactory.create_batch(3)):
+            cached = fetch_avatar(user.email_md5, 40)
+            os.utime(cached.path, (i, i))
+        self.assertEqual(prune_avatar_cache(max_files=5), 0)
+        self.assertEqual(prune_avatar_cache(max_files=1), 2)
+        self.assertIsNotNone(type(cached)(cached.email_md5, 40).load())
+        self.assertEqual(prune_avatar_cache(max_files=1), 0)
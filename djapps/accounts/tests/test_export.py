@@ -0,0 +1,138 @@
+from unittest.mock import patch
+from django.contrib.auth.models import Group
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..factories import UserFactory
+from ..models import User
+from ..export import iter_users, stream_users, validate_fields
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin@mail.com', 'Annie Lennox', 'demo')
+        cls.u1 = User.objects.create_user(
+            'demo@mail.com', 'John Doe', 'demo')
+        cls.u2 = User.objects.create_user(
+            'robert.downey@mail.com', 'Leslie JJ Mills', 'demo')
+        editors = Group.objects.create(name='Editors')
+        authors = Group.objects.create(name='Authors')
+        cls.u1.groups.add(editors, authors)
+
+    def test_keyset_batches(self):
+        # Every batch is one query for users and one for their groups
+        with self.assertNumQueries(4):
+            users = list(iter_users(User.objects.all(), batch_size=2))
+        self.assertEqual([u.pk for u in users], [self.admin.pk, self.u1.pk, self.u2.pk])
+
+    def test_csv(self):
+        fields = ('email', 'groups')
+        content = ''.join(stream_users(iter_users(User.objects.all(), fields), 'csv', fields))
+        self.assertEqual(
+            content.splitlines(),
+            [
+                'email,groups',
+                'admin@mail.com,',
+                'demo@mail.com,"Authors,Editors"',
+                'robert.downey@mail.com,',
+            ])
+
+    def test_jsonl(self):
+        import json
+        fields = ('email', 'is_staff', 'groups')
+        lines = list(stream_users(iter_users(User.objects.filter(pk=self.u1.pk), fields), 'jsonl', fields))
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            json.loads(lines[0]),
+            {'email': 'demo@mail.com', 'is_staff': False, 'groups': ['Authors', 'Editors']})
+
+    def test_validate_fields(self):
+        self.assertEqual(validate_fields(['email', 'groups']), ('email', 'groups'))
+        with self.assertRaises(ValueError):
+            validate_fields(['email', 'password'])
+        with self.assertRaises(ValueError):
+            validate_fields(['unknown'])
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse('admin:accounts_user_changelist'),
+            {'action': 'export_csv', '_selected_action': [self.u1.pk, self.u2.pk]})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(content.splitlines()), 3)
+        self.assertIn('demo@mail.com', content)
+
+    @override_settings(USERS_EXPORT_ASYNC_THRESHOLD=1)
+    def test_admin_action_async(self):
+        self.client.force_login(self.admin)
+        with patch('djapps.accounts.tasks.export_users_task.delay') as delay:
+            response = self.client.post(
+                reverse('admin:accounts_user_changelist'),
+                {'action': 'export_jsonl', '_selected_action': [self.u1.pk, self.u2.pk]})
+        self.assertEqual(response.status_code, 302)
+        filename, fmt = delay.call_args[0]
+        self.assertEqual(sorted(delay.call_args[1]['pks']), [self.u1.pk, self.u2.pk])
+        self.assertRegex(filename, r'^users-[\d-]+\.jsonl-[0-9a-f]{64}\.gz$')
+        self.assertEqual(fmt, 'jsonl')
+
+    @override_settings(USERS_EXPORT_ASYNC_THRESHOLD=1)
+    def test_admin_action_async_select_across(self):
+        self.client.force_login(self.admin)
+        with patch('djapps.accounts.tasks.export_users_task.delay') as delay:
+            self.client.post(
+                reverse('admin:accounts_user_changelist') + '?is_superuser__exact=0',
+                {'action': 'export_csv', 'select_across': '1', '_selected_action': [self.u1.pk]})
+        # Only the filters are sent, the task repeats the query
+        self.assertEqual(delay.call_args[1], {'changelist': (self.admin.pk, 'is_superuser__exact=0')})
+
+    def test_changelist_queryset(self):
+        from ..export import changelist_queryset
+        users = list(iter_users(changelist_queryset(self.admin.pk, 'is_superuser__exact=0&q=mail'), ('email',)))
+        self.assertEqual([u.pk for u in users], [self.u1.pk, self.u2.pk])
+
+    def test_task(self):
+        import os
+        import gzip
+        import tempfile
+        from ..tasks import export_users_task
+        with tempfile.TemporaryDirectory() as export_root:
+            with self.settings(USERS_EXPORT_ROOT=export_root):
+                path = export_users_task('users.csv.gz', pks=[self.u2.pk, self.u1.pk])
+                self.assertEqual(path, os.path.join(export_root, 'users.csv.gz'))
+                with gzip.open(path, 'rt') as f:
+                    lines = f.read().splitlines()
+
+                url = reverse('admin:accounts_user_export', args=['users.csv.gz'])
+                self.client.force_login(self.admin)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/gzip')
+                response.close()
+                # Exports which are not written yet
+                response = self.client.get(reverse('admin:accounts_user_export', args=['missing.csv.gz']))
+                self.assertRedirects(response, reverse('admin:accounts_user_changelist'))
+                # Staff users without the export permission
+                staff = UserFactory.create(is_staff=True)
+                self.client.force_login(staff)
+                self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('%d,demo@mail.com' % self.u1.pk))
+
+    def test_csv_formulas(self):
+        from ..export import csv_cell
+        self.assertEqual(
+            [csv_cell(x) for x in ('=HYPERLINK("x")', '+1', '-1', '@SUM(A1)', 'John', -1, ['=a', 'b'])],
+            ["'=HYPERLINK(\"x\")", "'+1", "'-1", "'@SUM(A1)", 'John', -1, "'=a,b"])
+
+    def test_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('export_users', fields='email', stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ['email', 'admin@mail.com', 'demo@mail.com', 'robert.downey@mail.com'])
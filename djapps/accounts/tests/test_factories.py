@@ -0,0 +1,27 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from ..factories import UserFactory
+from ..models import User
+
+
+class UserFactoryTests(TestCase):
+    def test_create(self):
+        group = Group.objects.create(name='Editors')
+        user = UserFactory.create(name='John Doe', groups=[group])
+        self.assertEqual(User.objects.get(pk=user.pk).name, 'John Doe')
+        self.assertTrue(user.check_password('demo'))
+        self.assertEqual(list(user.groups.all()), [group])
+
+    def test_build(self):
+        user = UserFactory.build(password=None)
+        self.assertIsNone(user.pk)
+        self.assertFalse(user.has_usable_password())
+
+    def test_create_batch(self):
+        with self.assertNumQueries(1):
+            users = UserFactory.create_batch(50, is_active=False)
+        self.assertEqual(len({u.email for u in users}), 50)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 50)
+        # All users share the same hash
+        self.assertEqual(len({u.password for u in users}), 1)
+        self.assertTrue(users[0].check_password('demo'))
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..factories import UserFactory
+from ..mailings import Throttle, queue_mailing, send_mailing_chunk
+from ..models import Mailing, MailingRecipient, User
+from ..tasks import send_mailing_task
+
+
+@contextmanager
+def run_chunks(countdowns):
+    """Run chunk tasks at once and record the countdowns of the queued ones."""
+    def apply_async(args, countdown=0):
+        countdowns.append(countdown)
+        send_mailing_task(*args)
+
+    with patch.object(send_mailing_task, 'apply_async', side_effect=apply_async), \
+            patch.object(send_mailing_task, 'delay', side_effect=send_mailing_task):
+        yield
+
+
+@override_settings(MAILING_CHUNK_SIZE=2, MAILING_RATE=0, SITE_URL='https://example.com')
+class MailingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@mail.com', 'Annie Lennox', 'demo')
+        cls.users = [UserFactory.create() for _ in range(4)]
+
+    def test_queue_mailing(self):
+        mailing = Mailing(subject='Hello\n{{ user.name }}', body='Hi {{ user.name }} & co\n{{ SITE_URL }}')
+        pks = [x.pk for x in self.users]
+        countdowns = []
+        with run_chunks(countdowns), self.settings(MAILING_RATE=4):
+            with self.captureOnCommitCallbacks(execute=True):
+                queue_mailing(mailing, pks)
+                self.users[3].delete()
+        # Each chunk queues the next one while recipients are pending
+        self.assertEqual(countdowns, [0.25])
+
+        self.assertEqual(len(mail.outbox), 3)
+        message = mail.outbox[0]
+        user = self.users[0]
+        self.assertEqual(message.to, [user.email])
+        self.assertEqual(message.subject, 'Hello %s' % user.name)
+        self.assertIn('Hi %s & co\nhttps://example.com' % user.name, message.body)
+        self.assertIn('Hi %s &amp; co<br>https://example.com' % user.name, message.alternatives[0][0])
+
+        mailing.refresh_from_db()
+        self.assertEqual((mailing.status, mailing.total, mailing.sent, mailing.failed), (Mailing.DONE, 4, 3, 1))
+        self.assertIsNotNone(mailing.finished_at)
+        self.assertEqual(mailing.failures.get().error, 'The user is inactive or deleted.')
+
+    def test_restricted_templates(self):
+        from django.template import TemplateDoesNotExist, TemplateSyntaxError
+        from ..forms import MailingForm
+        from ..mailings import build_message, get_templates
+        user = self.users[0]
+        mailing = Mailing(subject='Hi', body='{{ user.password }}{{ user.pk }}|{{ user.first_name }} {{ user.email }}')
+        message = build_message(get_templates(mailing), user)
+        self.assertIn('|%s %s' % (user.get_first_name(), user.email), message.body)
+        self.assertNotIn(user.password, message.body)
+        form = MailingForm({'subject': 'Hi', 'body': '{% load core_tags %}', 'language': 'en'})
+        self.assertIn('body', form.errors)
+        templates = get_templates(Mailing(subject='Hi', body='{% include "accounts/email/mailing.txt" %}'))
+        with self.assertRaises(TemplateDoesNotExist):
+            build_message(templates, user)
+        with self.assertRaises(TemplateSyntaxError):
+            get_templates(Mailing(subject='{% load static %}', body=''))
+
+    def test_failures(self):
+        mailing = queue_mailing(Mailing(subject='Hello', body='Hi'), [x.pk for x in self.users[:2]])
+        send_message = mail.backends.locmem.EmailBackend.send_messages
+
+        def fail_first(backend, messages):
+            if messages[0].to == [self.users[0].email]:
+                raise ConnectionResetError('Connection reset by peer')
+            return send_message(backend, messages)
+
+        with patch.object(mail.backends.locmem.EmailBackend, 'send_messages', fail_first):
+            with self.assertLogs('djapps.accounts.mailings', 'WARNING'):
+                self.assertEqual(send_mailing_chunk(mailing.pk), (1, 1, False))
+        self.assertEqual([x.to for x in mail.outbox], [[self.users[1].email]])
+        failure = mailing.failures.get()
+        self.assertEqual((failure.user, failure.email), (self.users[0], self.users[0].email))
+        self.assertIn('ConnectionResetError', failure.error)
+        mailing.refresh_from_db()
+        self.assertEqual((mailing.status, mailing.sent, mailing.failed), (Mailing.DONE, 1, 1))
+
+    def test_repeated_chunk(self):
+        mailing = queue_mailing(Mailing(subject='Hello', body='Hi'), [x.pk for x in self.users])
+        self.assertEqual(send_mailing_chunk(mailing.pk), (2, 0, True))
+        # A redelivered copy of the task has sent to the third user meanwhile
+        MailingRecipient.objects.filter(user=self.users[2]).update(status=MailingRecipient.SENT)
+        self.assertEqual(send_mailing_chunk(mailing.pk), (1, 0, False))
+        self.assertEqual(send_mailing_chunk(mailing.pk), (0, 0, False))
+        self.assertEqual(
+            [x.to[0] for x in mail.outbox], [self.users[i].email for i in (0, 1, 3)])
+
+    def test_throttle(self):
+        now, sleeps = [0.0], []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        throttle = Throttle(4, clock=lambda: now[0], sleep=sleep)
+        for elapsed in (0, 0.1, 0.5, 0):
+            now[0] += elapsed
+            throttle.wait()
+        self.assertEqual([round(x, 3) for x in sleeps], [0.15, 0.25])
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:accounts_user_changelist')
+        selected = [x.pk for x in self.users[:3]]
+        response = self.client.post(url, {'action': 'send_email', '_selected_action': selected})
+        self.assertContains(response, 'sent to 3 active users')
+
+        response = self.client.post(url, {
+            'action': 'send_email', '_selected_action': selected, 'post': 'yes',
+            'subject': 'Hello', 'body': '{% if %}', 'language': 'en'})
+        self.assertIn('body', response.context['form'].errors)
+        self.assertFalse(Mailing.objects.exists())
+
+        countdowns = []
+        with run_chunks(countdowns), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url + '?is_staff__exact=0', {
+                'action': 'send_email', '_selected_action': selected[:1], 'select_across': '1', 'post': 'yes',
+                'subject': 'Hello', 'body': 'Hi {{ user.name }}', 'language': 'en'})
+        self.assertEqual(response.status_code, 302)
+        mailing = Mailing.objects.get()
+        self.assertEqual((mailing.created_by, mailing.total, mailing.sent), (self.admin, 4, 4))
+        self.assertEqual(sorted(x.to[0] for x in mail.outbox), sorted(x.email for x in self.users))
+
+        response = self.client.get(reverse('admin:accounts_mailing_change', args=[mailing.pk]))
+        self.assertContains(response, 'Hi {{ user.name }}')
+
+    def test_action_permissions(self):
+        from django.contrib.auth.models import Permission
+        staff = UserFactory.create(is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='view_user'))
+        self.client.force_login(staff)
+        url = reverse('admin:accounts_user_changelist')
+        actions = lambda: {x[0] for x in self.client.get(url).context['action_form'].fields['action'].choices}
+        self.assertFalse(actions() & {'send_email', 'export_csv', 'export_jsonl'})
+        response = self.client.post(url, {'action': 'send_email', '_selected_action': [self.users[0].pk]})
+        self.assertNotContains(response, 'active users', status_code=302)
+
+        staff.user_permissions.add(*Permission.objects.filter(codename__in=['email_user', 'export_user']))
+        self.assertTrue(actions() >= {'send_email', 'export_csv', 'export_jsonl'})
@@ -3,14 +3,15 @@ from ..models import User
 
 
 class UserTests(TestCase):
-    def setUp(self):
-        self.u1 = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(
             'demo@mail.com', 'John Doe', 'demo')
-        self.u2 = User.objects.create_superuser(
+        cls.u2 = User.objects.create_superuser(
             'demo2@mail.com', 'Annie Lennox', 'demo')
-        self.u3 = User.objects.create_user(
+        cls.u3 = User.objects.create_user(
             'robert.downey@mail.com', 'Leslie JJ Mills', 'demo')
-        self.u3.save()
+        cls.u3.save()
 
     def test_required_fields(self):
         self.assertEqual(User.USERNAME_FIELD, 'email')
@@ -38,3 +39,39 @@ class UserTests(TestCase):
         self.assertTrue(self.u1.has_usable_password())
         self.assertTrue(self.u2.has_usable_password())
         self.assertTrue(self.u3.has_usable_password())
+
+    def test_name_parts(self):
+        u = User.objects.get(pk=self.u3.pk)
+        self.assertEqual((u.first_name, u.last_name), ('Leslie', 'JJ'))
+        self.assertEqual((u.get_first_name(), u.get_last_name()), ('Leslie', 'JJ'))
+        self.assertEqual(User(name='Cher').get_first_name(), 'Cher')
+        self.assertEqual(User(name='Cher').get_last_name(), '')
+
+        u.name = 'Robert Downey'
+        # Not saved yet
+        self.assertEqual((u.get_first_name(), u.get_last_name()), ('Robert', 'Downey'))
+        u.save(update_fields=['name'])
+        self.assertEqual(
+            list(User.objects.filter(last_name='Downey').values_list('first_name', flat=True)),
+            ['Robert'])
+
+    def test_version(self):
+        u = User.objects.create_user('version@mail.com', 'Version', 'demo')
+        self.assertEqual(u.version, 1)
+        stale = User.objects.get(pk=u.pk)
+        u.save()
+        stale.save()
+        self.assertEqual((u.version, stale.version), (2, 3))
+        stale.save(update_fields=['name'])
+        self.assertEqual(User.objects.get(pk=u.pk).version, 4)
+
+    def test_with_days_on_site(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        User.objects.filter(pk=self.u1.pk).update(date_joined=timezone.now() - timedelta(days=40))
+        users = User.objects.with_days_on_site()
+        self.assertEqual(
+            list(users.filter(time_on_site__gte=timedelta(days=30)).values_list('pk', flat=True)),
+            [self.u1.pk])
+        self.assertEqual(users.order_by('-time_on_site')[0].days_on_site, 40)
+        self.assertEqual(User.objects.get(pk=self.u1.pk).days_on_site, 40)
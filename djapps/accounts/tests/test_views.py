@@ -7,8 +7,9 @@ from ..models import User
 
 
 class BaseViewTests(TestCase):
-    def setUp(self):
-        self.u1 = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(
             'demo@mail.com', 'John Doe', 'demo')
 
 
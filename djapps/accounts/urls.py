@@ -45,4 +45,5 @@ urlpatterns = [
 
     path('profile/personal-information/', views.personal_information, name='personal_information'),
     path('profile/personal-information/edit/', views.edit_personal_information, name='edit_personal_information'),
+    re_path(r'^avatar/(?P<email_md5>[0-9a-f]{32})/$', views.avatar, name='avatar'),
 ]
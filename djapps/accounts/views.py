@@ -5,17 +5,20 @@ from django.utils.translation import ugettext as _
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.urls import reverse, reverse_lazy
+from django.urls import reverse_lazy
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Q
+from djapps.core.http_cache import user_page
+from djapps.core.routes import fast_reverse
 from .models import User
 from .forms import EditUserForm
 
 
 @login_required
+@user_page
 def personal_information(request):
     user = request.user
     context = {
@@ -32,7 +35,7 @@ def edit_personal_information(request):
         form = EditUserForm(instance=user, data=request.POST, files=request.FILES)
         if form.is_valid():
             form.save()
-            return redirect(reverse('personal_information'))
+            return redirect(fast_reverse('personal_information'))
     else:
         form = EditUserForm(instance=user)
     context = {
@@ -51,12 +54,12 @@ def login_view(request, template_name='accounts/login.html'):
     if request.user.is_authenticated:
         if redirect_to == request.path:
             raise ValueError('Redirection loop for authenticated user detected.')
-        return redirect(reverse('index'))
+        return redirect(fast_reverse('index'))
     elif request.method == 'POST':
         form = UserAuthForm(request, data=request.POST)
         if form.is_valid():
             login(request, form.get_user())
-            return redirect(reverse('index'))
+            return redirect(fast_reverse('index'))
     else:
         form = UserAuthForm(request)
 
@@ -69,7 +72,7 @@ def login_view(request, template_name='accounts/login.html'):
 def register(request, template_name='accounts/register.html'):
     from .forms import UserRegistrationForm
     if request.user.is_authenticated:
-        return redirect(reverse('index'))
+        return redirect(fast_reverse('index'))
 
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
@@ -90,3 +93,43 @@ def logout_view(request):
     _next = request.GET.get('next')
     logout(request)
     return redirect(_next if _next else settings.LOGOUT_REDIRECT_URL)
+
+
+def avatar(request, email_md5):
+    """Serve a Gravatar image of a user from the local cache, see `AVATAR_PROXY`.
+
+    Missing and stale images are fetched in the background, the visitor is
+    redirected to Gravatar until the image is cached.
+    """
+    from django.http import Http404
+    from django.utils.cache import get_conditional_response, patch_cache_control
+    from .avatars import DEFAULT_SIZE, MAX_SIZE, CachedAvatar, allowed_size, gravatar_url, queue_fetch_avatar
+    from .models import User
+
+    try:
+        size = min(max(int(request.GET.get('s', DEFAULT_SIZE)), 1), MAX_SIZE)
+    except ValueError:
+        size = DEFAULT_SIZE
+    if not settings.AVATAR_PROXY:
+        return redirect(gravatar_url(email_md5, size))
+
+    size = allowed_size(size)
+    if not User.objects.filter(email_md5=email_md5).exists():
+        raise Http404
+    cached = CachedAvatar(email_md5, size)
+    if not cached.load() or not cached.is_fresh:
+        queue_fetch_avatar(email_md5, size)
+    try:
+        content = cached.read() if cached.meta else None
+    except OSError:
+        # Removed from the cache since its metadata was read
+        content = None
+    if content is None:
+        return redirect(gravatar_url(email_md5, size))
+
+    response = get_conditional_response(request, etag=cached.etag)
+    if response is None:
+        response = HttpResponse(content, content_type=cached.meta['content_type'])
+    response['ETag'] = cached.etag
+    patch_cache_control(response, public=True, max_age=settings.AVATAR_PROXY_MAX_AGE)
+    return response
@@ -5,3 +5,15 @@ from django.utils.translation import ugettext_lazy as _
 class CoreConfig(AppConfig):
     name = 'djapps.core'
     verbose_name = _('Core')
+
+    def ready(self):
+        from django.conf import settings
+        if settings.SENTRY_DSN:
+            # Here rather than in the settings, which are also imported by
+            # processes without errors to report
+            from .telemetry import init_sentry
+            init_sentry(settings.SENTRY_DSN, **settings.SENTRY_OPTIONS)
+        if 'easy_thumbnails' in settings.INSTALLED_APPS:
+            from easy_thumbnails.signals import saved_file
+            from .thumbnails import queue_thumbnails
+            saved_file.connect(queue_thumbnails, dispatch_uid='djapps.core.queue_thumbnails')
@@ -0,0 +1,45 @@
+"""Micro-benchmarks for the project helpers.
+
+Every module of this package exposes a `run()` function which returns
+a list of results built with `measure`. Run them with:
+
+    ./manage.py benchmark [module ...]
+    ./manage.py benchmark core_tags --save baseline.json
+    ./manage.py benchmark core_tags --compare baseline.json
+"""
+import timeit
+import tracemalloc
+
+
+def measure_allocations(func):
+    """Return the peak of memory allocated by a single call, in bytes."""
+    func()  # warm up caches, so only the steady state is measured
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+def measure(name, func, number=None, repeat=5, **extra):
+    """Time `func` and return a result dict with the best time per call
+    and the memory allocated per call. Extra keyword arguments are reported
+    next to the timing."""
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    result = {
+        'name': name,
+        'time': best,
+        'ops': 1 / best if best else float('inf'),
+        'alloc': measure_allocations(func),
+    }
+    result.update(extra)
+    return result
@@ -0,0 +1,24 @@
+"""Avatar URLs of a 1000 users listing: hashing per row vs. the stored hash."""
+from . import measure
+
+
+def legacy_urls(users, size=80):
+    import hashlib
+    from django.conf import settings
+    return [
+        '%s%s?s=%d&d=%s' % (
+            settings.AVATAR_GRAVATAR_URL,
+            hashlib.md5(user.email.lower().encode('utf-8')).hexdigest(),
+            size, settings.AVATAR_DEFAULT)
+        for user in users]
+
+
+def run():
+    from djapps.accounts.avatars import annotate_avatars
+    from djapps.accounts.factories import UserFactory
+
+    users = [UserFactory.build(email='user%d@example.com' % i) for i in range(1000)]
+    return [
+        measure('md5 per row [1000 users]', lambda: legacy_urls(users)),
+        measure('annotate_avatars [1000 users]', lambda: annotate_avatars(users)),
+    ]
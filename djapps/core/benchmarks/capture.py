@@ -0,0 +1,34 @@
+"""The meta-title pattern of the `capture` tag docstring rendered with and
+without `cached`, on templates loaded from a locmem loader (templates
+compiled from strings are never cached)."""
+from . import measure
+
+BLOCK = (
+    '{% block meta-title %}{{ title|title }} | {{ site_name|upper }}'
+    '{% for part in parts %} - {{ part|capfirst }}{% endfor %}{% endblock %}')
+TEMPLATES = {
+    'uncached.html': (
+        '{% load core_tags %}<title>{% capture as meta_title %}' + BLOCK +
+        '{% endcapture %}</title><meta property="og:title" content="{{ meta_title }}">'),
+    'cached.html': (
+        '{% load core_tags %}<title>{% capture as meta_title cached path %}' + BLOCK +
+        '{% endcapture %}</title><meta property="og:title" content="{{ meta_title }}">'),
+}
+
+
+def run():
+    from django.template import Context, Engine
+    from djapps.core.fragment_cache import clear_fragments
+
+    engine = Engine(
+        loaders=[('django.template.loaders.locmem.Loader', TEMPLATES)],
+        libraries={'core_tags': 'djapps.core.templatetags.core_tags'})
+    context = {
+        'path': '/articles/', 'title': 'latest articles', 'site_name': 'demo', 'parts': ['news', 'blog'],
+    }
+    clear_fragments()
+    results = []
+    for name in TEMPLATES:
+        template = engine.get_template(name)
+        results.append(measure(name, lambda: template.render(Context(context))))
+    return results
@@ -0,0 +1,40 @@
+"""Collection filters of `core_tags` over 10k items: legacy lambdas vs. `collection_utils`."""
+import random
+from types import SimpleNamespace
+from . import measure
+
+
+SIZE = 10000
+
+
+def run():
+    from .. import collection_utils as cu
+
+    rnd = random.Random(0)
+    objects = [
+        SimpleNamespace(name='user%05d' % rnd.randrange(SIZE), score=rnd.random(), group=i % 7)
+        for i in range(SIZE)]
+    dicts = [vars(x) for x in objects]
+    strings = [' %s ' % x.name for x in objects]
+    scores = [x.score for x in objects]
+
+    return [
+        measure('sort_by_attr legacy', lambda: sorted(objects, key=lambda x: getattr(x, 'name'))),
+        measure('sort_by_attr', lambda: cu.sort_items(objects, 'name')),
+        measure('sort_by_key legacy', lambda: sorted(dicts, key=lambda x: x['score'])),
+        measure('sort_by_key', lambda: cu.sort_items(dicts, 'score', by_key=True)),
+        measure('sort multi-key', lambda: cu.sort_items(objects, 'group,name')),
+        measure('sort mixed directions', lambda: cu.sort_items(objects, 'group,-score')),
+        measure('top 10 with full sort', lambda: sorted(objects, key=lambda x: x.score, reverse=True)[:10]),
+        measure('top 10 with heap', lambda: cu.sort_items(objects, '-score', limit=10)),
+        measure('comma_separated_attrs legacy', lambda: ','.join([getattr(x, 'name') for x in objects])),
+        measure('comma_separated_attrs', lambda: ','.join(cu.iter_attrs(objects, 'name'))),
+        measure('join_list legacy', lambda: ','.join([str(x) for x in scores])),
+        measure('join_list', lambda: cu.join_values(scores)),
+        measure(
+            'remove + strip + join legacy',
+            lambda: ','.join([x.strip() for x in [x for x in strings if x != strings[0]]])),
+        measure(
+            'remove + strip + join generators',
+            lambda: ','.join(cu.iter_strip(cu.iter_remove_value(strings, strings[0])))),
+    ]
@@ -0,0 +1,197 @@
+"""Rendering cost of every tag and filter of `core_tags` on realistic inputs.
+
+Each case renders a small template which uses one tag, so the numbers include
+the template engine overhead of a single `{{ }}`/`{% %}` node. The empty
+template case shows that overhead alone.
+"""
+import os
+import sys
+import subprocess
+from django.conf import settings
+from . import measure
+
+
+MODULE = 'djapps.core.templatetags.core_tags'
+
+# name -> template source; `{% load core_tags %}` is prepended
+CASES = {
+    'empty template': '',
+    # Debugging
+    'debug_print': '{% debug_print title %}',
+    'debug_context': '{% debug_context %}',
+    'attrs_list': '{{ obj|attrs_list|length }}',
+    'inspect': '{{ obj|inspect|length }}',
+    # Settings
+    'load_option': '{% load_option "GOOGLE_TAG_MANAGER" %}',
+    # Helpers
+    'in_list': '{{ "3"|in_list:"1,2,3,4" }}',
+    'filename': '{{ path|filename }}',
+    'fileext': '{{ path|fileext }}',
+    'make_range': '{{ "0,50,5"|make_range|length }}',
+    'get_element': '{{ mapping|get_element:"email" }}',
+    'remove_value': '{{ words|remove_value:"beta"|length }}',
+    'cast_elements': '{{ numbers_str|cast_elements:"int"|length }}',
+    'set_element': '{% set_element mapping "email" "x@example.com" as m %}',
+    'index_element': '{{ words|index_element:2 }}',
+    'keys': '{{ mapping|keys|length }}',
+    'get_attr': '{{ obj|get_attr:"name" }}',
+    'to_int': '{{ "42"|to_int }}',
+    'to_list': '{{ mapping|to_list|length }}',
+    'to_set': '{{ words|to_set|length }}',
+    'to_dict': '{{ pairs|to_dict|length }}',
+    'ignore_none': '{{ none|ignore_none }}',
+    'sort': '{{ numbers|sort|length }}',
+    'sort_by_attr': '{{ objects|sort_by_attr:"score"|length }}',
+    'sort_by_key': '{{ rows|sort_by_key:"score"|length }}',
+    'sort_items': '{% sort_items objects "-score" limit=10 as top %}',
+    'class_name': '{{ obj|class_name }}',
+    'uikit_widget_css_class': '{{ form.email|uikit_widget_css_class }}',
+    'widget_css_class': '{{ form.email|widget_css_class:"form-control" }}',
+    'widget_placeholder': '{{ form.email|widget_placeholder:"Email" }}',
+    'widget_attrs': '{% widget_attrs form.email class="form-control" data_id="1" %}',
+    'widget_attrs_from_dict': '{% widget_attrs_from_dict form.email attrs %}',
+    'markdown': '{{ text|markdown }}',
+    'subtract': '{{ 10|subtract:3 }}',
+    'add': '{{ 10|add:3 }}',
+    'divide': '{{ 10|divide:3 }}',
+    'multiply': '{{ 10|multiply:3 }}',
+    'divide_and_trunc': '{{ 10|divide_and_trunc:3 }}',
+    'append_to_list': '{{ words|to_list|append_to_list:"x" }}',
+    'beautify_comma_separation': '{{ csv|beautify_comma_separation }}',
+    'comma_separated_attrs': '{{ objects|comma_separated_attrs:"name"|length }}',
+    'is_today': '{{ now|is_today }}',
+    'is_yesterday': '{{ now|is_yesterday }}',
+    'is_checkbox': '{{ form.agree|is_checkbox }}',
+    'is_radio_select': '{{ form.choice|is_radio_select }}',
+    'is_checkbox_select_multiple': '{{ form.tags|is_checkbox_select_multiple }}',
+    'is_file_input': '{{ form.avatar|is_file_input }}',
+    'is_hidden_input': '{{ form.next|is_hidden_input }}',
+    'widget_class_name': '{{ form.email|widget_class_name }}',
+    'weight': '{{ 72.456|weight }}',
+    'create_list': '{% create_list as l %}',
+    'create_dict': '{% create_dict as d %}',
+    'save': '{% save title as t %}',
+    'update_context_attr': '{% update_context_attr "x" title %}',
+    'split_str (tag)': '{% split_str csv as parts %}',
+    'split_str (filter)': '{{ csv|split_str|length }}',
+    'strip_items': '{{ words|strip_items|length }}',
+    'join_list': '{{ numbers|join_list|length }}',
+    'thousands_separator': '{{ 1234567|thousands_separator }}',
+    'set_query_parameter': '{% set_query_parameter url "page" 3 %}',
+    'get_query_parameter': '{{ url|get_query_parameter:"sort" }}',
+    'query_url': '{% query_url page=3 %}',
+    'sort_url': '{% sort_url "name" %}',
+    'querystring': '{% querystring as qs %}{% query_url qs page=3 %}{% endquerystring %}',
+    'thumbnail_url_or_placeholder': '{% thumbnail_url_or_placeholder none "avatar" %}',
+    'vendor_asset': '{% vendor_asset "bootstrap.min.css" %}',
+    'route': '{% route "personal_information" %}',
+    'build_absolute_uri': '{% build_absolute_uri "/users/" %}',
+    # Querysets (built, never executed)
+    'order_by': '{% with users|order_by:"name,-date_joined" as qs %}{% endwith %}',
+    'select_related': '{% with users|select_related:"x" as qs %}{% endwith %}',
+    'prefetch_related': '{% with users|prefetch_related:"groups" as qs %}{% endwith %}',
+    'distinct': '{% with users|distinct as qs %}{% endwith %}',
+    'prepare_query_object': '{% prepare_query_object logic="OR" name="a" email="b" as q %}',
+    'filter_queryset': '{% with users|filter_queryset:query as qs %}{% endwith %}',
+    'exclude_from_queryset': '{% with users|exclude_from_queryset:query as qs %}{% endwith %}',
+    # Empty querysets are not sent to the database
+    'guarded_queryset': '{% guarded_queryset no_users limit=10 as rows %}',
+    'for_queryset': '{% for_queryset user in no_users %}{{ user.email }}{% endfor_queryset %}',
+    'exclude_from_str': '{% exclude_from_str title "the" "a" %}',
+    'endswith': '{{ path|endswith:".jpg" }}',
+    'startswith': '{{ path|startswith:"/media" }}',
+    # Liquid compatibility
+    'append': '{{ "sales"|append:".jpg" }}',
+    'camelcase': '{{ "coming-soon-page"|camelcase }}',
+    'capitalize': '{{ title|capitalize }}',
+    'downcase': '{{ title|downcase }}',
+    'escape': '{{ html|escape }}',
+    'upcase': '{{ title|upcase }}',
+    'surround_cyrillic': '{{ cyrillic|surround_cyrillic }}',
+    'encodeobj': '{{ rows|encodeobj|length }}',
+    'signobj': '{{ rows|signobj|length }}',
+    'decodeobj': '{{ signed|decodeobj|length }}',
+    'capture': '{% capture as meta_title silent %}{{ title }} | Demo{% endcapture %}{{ meta_title }}',
+}
+
+
+def make_context():
+    import datetime
+    from types import SimpleNamespace
+    from django import forms
+    from django.db.models import Q
+    from django.test import RequestFactory
+    from django.utils import timezone
+    from djapps.accounts.models import User
+    from ..serialization import dumps
+
+    class DemoForm(forms.Form):
+        email = forms.EmailField()
+        agree = forms.BooleanField()
+        choice = forms.ChoiceField(choices=[(1, 'One'), (2, 'Two')], widget=forms.RadioSelect)
+        tags = forms.MultipleChoiceField(
+            choices=[(1, 'One'), (2, 'Two')], widget=forms.CheckboxSelectMultiple)
+        avatar = forms.FileField()
+        next = forms.CharField(widget=forms.HiddenInput)
+
+    objects = [
+        SimpleNamespace(name='User %d' % i, score=(i * 7919) % 1000)
+        for i in range(100)]
+    rows = [vars(x) for x in objects]
+    return {
+        'request': RequestFactory().get('/users/?q=john&sort=name&page=2'),
+        'title': 'The quick brown fox jumps over a lazy dog',
+        'obj': SimpleNamespace(name='Demo', email='demo@example.com'),
+        'path': '/media/avatars/2020/03/portrait.jpg',
+        'url': '/users/?q=john&sort=name&page=2',
+        'mapping': {'email': 'demo@example.com', 'name': 'Demo', 'id': 1},
+        'pairs': [('a', 1), ('b', 2), ('c', 3)],
+        'words': [' alpha', 'beta ', ' gamma ', 'delta'] * 25,
+        'numbers': list(range(100, 0, -1)),
+        'numbers_str': [str(x) for x in range(100)],
+        'objects': objects,
+        'rows': rows,
+        'signed': dumps(rows),
+        'none': None,
+        'csv': 'alpha, beta,,gamma , delta',
+        'text': '# Title\n\nSome *markdown* text with a [link](https://example.com).\nNext line.',
+        'html': '<p>Hello & welcome</p>',
+        'cyrillic': 'Demo project — Демонстрационный проект',
+        'now': timezone.now() - datetime.timedelta(hours=3),
+        'form': DemoForm(),
+        'attrs': {'class': 'form-control', 'data-id': '1'},
+        'users': User.objects.all(),
+        'no_users': User.objects.none(),
+        'query': Q(name='Demo') | Q(email__icontains='demo'),
+    }
+
+
+def measure_import():
+    """The cold cost of importing `core_tags` and registering its tags, measured
+    by `python -X importtime` in a new process with Django set up."""
+    code = 'import django; django.setup(); import %s' % MODULE
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.rsplit('|', 2)
+        if name.strip() == MODULE:
+            return int(cumulative) / 10 ** 6
+    raise RuntimeError('%s was not imported' % MODULE)
+
+
+def run():
+    from django.template import Context, Template
+
+    results = []
+    elapsed = min(measure_import() for _ in range(5))
+    results.append({'name': 'import core_tags', 'time': elapsed, 'ops': 1 / elapsed})
+    results.append(measure('{% load core_tags %}', lambda: Template('{% load core_tags %}')))
+
+    data = make_context()
+    for name, source in CASES.items():
+        template = Template('{% load core_tags %}' + source)
+        results.append(measure(name, lambda: template.render(Context(data))))
+    return results
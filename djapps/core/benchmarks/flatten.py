@@ -0,0 +1,60 @@
+"""The recursive `flatten` this repo used to have (with `collections.abc`,
+`collections.MutableMapping` is gone in Python 3.10) vs. the stack-based
+`iter_flatten`, on a wide config-like payload and on one nested deeper
+than the recursion limit."""
+import sys
+from collections.abc import MutableMapping
+from . import measure
+
+
+def legacy_flatten(d, parent_key='', sep='.'):
+    items = []
+    for k, v in d.items():
+        new_key = parent_key + sep + k if parent_key else k
+        if isinstance(v, MutableMapping):
+            items.extend(legacy_flatten(v, new_key, sep=sep).items())
+        else:
+            items.append((new_key, v))
+    return dict(items)
+
+
+def make_wide(width=20, depth=3):
+    if not depth:
+        return {'value%d' % i: i for i in range(width)}
+    return {'section%d' % i: make_wide(width, depth - 1) for i in range(width)}
+
+
+def make_deep(depth):
+    data = value = {}
+    for i in range(depth):
+        value['level%d' % i] = value = {}
+    value['leaf'] = 1
+    return data
+
+
+def consume(iterator):
+    for _ in iterator:
+        pass
+
+
+def run():
+    from ..utils import flatten, iter_flatten, unflatten
+
+    wide = make_wide()
+    leaves = len(flatten(wide))
+    deep = make_deep(sys.getrecursionlimit() * 5)
+    try:
+        legacy_flatten(deep)
+        legacy = 'ok'
+    except RecursionError:
+        legacy = 'RecursionError'
+
+    flat = flatten(wide)
+    return [
+        measure('wide legacy_flatten', lambda: legacy_flatten(wide), leaves=leaves),
+        measure('wide flatten', lambda: flatten(wide), leaves=leaves),
+        measure('wide iter_flatten consumed', lambda: consume(iter_flatten(wide)), leaves=leaves),
+        measure('wide unflatten', lambda: unflatten(flat), leaves=leaves),
+        measure('deep flatten', lambda: flatten(deep), depth=len(next(iter_flatten(deep))[0].split('.')),
+                legacy=legacy),
+    ]
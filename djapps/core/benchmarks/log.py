@@ -0,0 +1,78 @@
+"""Logging a record on the request thread: a synchronous JSON stream handler
+vs. `QueueHandler`, alone and from 8 threads at once, writing to a local file
+and to a slow sink (a pipe of a busy log collector)."""
+from . import measure
+
+THREADS = 8
+RECORDS = 500
+
+
+class SlowStream:
+    """A stream which blocks for 100 us on every write."""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        import time
+        time.sleep(0.0001)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def make_logger(name, handler):
+    import logging
+    from djapps.core.log import RequestIDFilter
+
+    handler.addFilter(RequestIDFilter())
+    logger = logging.getLogger('djapps.benchmarks.%s' % name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def burst(logger):
+    import threading
+
+    def work():
+        for i in range(RECORDS):
+            logger.warning('Request %d done', i, extra={'status_code': 200})
+    threads = [threading.Thread(target=work) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run():
+    import logging
+    import tempfile
+    from djapps.core.log import JSONFormatter, QueueHandler
+
+    results = []
+    for sink, wrap in (('file', lambda f: f), ('slow sink', SlowStream)):
+        with tempfile.TemporaryFile('w') as sync_file, tempfile.TemporaryFile('w') as queue_file:
+            stream_handler = logging.StreamHandler(wrap(sync_file))
+            stream_handler.setFormatter(JSONFormatter())
+            sync_logger = make_logger('sync', stream_handler)
+            queue_handler = QueueHandler(stream=wrap(queue_file), maxsize=100000)
+            queue_logger = make_logger('queue', queue_handler)
+            try:
+                results += [
+                    measure('StreamHandler, %s' % sink, lambda: sync_logger.warning('Request %d done', 1)),
+                    measure('QueueHandler, %s' % sink, lambda: queue_logger.warning('Request %d done', 1),
+                            number=1000),
+                ]
+                queue_handler.flush()
+                results += [
+                    measure('StreamHandler, %s [8 threads x 500]' % sink, lambda: burst(sync_logger),
+                            number=1, repeat=3),
+                    measure('QueueHandler, %s [8 threads x 500]' % sink, lambda: burst(queue_logger),
+                            number=1, repeat=3),
+                ]
+                results[-1]['dropped'] = queue_handler.dropped
+            finally:
+                queue_handler.close()
+    return results
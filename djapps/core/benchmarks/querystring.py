@@ -0,0 +1,59 @@
+"""A 50-link pagination bar: the legacy parse-per-link helper vs. `ParsedURL` and `{% querystring %}`."""
+from . import measure
+
+
+PAGES = 50
+URL = '/users/?q=john+doe&status=active&status=staff&sort=-date_joined&page=7'
+
+
+def legacy_set_query_parameter(url, param_name, param_value):
+    from urllib.parse import (
+        urlencode,
+        parse_qs,
+        urlsplit,
+        urlunsplit,
+    )
+    scheme, netloc, path, query_string, fragment = urlsplit(url)
+    query_params = parse_qs(query_string)
+    if param_value:
+        query_params[param_name] = [param_value]
+    elif param_name in query_params:
+        del query_params[param_name]
+    new_query_string = urlencode(query_params, doseq=True)
+    return urlunsplit((scheme, netloc, path, new_query_string, fragment))
+
+
+def run():
+    from django.template import Context, Template
+    from django.test import RequestFactory
+    from ..querystring import ParsedURL
+
+    pages = range(1, PAGES + 1)
+    legacy_template = Template(
+        '{% load core_tags %}'
+        '{% for p in pages %}'
+        '<a href="{% set_query_parameter request.get_full_path "page" p %}">{{ p }}</a>'
+        '{% endfor %}')
+    block_template = Template(
+        '{% load core_tags %}'
+        '{% querystring as qs %}{% for p in pages %}'
+        '<a href="{% query_url qs page=p %}">{{ p }}</a>'
+        '{% endfor %}{% endquerystring %}')
+
+    def replace_pages():
+        qs = ParsedURL(URL)
+        return [qs.replace(page=p) for p in pages]
+
+    def render(t):
+        # A fresh request each time, so the per-request parse is included
+        request = RequestFactory().get(URL)
+        return t.render(Context({'request': request, 'pages': pages}))
+
+    return [
+        measure(
+            'legacy function x%d' % PAGES,
+            lambda: [legacy_set_query_parameter(URL, 'page', p) for p in pages]),
+        measure('ParsedURL.replace x%d' % PAGES, replace_pages),
+        measure('set_query_parameter template', lambda: render(legacy_template)),
+        measure('querystring template', lambda: render(block_template)),
+    ]
@@ -0,0 +1,23 @@
+"""`django.urls.reverse` vs. `fast_reverse` on the routes of `demo/urls.py`
+the header and the account views use, the `{% url %}` vs. `{% route %}`
+tags, and the one-time cost of building the route table."""
+from . import measure
+
+NAMES = ['index', 'login', 'logout', 'personal_information', 'admin:index']
+
+
+def run():
+    from django.template import Context, Template
+    from django.urls import reverse
+    from djapps.core.routes import build_routes, fast_reverse
+
+    results = []
+    for name in NAMES:
+        results.append(measure('reverse(%r)' % name, lambda: reverse(name)))
+        results.append(measure('fast_reverse(%r)' % name, lambda: fast_reverse(name)))
+    for tag in ('url', 'route'):
+        template = Template('{% load core_tags %}' + ''.join(
+            '<a href="{%% %s %r %%}"></a>' % (tag, x) for x in NAMES[:4]))
+        results.append(measure('{%% %s %%} x 4' % tag, lambda: template.render(Context())))
+    results.append(measure('build_routes()', build_routes, routes=len(build_routes())))
+    return results
@@ -0,0 +1,30 @@
+"""Searching 100000 users: a substring scan of every row vs. the inverted index."""
+from . import measure
+
+SIZE = 100000
+
+
+def scan(documents, query):
+    words = query.lower().split()
+    return [
+        pk for pk, document in documents
+        if all(word in document['email'].lower() or word in document['name'].lower() for word in words)
+    ][:100]
+
+
+def run():
+    from djapps.accounts.models import User
+    from djapps.search.backends import InMemoryBackend
+    from djapps.search.indexes import get_index
+
+    index = get_index(User)
+    documents = [
+        (i, {'email': 'user%d@example.com' % i, 'name': 'First%d Last%d' % (i % 997, i % 101)})
+        for i in range(SIZE)]
+    backend = InMemoryBackend()
+    backend.reset(index)
+    backend.index_documents(index, documents)
+    return [
+        measure('icontains scan [100000 users]', lambda: scan(documents, 'first42 last7'), repeat=3),
+        measure('inverted index [100000 users]', lambda: backend.search(index, 'first42 last7', 100)),
+    ]
@@ -0,0 +1,57 @@
+"""Compare `signobj` (signed JSON) with the legacy pickle based `encodeobj`."""
+import base64
+import pickle
+from . import measure
+
+
+def make_payload(rows=100):
+    """A list of dicts similar to `model_to_dict()` results."""
+    import uuid
+    import datetime
+    from decimal import Decimal
+    now = datetime.datetime(2020, 3, 5, 14, 2, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'id': i,
+            'uuid': uuid.UUID(int=i),
+            'email': 'user%d@example.com' % i,
+            'name': 'User Number %d' % i,
+            'is_active': i % 3 != 0,
+            'balance': Decimal('%d.%02d' % (i * 7, i % 100)),
+            'date_joined': now - datetime.timedelta(days=i),
+            'groups': ['Editors', 'Authors'] if i % 2 else [],
+        }
+        for i in range(rows)
+    ]
+
+
+def run():
+    from ..serialization import dumps, loads
+
+    results = []
+    for rows in (1, 100, 1000):
+        payload = make_payload(rows)
+        pickled = base64.b64encode(pickle.dumps(payload)).decode('ascii')
+        signed = dumps(payload)
+        signed_raw = dumps(payload, compress=False)
+        results += [
+            measure(
+                'pickle encode [%d rows]' % rows,
+                lambda: base64.b64encode(pickle.dumps(payload)).decode('ascii'),
+                size=len(pickled)),
+            measure(
+                'pickle decode [%d rows]' % rows,
+                lambda: pickle.loads(base64.b64decode(pickled))),
+            measure(
+                'signed encode [%d rows]' % rows,
+                lambda: dumps(payload),
+                size=len(signed)),
+            measure(
+                'signed decode [%d rows]' % rows,
+                lambda: loads(signed)),
+            measure(
+                'signed encode, no compression [%d rows]' % rows,
+                lambda: dumps(payload, compress=False),
+                size=len(signed_raw)),
+        ]
+    return results
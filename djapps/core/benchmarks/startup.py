@@ -0,0 +1,92 @@
+"""Gunicorn started with `gunicorn.conf.py`, with and without `preload_app`:
+the time until the first request is answered by /readiness/, and the memory
+of the workers. Pss counts pages shared copy-on-write with the master as
+a share, so it shows the memory the workers really add.
+
+Gunicorn runs with the settings of the benchmark command."""
+import os
+import sys
+import time
+import socket
+import subprocess
+import urllib.request
+from django.conf import settings
+
+WORKERS = 2
+TIMEOUT = 60
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_children(pid):
+    try:
+        with open('/proc/%d/task/%d/children' % (pid, pid)) as f:
+            return [int(x) for x in f.read().split()]
+    except OSError:
+        return []
+
+
+def get_memory(pid):
+    """Rss and Pss of the process in bytes."""
+    memory = {}
+    with open('/proc/%d/smaps_rollup' % pid) as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                memory[name] = int(value.split()[0]) * 1024
+    return memory
+
+
+def wait_ready(url, process):
+    started = time.perf_counter()
+    while time.perf_counter() - started < TIMEOUT:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited with %s' % process.returncode)
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError('gunicorn did not answer %s' % url)
+
+
+def start(preload):
+    port = get_free_port()
+    module, _, attr = settings.WSGI_APPLICATION.rpartition('.')
+    env = dict(
+        os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, GUNICORN_PRELOAD=str(preload),
+        WEB_CONCURRENCY=str(WORKERS), GUNICORN_BIND='127.0.0.1:%d' % port)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '%s:%s' % (module, attr),
+         '--config', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py')],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = wait_ready('http://127.0.0.1:%d/readiness/' % port, process)
+        # Every worker answers a request before its memory is read
+        deadline = time.perf_counter() + TIMEOUT
+        while len(get_children(process.pid)) < WORKERS and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        for _ in range(WORKERS * 4):
+            urllib.request.urlopen('http://127.0.0.1:%d/readiness/' % port).close()
+        memory = [get_memory(pid) for pid in get_children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait(TIMEOUT)
+    return {
+        'name': 'gunicorn %s' % ('preload' if preload else 'no preload'),
+        'time': ready,
+        'ops': 1 / ready,
+        'worker_rss_mb': round(sum(x['Rss'] for x in memory) / len(memory) / 2 ** 20, 1),
+        'worker_pss_mb': round(sum(x['Pss'] for x in memory) / len(memory) / 2 ** 20, 1),
+    }
+
+
+def run():
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        return []
+    return [start(True), start(False)]
@@ -0,0 +1,40 @@
+"""The cost of reporting a repeated error to Sentry (with a fake transport)
+with and without `EventLimiter`, and of sampling a request."""
+from . import measure
+
+
+def fail():
+    raise ValueError('Repeated error')
+
+
+def capture():
+    import sentry_sdk
+    try:
+        fail()
+    except ValueError:
+        sentry_sdk.capture_exception()
+
+
+def run():
+    import sentry_sdk
+    from djapps.core.testing import FakeTransport
+    from djapps.core.telemetry import TracesSampler, get_sentry_options
+
+    results = []
+    for name, options in (
+            ('capture_exception, no limit', {'events_per_minute': 10 ** 9}),
+            ('capture_exception, repeats dropped', {'events_per_minute': 10})):
+        transport = FakeTransport()
+        sentry_sdk.init(
+            'https://key@sentry.invalid/1', transport=transport, default_integrations=False,
+            **get_sentry_options(**options))
+        try:
+            results.append(measure(name, capture, repeat=3))
+        finally:
+            sentry_sdk.Hub.current.bind_client(None)
+        results[-1]['sent'] = len(transport.events)
+
+    sampler = TracesSampler(0.05, {'login': 1.0, 'index': 0.01})
+    context = {'parent_sampled': None, 'wsgi_environ': {'PATH_INFO': '/login/'}}
+    results.append(measure('traces_sampler', lambda: sampler(context)))
+    return results
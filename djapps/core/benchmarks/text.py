@@ -0,0 +1,32 @@
+"""`surround_cyrillic` on long texts: run grouping vs. the per-character loop."""
+from . import measure
+
+
+def legacy_surround(value, span_class='cyrillic-char'):
+    from ..utils import is_roman_chars
+    result = ''
+    for c in value:
+        if is_roman_chars(c):
+            result += c
+        else:
+            result += '<span class="%s">%s</span>' % (span_class, c)
+    return result
+
+
+def make_text(size=100 * 1024):
+    chunk = 'Lorem ipsum dolor sit amet, Привет мир! consectetur adipiscing elit. Съешь же ещё этих булок. '
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def run():
+    from ..utils import iter_surround_non_roman, surround_non_roman
+    text = make_text()
+    title = 'Главная страница — Home'
+    legacy = legacy_surround(text)
+    grouped = ''.join(iter_surround_non_roman(text))
+    return [
+        measure('legacy [100 KB]', lambda: legacy_surround(text), number=1, size=len(legacy)),
+        measure('grouped [100 KB]', lambda: ''.join(iter_surround_non_roman(text)), number=1, size=len(grouped)),
+        measure('legacy [title]', lambda: legacy_surround(title)),
+        measure('grouped, cached [title]', lambda: surround_non_roman(title)),
+    ]
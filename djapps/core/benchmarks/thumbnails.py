@@ -0,0 +1,38 @@
+"""Avatar thumbnails of large uploads: full decoding vs. `draft()`/`reduce()`."""
+from . import measure
+
+
+def make_image(size, fmt):
+    from io import BytesIO
+    from PIL import Image, ImageDraw
+    image = Image.new('RGB', size, '#3366cc')
+    draw = ImageDraw.Draw(image)
+    for i in range(0, size[0], 40):
+        draw.line((i, 0, size[0] - i, size[1]), fill='#ffcc00', width=5)
+    buffer = BytesIO()
+    image.save(buffer, fmt, quality=90)
+    return buffer.getvalue()
+
+
+def make_thumbnail(generator, data, options):
+    from io import BytesIO
+    from easy_thumbnails import engine
+    image = generator(BytesIO(data), **options)
+    return engine.process_image(image, options)
+
+
+def run():
+    from easy_thumbnails.options import ThumbnailOptions
+    from easy_thumbnails.source_generators import pil_image
+    from ..thumbnails import pil_draft_image
+
+    options = ThumbnailOptions({'size': (200, 200), 'crop': True})
+    results = []
+    for size, fmt in (((4000, 3000), 'JPEG'), ((1600, 1200), 'JPEG'), ((4000, 3000), 'PNG')):
+        data = make_image(size, fmt)
+        label = '%s %dx%d' % (fmt, size[0], size[1])
+        for name, generator in (('pil_image', pil_image), ('pil_draft_image', pil_draft_image)):
+            results.append(measure(
+                '%s [%s]' % (name, label),
+                lambda: make_thumbnail(generator, data, options), number=1, repeat=3))
+    return results
@@ -0,0 +1,102 @@
+"""Helpers for sorting and transforming large collections in templates.
+
+Sort keys are given as a comma separated string, a leading `-` means
+descending order: `'last_name,-date_joined'`. Attribute keys may use dots
+(`'profile.city'`).
+"""
+import heapq
+from operator import attrgetter, itemgetter
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+
+
+def parse_sort_keys(keys):
+    """Convert `'name,-date'` into `[('name', False), ('date', True)]`."""
+    if not isinstance(keys, str):
+        return [(keys, False)]
+    result = []
+    for key in keys.split(','):
+        key = key.strip()
+        if key:
+            result.append((key[1:], True) if key.startswith('-') else (key, False))
+    return result
+
+
+def _orderable_in_db(model, names):
+    """Check that all keys are paths of concrete model fields, following
+    foreign keys, so sorting can be done by the database."""
+    for name in names:
+        if not isinstance(name, str):
+            return False
+        current = model
+        *relations, last = name.replace('.', '__').split('__')
+        try:
+            for segment in relations:
+                field = current._meta.get_field(segment)
+                if not (field.concrete and (field.many_to_one or field.one_to_one)):
+                    return False
+                current = field.related_model
+            if last != 'pk':
+                field = current._meta.get_field(last)
+                if not field.concrete or field.many_to_many:
+                    return False
+        except FieldDoesNotExist:
+            return False
+    return True
+
+
+def sort_items(iterable, keys, by_key=False, reverse=False, limit=None):
+    """Sort objects by attributes (or by items with `by_key=True`).
+
+    * querysets are ordered by the database when all keys are model fields
+      (also across foreign keys, `'group.name'`), the result is a list anyway;
+    * with `limit` only the first `limit` items are selected with a heap,
+      which is O(n log limit) instead of sorting the whole list;
+    * keys with different directions are sorted with stable passes.
+    """
+    specs = parse_sort_keys(keys)
+    names = [x for x, _ in specs]
+
+    if isinstance(iterable, QuerySet) and not by_key and _orderable_in_db(iterable.model, names):
+        ordering = [
+            ('-' if desc != reverse else '') + name.replace('.', '__')
+            for name, desc in specs]
+        queryset = iterable.order_by(*ordering)
+        return list(queryset[:limit] if limit is not None else queryset)
+
+    getter = itemgetter if by_key else attrgetter
+    directions = {desc != reverse for _, desc in specs}
+    if len(directions) == 1:
+        key = getter(*names)
+        descending = directions.pop()
+        if limit is not None:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(limit, iterable, key=key)
+        return sorted(iterable, key=key, reverse=descending)
+
+    # Mixed directions: sort by the least significant key first
+    items = list(iterable)
+    for name, desc in reversed(specs):
+        items.sort(key=getter(name), reverse=desc != reverse)
+    return items[:limit] if limit is not None else items
+
+
+# Generators for single pass pipelines, e.g. `join_values(iter_strip(items))`,
+# which do not build intermediate lists
+
+
+def iter_remove_value(iterable, value):
+    return (x for x in iterable if x != value)
+
+
+def iter_strip(iterable):
+    return (x.strip() for x in iterable)
+
+
+def iter_attrs(iterable, attr):
+    return map(attrgetter(attr), iterable)
+
+
+def join_values(iterable, delimiter=','):
+    return delimiter.join(map(str, iterable))
+
@@ -0,0 +1,4 @@
+def public_settings(request):
+    """Expose the snapshot of `PUBLIC_SETTINGS` as `settings`."""
+    from .public_settings import get_snapshot
+    return {'settings': get_snapshot()}
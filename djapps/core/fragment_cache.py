@@ -0,0 +1,100 @@
+"""Output of `{% capture ... cached %}` blocks, kept between renders.
+
+    {% capture as meta_title cached request.path LANGUAGE_CODE %}{% block meta-title %}{% endblock %}{% endcapture %}
+
+The output is keyed on the template being rendered (blocks of base
+templates are filled by the page template), the position of the tag and
+the values of the variables after `cached`. Everything else the block
+reads must be the same for the same key, add the variables it depends on,
+e.g. `user.pk` or `LANGUAGE_CODE` for translated text.
+
+Outputs are kept in a per-process LRU of `CAPTURE_CACHE_SIZE` entries and,
+with `CAPTURE_CACHE_ALIAS`, in a shared cache for `CAPTURE_CACHE_TIMEOUT`
+seconds, keyed with `HTTP_CACHE_VERSION`. The LRU is cleared when settings
+change in tests and when the development server sees a changed file.
+Templates compiled from strings have no origin to key on and are not cached.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.base import UNKNOWN_SOURCE
+from django.utils.autoreload import file_changed
+
+
+class LRUCache:
+    """A thread-safe mapping which keeps the `maxsize` most recently used keys."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+_lru = None
+
+
+def get_lru():
+    global _lru
+    if _lru is None:
+        _lru = LRUCache(settings.CAPTURE_CACHE_SIZE)
+    return _lru
+
+
+def make_key(node, context, vary):
+    """The key of the output of the capture node, or None when it cannot be cached."""
+    root = context.template.origin.name if context.template is not None else UNKNOWN_SOURCE
+    if root == UNKNOWN_SOURCE or node.origin.name == UNKNOWN_SOURCE:
+        return None
+    return (root, node.origin.name, node.token.position) + tuple(str(x) for x in vary)
+
+
+def get_shared_key(key):
+    digest = hashlib.md5('\0'.join(str(x) for x in key).encode('utf-8')).hexdigest()
+    return 'capture:%s:%s' % (settings.HTTP_CACHE_VERSION, digest)
+
+
+def get_fragment(key):
+    value = get_lru().get(key)
+    if value is None and settings.CAPTURE_CACHE_ALIAS:
+        from django.core.cache import caches
+        value = caches[settings.CAPTURE_CACHE_ALIAS].get(get_shared_key(key))
+        if value is not None:
+            get_lru().set(key, value)
+    return value
+
+
+def set_fragment(key, value):
+    get_lru().set(key, value)
+    if settings.CAPTURE_CACHE_ALIAS:
+        from django.core.cache import caches
+        caches[settings.CAPTURE_CACHE_ALIAS].set(get_shared_key(key), value, settings.CAPTURE_CACHE_TIMEOUT)
+
+
+@receiver(setting_changed)
+@receiver(file_changed)
+def clear_fragments(**kwargs):
+    global _lru
+    _lru = None
@@ -0,0 +1,119 @@
+"""Conditional responses and the shared cache of anonymous pages.
+
+Pages of the current user get an ETag computed from version stamps only,
+without rendering, and are answered with 304 Not Modified when the browser
+already has them:
+
+    @login_required
+    @user_page
+    def personal_information(request): ...
+
+Pages which look the same for all anonymous users are rendered once per
+language and URL and stored in `PAGE_CACHE_ALIAS`:
+
+    @anonymous_cache_page()
+    def index(request): ...
+"""
+import hashlib
+import functools
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    set_response_etag,
+)
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def make_etag(*parts):
+    """A strong ETag of the version stamps, the deployment and the language."""
+    key = ':'.join(str(x) for x in (settings.HTTP_CACHE_VERSION, get_language()) + parts)
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def user_etag(request, *args, **kwargs):
+    """The ETag of pages which only depend on the current user and the URL."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return make_etag(request.get_full_path(), user.pk, user.version)
+
+
+def user_page(view_func=None, etag_func=user_etag):
+    """Answer conditional GETs of a page of the current user with 304 before
+    the view runs. Browsers must revalidate the page every time, and shared
+    caches must not store it."""
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+            return response
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
+
+
+def page_cache_key(request):
+    return 'page:%s:%s:%s:%s' % (
+        settings.HTTP_CACHE_VERSION, get_language(), request.get_host(),
+        hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest())
+
+
+def is_shared_response(request, response):
+    """Whether the response of an anonymous request looks the same for every
+    visitor. Middleware sets the CSRF, session and messages cookies after the
+    view returns, so the request is checked for what the page used."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    # {% csrf_token %} or get_token()
+    if request.META.get('CSRF_COOKIE_USED'):
+        return False
+    messages = getattr(request, '_messages', None)
+    if messages is not None and (messages.used or messages.added_new):
+        return False
+    session = getattr(request, 'session', None)
+    return session is None or not session.modified
+
+
+def anonymous_cache_page(timeout=None, cache_alias=None):
+    """Serve anonymous GET requests from a shared cache, one entry per URL and
+    language (activated by `LocaleMiddleware`). Requests of authenticated users
+    are not cached, nor are pages with a CSRF token, messages or session
+    changes. Cached pages also answer conditional GETs with 304."""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            from django.core.cache import caches
+
+            if request.method not in CACHEABLE_METHODS or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            cache = caches[cache_alias or settings.PAGE_CACHE_ALIAS]
+            key = page_cache_key(request)
+            response = cache.get(key)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                if is_shared_response(request, response):
+                    set_response_etag(response)
+                    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+                    cache.set(
+                        key, response,
+                        settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout)
+                return response
+
+            return get_conditional_response(request, etag=response.get('ETag'), response=response)
+        return wrapper
+    return decorator
@@ -0,0 +1,55 @@
+"""Import time of a fresh interpreter, parsed from `python -X importtime`:
+
+    import time: self [us] | cumulative | imported package
+    import time:       472 |      31665 |       django.http.response
+
+The cumulative time of a module includes the modules it imported first,
+the self times add up to the total. See `./manage.py import_profile`.
+"""
+import os
+import sys
+import subprocess
+from collections import namedtuple
+
+ImportRecord = namedtuple('ImportRecord', 'name self cumulative depth')
+
+PREFIX = 'import time:'
+
+
+def parse_importtime(lines):
+    """ImportRecords in the order of the output: modules after the ones they import."""
+    records = []
+    for line in lines:
+        if not line.startswith(PREFIX):
+            continue
+        self_time, cumulative, name = line[len(PREFIX):].split('|', 2)
+        if not self_time.strip().isdigit():
+            continue  # the header
+        stripped = name.lstrip()
+        # Every level of nesting is indented by two spaces after one
+        depth = (len(name) - len(stripped) - 1) // 2
+        records.append(ImportRecord(stripped.rstrip(), int(self_time), int(cumulative), depth))
+    return records
+
+
+def profile_imports(code, env=None):
+    """Run `code` in a fresh interpreter and return its ImportRecords."""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        env=dict(os.environ, **(env or {})), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    if process.returncode:
+        errors = [x for x in process.stderr.splitlines() if not x.startswith(PREFIX)]
+        raise RuntimeError('\n'.join(errors[-20:]))
+    return parse_importtime(process.stderr.splitlines())
+
+
+def group_by_package(records):
+    """Total self time and number of modules per top-level package,
+    the most expensive first."""
+    packages = {}
+    for record in records:
+        package = record.name.partition('.')[0]
+        total, count = packages.get(package, (0, 0))
+        packages[package] = (total + record.self, count + 1)
+    return sorted(((name, *x) for name, x in packages.items()), key=lambda x: -x[1])
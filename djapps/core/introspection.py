@@ -0,0 +1,198 @@
+"""Safe introspection for the `inspect`, `attrs_list` and `debug_context` tags.
+
+Introspection never runs database queries: querysets are not evaluated,
+related managers and not loaded relations, deferred fields and properties
+are shown as placeholders instead of being accessed. Values are shown with
+depth and length limited reprs, and the whole output is capped.
+
+Everything is a no-op unless `DEBUG` is on or the request enabled it, see
+`TemplateDebugMiddleware`.
+"""
+import reprlib
+import contextvars
+import inspect as _inspect
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+
+
+MAX_ATTRS = 200
+MAX_DEPTH = 2
+MAX_REPR_LENGTH = 200
+MAX_OUTPUT_LENGTH = 20000
+
+_request_enabled = contextvars.ContextVar('template_debug', default=False)
+
+
+def is_enabled():
+    return settings.DEBUG or _request_enabled.get()
+
+
+class TemplateDebugMiddleware:
+    """Enable the debugging tags for a single request of a superuser with
+    the `TEMPLATE_DEBUG_PARAM` query parameter (`?template_debug=1`).
+    Views may enable them with `enable_for_request(request)`."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        enabled = bool(
+            settings.TEMPLATE_DEBUG_PARAM in request.GET
+            and user is not None and user.is_superuser)
+        request.template_debug = enabled
+        token = _request_enabled.set(enabled)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_enabled.reset(token)
+
+
+def enable_for_request(request):
+    """Enable the debugging tags for the rest of the request."""
+    request.template_debug = True
+    _request_enabled.set(True)
+
+
+class SafeRepr(reprlib.Repr):
+    """A `reprlib.Repr` which never evaluates querysets."""
+    def __init__(self, depth=MAX_DEPTH, length=MAX_REPR_LENGTH):
+        super().__init__()
+        self.maxlevel = depth
+        self.maxstring = self.maxother = length
+        self.maxlist = self.maxtuple = self.maxdict = self.maxset = 20
+
+    def repr1(self, x, level):
+        from django.db.models import Manager, QuerySet
+        if isinstance(x, QuerySet):
+            if x._result_cache is None:
+                return '<%s of %s, not evaluated>' % (x.__class__.__name__, x.model.__name__)
+            return '<%s of %d %s>' % (x.__class__.__name__, len(x._result_cache), x.model.__name__)
+        if isinstance(x, Manager):
+            return '<%s of %s>' % (x.__class__.__name__, x.model.__name__)
+        try:
+            return super().repr1(x, level)
+        except Exception as e:
+            return '<%s: repr() failed: %s>' % (x.__class__.__name__, e)
+
+
+safe_repr = SafeRepr().repr
+
+
+def _placeholder(obj, name, static):
+    """Return a placeholder for attributes which must not be accessed, or None."""
+    from django.db.models import Model
+    from django.db.models.query_utils import DeferredAttribute
+    from django.db.models.fields.related_descriptors import (
+        ForwardManyToOneDescriptor,
+        ManyToManyDescriptor,
+        ReverseManyToOneDescriptor,
+        ReverseOneToOneDescriptor,
+    )
+    from django.utils.functional import cached_property
+
+    if isinstance(static, (ReverseManyToOneDescriptor, ManyToManyDescriptor)):
+        return '<related manager>'
+    if isinstance(obj, Model):
+        if name == 'pk':
+            return None
+        if isinstance(static, (ForwardManyToOneDescriptor, ReverseOneToOneDescriptor)):
+            if not static.is_cached(obj):
+                return '<relation, not loaded>'
+            return None
+        if isinstance(static, DeferredAttribute) and static.field.attname not in obj.__dict__:
+            return '<deferred field>'
+    if isinstance(static, cached_property):
+        return None if name in getattr(obj, '__dict__', {}) else '<cached property, not computed>'
+    if isinstance(static, property):
+        return '<property>'
+    if callable(static) and not isinstance(static, type):
+        return '<method>'
+    return None
+
+
+def iter_attributes(obj, private=False):
+    """Yield `(name, repr)` of the object attributes without side effects."""
+    for name in dir(obj):
+        if name.startswith('_') and not private:
+            continue
+        try:
+            static = _inspect.getattr_static(obj, name)
+        except AttributeError:
+            continue
+        placeholder = _placeholder(obj, name, static)
+        if placeholder is not None:
+            yield name, placeholder
+            continue
+        try:
+            yield name, safe_repr(getattr(obj, name))
+        except Exception as e:
+            yield name, '<%s>' % e.__class__.__name__
+
+
+class Inspection:
+    """The lazy result of `inspect`: attributes are collected on first use,
+    up to `limit`. Renders as a collapsible panel."""
+    def __init__(self, obj, limit=MAX_ATTRS):
+        self.obj = obj
+        self.limit = limit
+        self._items = None
+        self.truncated = False
+
+    def items(self):
+        if self._items is None:
+            self._items = []
+            for item in iter_attributes(self.obj):
+                if len(self._items) >= self.limit:
+                    self.truncated = True
+                    break
+                self._items.append(item)
+        return self._items
+
+    def keys(self):
+        return [x for x, _ in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def __getitem__(self, name):
+        return dict(self.items())[name]
+
+    def __str__(self):
+        return render_panel(safe_repr(self.obj), self.items(), self.truncated)
+
+    def __html__(self):
+        return str(self)
+
+
+def attribute_names(obj, limit=MAX_ATTRS):
+    return [x for x in dir(obj) if not x.startswith('_')][:limit]
+
+
+def context_items(context):
+    """Yield `(name, repr)` of the flattened context, the innermost value wins."""
+    seen = set()
+    # The first layer holds the True/False/None builtins
+    for layer in reversed(context.dicts[1:]):
+        for name, value in layer.items():
+            if name not in seen:
+                seen.add(name)
+                yield name, safe_repr(value)
+
+
+def render_panel(title, items, truncated=False, max_length=MAX_OUTPUT_LENGTH):
+    rows, length = [], 0
+    for name, value in items:
+        length += len(name) + len(value)
+        if length > max_length:
+            truncated = True
+            break
+        rows.append((name, value))
+    return format_html(
+        '<details class="template-debug"><summary>{}</summary>'
+        '<table>{}</table>{}</details>',
+        title,
+        format_html_join('', '<tr><th>{}</th><td><code>{}</code></td></tr>', rows),
+        format_html('<p>{}</p>', '… truncated') if truncated else '')
@@ -0,0 +1,10 @@
+"""Load testing of the project routes.
+
+    ./manage.py loadtest --users 1000 --clients 8 --requests 2000 --report report.json
+    ./manage.py loadtest --gunicorn 4 --clients 16 --duration 30
+
+Requests are served either in-process through the WSGI handler (the default,
+which also counts database queries per request) or over HTTP by gunicorn
+started on a local port, or by any server given with `--url`. The database
+is the one configured by `DATABASE_URL`, e.g. SQLite or a local PostgreSQL.
+"""
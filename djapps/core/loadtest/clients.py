@@ -0,0 +1,87 @@
+import time
+
+
+class QueryCounter:
+    """A database execute wrapper which counts queries."""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class InProcessClient:
+    """Sends requests through the WSGI handler of the current process."""
+    counts_queries = True
+
+    def __init__(self, host='localhost'):
+        from django.test import Client
+        self.client = Client(HTTP_HOST=host)
+
+    def login(self, user, password):
+        self.client.force_login(user)
+
+    def get(self, path):
+        """Return `(status, seconds, queries)`."""
+        from contextlib import ExitStack
+        from django.db import connections
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            started = time.perf_counter()
+            response = self.client.get(path)
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, counter.count
+
+
+class HTTPClient:
+    """Sends requests to a running server, keeping cookies between requests.
+    Redirects are not followed, so every request is measured separately."""
+    counts_queries = False
+
+    def __init__(self, base_url):
+        import urllib.request
+        from http.cookiejar import CookieJar
+
+        class NoRedirect(urllib.request.HTTPRedirectHandler):
+            def redirect_request(self, *args, **kwargs):
+                return None
+
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def login(self, user, password):
+        from urllib.parse import urlencode
+        from django.urls import reverse
+        url = self.base_url + reverse('login')
+        self._open(url)
+        token = next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+        data = urlencode({
+            'username': user.email,
+            'password': password,
+            'csrfmiddlewaretoken': token,
+        }).encode()
+        status = self._open(url, data, {'Referer': url})
+        if status != 302:
+            raise RuntimeError('Unable to log in as %s (status %s).' % (user.email, status))
+
+    def _open(self, url, data=None, headers=None):
+        import urllib.error
+        import urllib.request
+        request = urllib.request.Request(url, data=data, headers=headers or {})
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def get(self, path):
+        started = time.perf_counter()
+        status = self._open(self.base_url + path)
+        return status, time.perf_counter() - started, None
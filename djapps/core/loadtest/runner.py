@@ -0,0 +1,153 @@
+import time
+import random
+import logging
+import threading
+from collections import defaultdict
+
+
+logger = logging.getLogger(__name__)
+
+
+# name -> (URL name, requires an authenticated user)
+ROUTES = {
+    'index': ('index', False),
+    'login': ('login', False),
+    'register': ('register', False),
+    'personal_information': ('personal_information', True),
+    'password_reset': ('password_reset', False),
+}
+DEFAULT_MIX = 'index=5,login=2,register=1,personal_information=4,password_reset=1'
+
+
+def parse_mix(value):
+    """Convert `'index=5,login=1'` into `{'index': 5, 'login': 1}`."""
+    mix = {}
+    for chunk in value.split(','):
+        name, _, weight = chunk.strip().partition('=')
+        if name not in ROUTES:
+            raise ValueError('Unknown route "%s". Available: %s.' % (name, ', '.join(ROUTES)))
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Worker:
+    def __init__(self, number, make_client, user, password, mix, seed=0):
+        self.number = number
+        self.make_client = make_client
+        self.user = user
+        self.password = password
+        self.mix = mix
+        self.random = random.Random(seed + number)
+        # route -> list of (status, seconds, queries)
+        self.samples = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def setup(self):
+        self.anonymous = self.make_client()
+        self.authenticated = self.make_client()
+        self.authenticated.login(self.user, self.password)
+
+    def run(self, requests=None, deadline=None):
+        from django.db import connections
+        from django.urls import reverse
+
+        names = list(self.mix)
+        weights = [self.mix[x] for x in names]
+        paths = {x: reverse(ROUTES[x][0]) for x in names}
+
+        done = 0
+        try:
+            while (requests is None or done < requests) and (deadline is None or time.monotonic() < deadline):
+                name = self.random.choices(names, weights)[0]
+                client = self.authenticated if ROUTES[name][1] else self.anonymous
+                try:
+                    self.samples[name].append(client.get(paths[name]))
+                except Exception:
+                    logger.debug('Request to %s failed', paths[name], exc_info=True)
+                    self.failures[name] += 1
+                done += 1
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+
+def run_load(make_client, users, password, mix, clients=4, requests=None, duration=None, seed=0):
+    """Run `clients` concurrent workers sending `requests` requests in total,
+    or sending requests for `duration` seconds. Returns the report dict."""
+    if not users:
+        raise ValueError('At least one user is required.')
+    workers = [
+        Worker(i, make_client, users[i % len(users)], password, mix, seed)
+        for i in range(clients)]
+    # Log in before starting the clock, failing early on misconfiguration
+    for worker in workers:
+        worker.setup()
+    per_worker = None
+    if requests is not None:
+        per_worker = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+
+    started = time.monotonic()
+    deadline = started + duration if duration else None
+    if clients == 1:
+        workers[0].run(per_worker[0] if per_worker else None, deadline)
+    else:
+        threads = [
+            threading.Thread(
+                target=w.run, args=(per_worker[i] if per_worker else None, deadline), daemon=True)
+            for i, w in enumerate(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.monotonic() - started
+    return build_report(workers, elapsed)
+
+
+def summarize(samples, failures, elapsed):
+    latencies = sorted(x[1] * 1000 for x in samples)
+    queries = [x[2] for x in samples if x[2] is not None]
+    statuses = defaultdict(int)
+    for status, _, _ in samples:
+        statuses[str(status)] += 1
+    return {
+        'requests': len(samples) + failures,
+        'errors': failures + sum(1 for x in samples if x[0] >= 500),
+        'statuses': dict(statuses),
+        'rps': len(samples) / elapsed if elapsed else None,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        },
+        'queries_per_request': sum(queries) / len(queries) if queries else None,
+    }
+
+
+def build_report(workers, elapsed):
+    routes = defaultdict(list)
+    failures = defaultdict(int)
+    for worker in workers:
+        for name, samples in worker.samples.items():
+            routes[name].extend(samples)
+        for name, count in worker.failures.items():
+            failures[name] += count
+
+    return {
+        'clients': len(workers),
+        'duration': elapsed,
+        'total': summarize(
+            [x for samples in routes.values() for x in samples],
+            sum(failures.values()), elapsed),
+        'routes': {
+            name: summarize(routes[name], failures[name], elapsed)
+            for name in sorted(set(routes) | set(failures))},
+    }
@@ -0,0 +1,39 @@
+SEED_EMAIL_TEMPLATE = 'loadtest-%d@example.com'
+SEED_PASSWORD = 'loadtest'
+
+
+def seed_users(count, password=SEED_PASSWORD, batch_size=1000):
+    """Make sure `count` load testing users exist. Returns the number of created users.
+
+    The password is hashed once for all users (see `UserFactory`) and users
+    are inserted with `bulk_create`, so seeding thousands of users takes seconds.
+    """
+    from django.contrib.auth import get_user_model
+    from djapps.accounts.factories import UserFactory
+
+    User = get_user_model()
+    emails = [SEED_EMAIL_TEMPLATE % i for i in range(count)]
+    existing = set(
+        User.objects.filter(email__in=emails).values_list('email', flat=True)
+    ) if count <= batch_size else set(
+        User.objects.filter(email__startswith='loadtest-').values_list('email', flat=True))
+
+    missing = [
+        UserFactory.build(email=email, name='Load Test %d' % i, password=password)
+        for i, email in enumerate(emails) if email not in existing]
+    User.objects.bulk_create(missing, batch_size=batch_size)
+    return len(missing)
+
+
+def get_seeded_users(limit):
+    from django.contrib.auth import get_user_model
+    return list(
+        get_user_model().objects.filter(
+            email__startswith='loadtest-', email__endswith='@example.com',
+        ).order_by('pk')[:limit])
+
+
+def delete_seeded_users():
+    from django.contrib.auth import get_user_model
+    return get_user_model().objects.filter(
+        email__startswith='loadtest-', email__endswith='@example.com').delete()[0]
@@ -0,0 +1,253 @@
+"""Structured logging which does no I/O on the request thread.
+
+The `LOGGING` setting routes all records through `QueueHandler`. The
+calling thread only stamps the request ID and puts the record into
+a queue. A background thread formats records as JSON lines and writes
+them:
+
+    {"time": "2021-12-01T10:00:00.123Z", "level": "ERROR", "logger": "django.request",
+     "message": "Internal Server Error: /", "request_id": "4f1c...", "exception": "..."}
+
+Records below `LOG_LEVEL` are not written. The last ones are kept in a ring
+buffer, and the ones of the same request are written before an error,
+with `"buffered": true`.
+"""
+import os
+import re
+import sys
+import copy
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import weakref
+import contextvars
+import collections
+import logging.handlers
+from datetime import datetime, timezone
+
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+REQUEST_ID_RE = re.compile(r'^[\w.-]{1,64}$')
+
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+# Attributes of every record, the other ones were passed in `extra`
+RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'request_id'}
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+_formatter = logging.Formatter()
+
+# Listeners of the queue handlers, stopped at exit and restarted after fork()
+_handlers = weakref.WeakSet()
+
+
+def _stop_handlers():
+    for handler in list(_handlers):
+        handler.stop()
+
+
+def _restart_handlers():
+    for handler in list(_handlers):
+        handler.restart()
+
+
+atexit.register(_stop_handlers)
+# The listener threads do not survive fork(), e.g. of preloading gunicorn
+# workers or parallel test runners
+os.register_at_fork(after_in_child=_restart_handlers)
+
+
+def get_level(level):
+    return level if isinstance(level, int) else logging.getLevelName(level)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIDMiddleware:
+    """Take the request ID from the `X-Request-ID` header of the proxy or
+    generate one, log it with every record and return it in the response."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get(REQUEST_ID_HEADER, '')
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        token = _request_id.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class RequestIDFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Pass only a share of the records of noisy loggers.
+
+    `rates` maps logger names to the share of records to keep, e.g.
+    `{'django.request': 0.1}`, which also applies to their children.
+    Records of `level` and above are always kept.
+    """
+    def __init__(self, rates=None, level=logging.ERROR):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.level = get_level(level)
+        self._cache = {}
+
+    def get_rate(self, name):
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        rate = self.get_rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the `extra` attributes of the record."""
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            data['request_id'] = request_id
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES:
+                data[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class RingBufferHandler(logging.Handler):
+    """Keep the last `capacity` records which `target` does not write, and
+    write the ones of the same request when a record of `flush_level`
+    comes."""
+    def __init__(self, target, capacity=200, flush_level=logging.ERROR):
+        super().__init__()
+        self.target = target
+        self.buffer = collections.deque(maxlen=capacity)
+        self.flush_level = get_level(flush_level)
+
+    def emit(self, record):
+        if record.levelno < self.target.level:
+            self.buffer.append(record)
+        elif record.levelno >= self.flush_level:
+            self.dump(getattr(record, 'request_id', None))
+
+    def dump(self, request_id=None):
+        """Write the buffered records of the request, or all records without
+        a request ID."""
+        records, kept = [], []
+        for record in self.buffer:
+            (records if getattr(record, 'request_id', None) == request_id else kept).append(record)
+        # Records of other requests in flight stay buffered
+        self.buffer = collections.deque(kept, maxlen=self.buffer.maxlen)
+        for record in records:
+            record.buffered = True
+            # The target level would filter them out
+            self.target.acquire()
+            try:
+                self.target.emit(record)
+            finally:
+                self.target.release()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Put records into a bounded queue, a `QueueListener` thread writes
+    records of `output_level` and above to `stream`. Records are dropped,
+    not waited for, when the queue is full.
+
+    `buffer_size` records below `output_level` are kept for `RingBufferHandler`.
+    """
+    def __init__(self, stream=None, output_level=logging.WARNING, buffer_size=200,
+                 json=True, maxsize=10000):
+        self.maxsize = maxsize
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+        self.output = logging.StreamHandler(stream or sys.stderr)
+        self.output.setLevel(output_level)
+        self.output.setFormatter(JSONFormatter() if json else logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+        handlers = [self.output]
+        if buffer_size:
+            # Buffered records are written before the error
+            handlers.insert(0, RingBufferHandler(self.output, buffer_size))
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        _handlers.add(self)
+
+    def prepare(self, record):
+        """Resolve the message and the traceback in the calling thread,
+        values of `extra` which are not plain data are converted with str()."""
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES and not isinstance(value, PRIMITIVE_TYPES):
+                record.__dict__[name] = str(value)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until the queued records are written."""
+        if self.listener._thread is not None:
+            self.queue.join()
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def restart(self):
+        if self.listener._thread is None:
+            return
+        self.queue = self.listener.queue = queue.Queue(self.maxsize)
+        self.listener._thread = None
+        self.listener.start()
+
+    def close(self):
+        self.stop()
+        super().close()
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+RESULT_KEYS = ('name', 'time', 'ops', 'alloc')
+
+
+class Command(BaseCommand):
+    help = 'Run micro-benchmarks from djapps.core.benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modules', nargs='*',
+            help='Benchmark modules to run. All modules are run by default.')
+        parser.add_argument(
+            '--save', metavar='PATH',
+            help='Save results as a JSON baseline.')
+        parser.add_argument(
+            '--compare', metavar='PATH',
+            help='Compare results with a JSON baseline saved by --save.')
+
+    def handle(self, *args, **options):
+        import json
+        import pkgutil
+        import importlib
+        from ... import benchmarks
+
+        available = sorted(x.name for x in pkgutil.iter_modules(benchmarks.__path__))
+        modules = options['modules'] or available
+        unknown = set(modules) - set(available)
+        if unknown:
+            raise CommandError(
+                'Unknown benchmarks: %s. Available: %s.' % (
+                    ', '.join(sorted(unknown)), ', '.join(available)))
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        results = {}
+        for name in modules:
+            module = importlib.import_module('%s.%s' % (benchmarks.__name__, name))
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            results[name] = module.run()
+            previous = {x['name']: x for x in baseline.get(name, [])}
+            for result in results[name]:
+                self.write_result(result, previous.get(result['name']))
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump({'commit': self.get_commit(), 'results': results}, f, indent=2)
+
+    def write_result(self, result, previous=None):
+        alloc = result.get('alloc')
+        line = '  %-48s %12.1f ops/s %10.2f us/op %10s' % (
+            result['name'], result['ops'], result['time'] * 1e6,
+            '%.1f KB' % (alloc / 1024) if alloc is not None else '')
+        if previous:
+            change = (result['time'] - previous['time']) / previous['time'] * 100
+            style = self.style.ERROR if change > 10 else \
+                self.style.SUCCESS if change < -10 else (lambda x: x)
+            line += style(' %+6.1f%%' % change)
+        extra = ', '.join(
+            '%s=%s' % (k, v) for k, v in result.items() if k not in RESULT_KEYS)
+        if extra:
+            line += '  ' + extra
+        self.stdout.write(line)
+
+    def get_commit(self):
+        import subprocess
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
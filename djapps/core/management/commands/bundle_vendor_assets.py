@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+def check_integrity(content, integrity):
+    """Check the content against a subresource integrity value, e.g. `sha384-...`."""
+    import base64
+    import hashlib
+
+    algorithm, _, expected = integrity.partition('-')
+    return base64.b64encode(hashlib.new(algorithm, content).digest()).decode('ascii') == expected
+
+
+class Command(BaseCommand):
+    help = 'Download VENDOR_ASSETS from their CDNs into VENDOR_ASSETS_DIR to serve them locally.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true', help='Download files which exist already.')
+
+    def handle(self, *args, **options):
+        import os
+        import urllib.request
+        from django.conf import settings
+
+        os.makedirs(settings.VENDOR_ASSETS_DIR, exist_ok=True)
+        downloaded = 0
+        for name, asset in settings.VENDOR_ASSETS.items():
+            path = os.path.join(settings.VENDOR_ASSETS_DIR, name)
+            if os.path.exists(path) and not options['force']:
+                continue
+            try:
+                with urllib.request.urlopen(asset['url'], timeout=30) as response:
+                    content = response.read()
+            except (OSError, ValueError) as e:
+                raise CommandError('Cannot download %s: %s' % (asset['url'], e))
+            if asset.get('integrity') and not check_integrity(content, asset['integrity']):
+                raise CommandError('%s does not match its integrity %s' % (asset['url'], asset['integrity']))
+            with open(path, 'wb') as f:
+                f.write(content)
+            downloaded += 1
+            if options['verbosity'] > 1:
+                self.stdout.write('%s: %d bytes' % (name, len(content)))
+        self.stdout.write('Downloaded %d of %d vendor assets to %s.' % (
+            downloaded, len(settings.VENDOR_ASSETS), settings.VENDOR_ASSETS_DIR))
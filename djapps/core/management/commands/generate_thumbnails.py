@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _generate(label, field_name, name, aliases):
+    from ...tasks import generate_thumbnails_task
+    try:
+        return name, generate_thumbnails_task(label, field_name, name, aliases), None
+    except Exception as e:
+        return name, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails of all aliases for stored images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fields', nargs='*', metavar='app_label.Model.field',
+            help='Image fields to process. All image fields are processed by default.')
+        parser.add_argument(
+            '--aliases', help='Comma separated aliases to generate. All aliases by default.')
+        parser.add_argument(
+            '--processes', type=int,
+            help='Number of worker processes. Defaults to the number of CPU cores.')
+
+    def get_fields(self, labels):
+        from django.apps import apps
+        from django.db.models import ImageField
+
+        if not labels:
+            return [
+                (model, field) for model in apps.get_models()
+                for field in model._meta.fields if isinstance(field, ImageField)]
+        fields = []
+        for label in labels:
+            try:
+                app_label, model_name, field_name = label.split('.')
+                model = apps.get_model(app_label, model_name)
+                fields.append((model, model._meta.get_field(field_name)))
+            except (ValueError, LookupError) as e:
+                raise CommandError('Invalid field "%s": %s' % (label, e))
+        return fields
+
+    def handle(self, *args, **options):
+        import os
+        import functools
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+
+        aliases = options['aliases'].split(',') if options['aliases'] else None
+        processes = options['processes'] or os.cpu_count() or 1
+        jobs = []
+        for model, field in self.get_fields(options['fields']):
+            names = model._default_manager.exclude(**{field.name: ''}).exclude(
+                **{'%s__isnull' % field.name: True}).values_list(field.name, flat=True)
+            jobs.extend((model._meta.label, field.name, name) for name in names.order_by().distinct())
+
+        if processes == 1 or len(jobs) < 2:
+            results = [_generate(*job, aliases) for job in jobs]
+        else:
+            # Forked workers must not share the database connections of the parent
+            connections.close_all()
+            with ProcessPoolExecutor(processes) as executor:
+                results = list(executor.map(
+                    functools.partial(_generate, aliases=aliases), *zip(*jobs), chunksize=16))
+
+        created = errors = 0
+        for name, count, error in results:
+            created += count
+            if error:
+                errors += 1
+                self.stderr.write('%s: %s' % (name, error))
+        self.stdout.write('Processed %d images, created %d thumbnails, %d errors.' % (
+            len(jobs), created, errors))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP = 'import django; django.setup()'
+
+
+class Command(BaseCommand):
+    help = ('Report the import time of a fresh process with the current settings, '
+            'the most expensive modules first.')
+    # The profiled process is a fresh one, this one needs nothing checked
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            '--command', metavar='NAME',
+            help='Also load the management command, as `./manage.py NAME` does before it runs.')
+        target.add_argument(
+            '--wsgi', action='store_true', help='Load the WSGI application, as a web worker does.')
+        parser.add_argument('--limit', type=int, default=25, help='Number of rows to show.')
+        parser.add_argument(
+            '--packages', action='store_true',
+            help='Sum the self time of modules by top-level package.')
+
+    def get_code(self, options):
+        from django.conf import settings
+
+        if options['wsgi']:
+            module, _, attr = settings.WSGI_APPLICATION.rpartition('.')
+            return 'import %s; %s.%s' % (module, module, attr)
+        if options['command']:
+            return (
+                SETUP + '; from django.core.management import get_commands, load_command_class; '
+                'load_command_class(get_commands()[%r], %r)' % (options['command'], options['command']))
+        return SETUP
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from django.core.management import get_commands
+        from ...importtime import group_by_package, profile_imports
+
+        if options['command'] and options['command'] not in get_commands():
+            raise CommandError('Unknown command: %s' % options['command'])
+        try:
+            records = profile_imports(
+                self.get_code(options), {'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE})
+        except RuntimeError as e:
+            raise CommandError('The profiled process failed:\n%s' % e)
+
+        total = sum(x.self for x in records)
+        self.stdout.write('%d modules imported in %.1f ms' % (len(records), total / 1000))
+        if options['packages']:
+            self.stdout.write('%-40s %10s %8s' % ('package', 'self ms', 'modules'))
+            for name, self_time, count in group_by_package(records)[:options['limit']]:
+                self.stdout.write('%-40s %10.1f %8d' % (name, self_time / 1000, count))
+        else:
+            self.stdout.write('%-56s %10s %10s' % ('module', 'cumul. ms', 'self ms'))
+            for record in sorted(records, key=lambda x: -x.cumulative)[:options['limit']]:
+                self.stdout.write('%-56s %10.1f %10.1f' % (
+                    '  ' * min(record.depth, 8) + record.name, record.cumulative / 1000, record.self / 1000))
@@ -0,0 +1,144 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Seed users and measure throughput and latency of the project routes.'
+
+    def add_arguments(self, parser):
+        from ...loadtest.runner import DEFAULT_MIX
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of users to seed before the run.')
+        parser.add_argument('--clients', type=int, default=4, help='Concurrent clients.')
+        parser.add_argument(
+            '--requests', type=int,
+            help='Total number of requests. Defaults to 1000 unless --duration is given.')
+        parser.add_argument('--duration', type=float, help='Run for the number of seconds.')
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help='Weighted routes, e.g. "%s".' % DEFAULT_MIX)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the route mix.')
+        parser.add_argument(
+            '--url', help='Base URL of a running server. Requests are served in-process by default.')
+        parser.add_argument(
+            '--gunicorn', type=int, metavar='WORKERS',
+            help='Start gunicorn with the number of workers on a local port.')
+        parser.add_argument('--host', default='localhost', help='Host header for in-process requests.')
+        parser.add_argument('--report', help='Write the JSON report to the file.')
+        parser.add_argument(
+            '--keep-users', action='store_true',
+            help='Keep the seeded users after the run. They are active and share a known password.')
+        parser.add_argument(
+            '--allow-without-debug', action='store_true',
+            help='Run even if DEBUG is off, e.g. against a staging database.')
+
+    def handle(self, *args, **options):
+        import json
+        import functools
+        from django.db import connection
+        from django.test.utils import override_settings
+        from django.conf import settings
+        from ...loadtest.clients import HTTPClient, InProcessClient
+        from ...loadtest.runner import parse_mix, run_load
+        from ...loadtest.seed import SEED_PASSWORD, delete_seeded_users, get_seeded_users, seed_users
+
+        if not settings.DEBUG and not options['allow_without_debug']:
+            raise CommandError(
+                'DEBUG is off, this may be a production database. '
+                'Seeded users can log in with a known password, '
+                'use --allow-without-debug to run anyway.')
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        requests = options['requests']
+        if requests is None and not options['duration']:
+            requests = 1000
+
+        created = seed_users(max(options['users'], options['clients']))
+        self.stdout.write('Seeded %d new users.' % created)
+        users = get_seeded_users(options['clients'])
+
+        server = None
+        if options['gunicorn']:
+            server, url = self.start_gunicorn(options['gunicorn'])
+            mode = 'gunicorn'
+        elif options['url']:
+            url, mode = options['url'], 'http'
+        else:
+            url, mode = None, 'in-process'
+
+        run = functools.partial(
+            run_load, users=users, password=SEED_PASSWORD, mix=mix, clients=options['clients'],
+            requests=requests, duration=options['duration'], seed=options['seed'])
+        try:
+            if url:
+                report = run(functools.partial(HTTPClient, url))
+            else:
+                hosts = list(settings.ALLOWED_HOSTS) + [options['host']]
+                with override_settings(ALLOWED_HOSTS=hosts):
+                    report = run(functools.partial(InProcessClient, options['host']))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            if not options['keep_users']:
+                self.stdout.write('Deleted %d seeded users.' % delete_seeded_users())
+
+        report.update({
+            'mode': mode,
+            'database': connection.vendor,
+            'settings': settings.SETTINGS_MODULE,
+            'mix': mix,
+        })
+        self.write_report(report)
+        if options['report']:
+            with open(options['report'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def write_report(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            '%s, %s, %d clients, %.1f s' % (
+                report['mode'], report['database'], report['clients'], report['duration'])))
+        self.stdout.write('  %-24s %8s %7s %9s %9s %9s %9s %8s' % (
+            'route', 'requests', 'errors', 'rps', 'p50 ms', 'p90 ms', 'p99 ms', 'queries'))
+        rows = list(report['routes'].items()) + [('TOTAL', report['total'])]
+        for name, stats in rows:
+            latency = stats['latency_ms']
+            self.stdout.write('  %-24s %8d %7d %9.1f %9s %9s %9s %8s' % (
+                name, stats['requests'], stats['errors'], stats['rps'] or 0,
+                *('%.2f' % latency[x] if latency[x] is not None else '-' for x in ('p50', 'p90', 'p99')),
+                '%.1f' % stats['queries_per_request']
+                if stats['queries_per_request'] is not None else '-'))
+
+    def start_gunicorn(self, workers):
+        import os
+        import sys
+        import time
+        import socket
+        import subprocess
+        from django.conf import settings
+
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        module, _, attr = settings.WSGI_APPLICATION.rpartition('.')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '%s:%s' % (module, attr),
+             '--config', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'),
+             '--bind', '127.0.0.1:%d' % port, '--workers', str(workers)],
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE))
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited with code %s.' % server.returncode)
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server, 'http://127.0.0.1:%d' % port
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn did not start in 30 seconds.')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Report the number of static files and the bytes saved by their compressed variants.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', help='Directory to report on. Defaults to STATIC_ROOT.')
+
+    def handle(self, *args, **options):
+        import os
+        from django.conf import settings
+        from ...staticfiles import COMPRESSORS, compression_report
+
+        root = options['root'] or settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise CommandError('%s does not exist, run collectstatic first.' % root)
+        report = compression_report(root)
+        self.stdout.write('Files: %d, compressed: %d, size: %d bytes' % (
+            report['files'], report['compressed'], report['size']))
+        for encoding in COMPRESSORS:
+            saved = report['size'] - report[encoding]
+            self.stdout.write('%s: %d bytes, saved %d bytes (%.1f%%)' % (
+                encoding, report[encoding], saved, 100.0 * saved / (report['size'] or 1)))
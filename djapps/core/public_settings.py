@@ -0,0 +1,53 @@
+"""An immutable snapshot of the settings which templates may read.
+
+Only names listed in `PUBLIC_SETTINGS` are included, and names which look
+like secrets are refused even when listed. The snapshot is built once and
+rebuilt when settings are changed with `override_settings`.
+
+    {{ settings.SITE_URL }}
+    {% load_option "GOOGLE_TAG_MANAGER" %}
+"""
+import re
+import types
+import logging
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_NAME_RE = re.compile(
+    r'SECRET|PASSWORD|PASSWD|TOKEN|CREDENTIAL|PRIVATE|SIGNING|(^|_)KEY(_|$)|DSN'
+    r'|DATABASE|BROKER|RESULT_BACKEND|CACHES|REDIS',
+    re.IGNORECASE)
+
+_snapshot = None
+
+
+def is_secret(name):
+    return bool(SECRET_NAME_RE.search(name))
+
+
+def build_snapshot():
+    values = {}
+    for name in settings.PUBLIC_SETTINGS:
+        if is_secret(name):
+            logger.warning('Setting %s looks like a secret and is not public.', name)
+            continue
+        if hasattr(settings, name):
+            values[name] = getattr(settings, name)
+    return types.MappingProxyType(values)
+
+
+def get_snapshot():
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = build_snapshot()
+    return _snapshot
+
+
+@receiver(setting_changed)
+def reload_snapshot(**kwargs):
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,103 @@
+"""Building URLs with modified query strings.
+
+A URL is parsed once into `ParsedURL`, which can then build any number of
+variants (page links, sort toggles) re-encoding the changed parameters only.
+The current request URL is parsed once per request and cached on it:
+
+    qs = parsed_request_url(request)
+    qs.replace(page=2)           # '/users/?sort=name&page=2'
+    qs.replace(page=None)        # '/users/?sort=name'
+    qs.toggle_sort('name')       # '/users/?sort=-name'
+"""
+import functools
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+REQUEST_CACHE_ATTR = '_parsed_full_path'
+SORT_PARAMETER = 'sort'
+
+
+class ParsedURL:
+    def __init__(self, url):
+        self.url = url
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        self.base = urlunsplit((scheme, netloc, path, '', ''))
+        self.fragment = fragment
+        self.params = {}
+        for k, v in parse_qsl(query):
+            self.params.setdefault(k, []).append(v)
+        self._encoded = {k: self._encode(k, v) for k, v in self.params.items()}
+
+    def __repr__(self):
+        return '<ParsedURL %r>' % self.url
+
+    def __str__(self):
+        return self.url
+
+    def __getitem__(self, name):
+        """Allow `{{ qs.page }}` lookups in templates."""
+        if name not in self.params:
+            raise KeyError(name)
+        return self.get(name)
+
+    def __contains__(self, name):
+        return name in self.params
+
+    @staticmethod
+    def _encode(name, value):
+        if isinstance(value, (list, tuple)):
+            return urlencode([(name, x) for x in value])
+        return urlencode(((name, value),))
+
+    def get(self, name, default=''):
+        values = self.params.get(name)
+        return ','.join(values) if values else default
+
+    def getlist(self, name):
+        return list(self.params.get(name, ()))
+
+    def replace(self, **changes):
+        """Return the URL with replaced parameters.
+        Parameters with `None` or empty values are removed."""
+        parts = []
+        for name, encoded in self._encoded.items():
+            if name not in changes:
+                parts.append(encoded)
+            elif changes[name] not in (None, ''):
+                parts.append(self._encode(name, changes[name]))
+        for name, value in changes.items():
+            if name not in self._encoded and value not in (None, ''):
+                parts.append(self._encode(name, value))
+        return self._build('&'.join(parts))
+
+    def remove(self, *names):
+        return self.replace(**dict.fromkeys(names))
+
+    def toggle_sort(self, field, param=SORT_PARAMETER):
+        """Sort by `field`, or by `-field` if the URL is already sorted by `field`."""
+        current = self.get(param)
+        return self.replace(**{param: '-%s' % field if current == field else field})
+
+    def _build(self, query):
+        url = self.base
+        if query:
+            url += '?' + query
+        if self.fragment:
+            url += '#' + self.fragment
+        return url
+
+
+@functools.lru_cache(maxsize=256)
+def parse_url(url):
+    """Parse the URL, reusing the result for the same URLs.
+    `ParsedURL` instances are shared, so they must not be modified."""
+    return ParsedURL(url)
+
+
+def parsed_request_url(request):
+    """Return `ParsedURL` for `request.get_full_path()`, parsed once per request."""
+    parsed = getattr(request, REQUEST_CACHE_ATTR, None)
+    if parsed is None:
+        parsed = ParsedURL(request.get_full_path())
+        setattr(request, REQUEST_CACHE_ATTR, parsed)
+    return parsed
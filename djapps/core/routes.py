@@ -0,0 +1,129 @@
+"""URLs of argument-free routes, reversed once and looked up in a dict.
+
+`fast_reverse('index')` returns the same URL as `reverse('index')`. On the
+first call for a script prefix and language, every named route which takes
+no arguments (including namespaced ones, like `admin:index`) is reversed
+into a table. Later calls are dict lookups. Routes with arguments, and
+calls with `args`, `kwargs` or `current_app`, fall back to `reverse()`.
+
+Tables belong to the URL resolver, so they are dropped with it when the
+URLconf changes: `clear_url_caches()`, `override_settings(ROOT_URLCONF=...)`
+and `request.urlconf` all get their own resolver. Tables are built per
+language only when URLs depend on it, see `is_localized`. In templates:
+
+    {% load core_tags %}
+    <a href="{% route 'login' %}">
+
+The tag looks the table up once per rendered template: finding the script
+prefix and the active language costs more than the lookup itself.
+"""
+import weakref
+from django.urls import (
+    LocalePrefixPattern, NoReverseMatch, URLResolver, get_resolver, get_script_prefix, get_urlconf,
+    reverse)
+from django.utils.functional import Promise
+from django.utils.translation import get_language
+
+RENDER_CONTEXT_KEY = 'djapps.core.routes'
+
+# resolver -> {(script prefix, language): Routes}
+_tables = weakref.WeakKeyDictionary()
+
+
+class Routes(dict):
+    """URLs by route name, `localized` when they depend on the active language."""
+    localized = False
+
+
+def is_localized(resolver):
+    """Whether the URLs depend on the active language: the URLconf uses
+    `i18n_patterns()` or routes translated with `gettext_lazy()`."""
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern.pattern, LocalePrefixPattern):
+            return True
+        route = getattr(pattern.pattern, '_route', None) or getattr(pattern.pattern, '_regex', None)
+        if isinstance(route, Promise):
+            return True
+        if isinstance(pattern, URLResolver) and is_localized(pattern):
+            return True
+    return False
+
+
+def iter_route_names(resolver, namespace=''):
+    """Names of the routes of the resolver and its namespaces."""
+    for key in list(resolver.reverse_dict):
+        if isinstance(key, str):
+            yield namespace + key
+    for name, (_, child) in resolver.namespace_dict.items():
+        yield from iter_route_names(child, '%s%s:' % (namespace, name))
+
+
+def build_routes(urlconf=None):
+    """Reverse every route which takes no arguments with the current
+    script prefix and language."""
+    resolver = get_resolver(urlconf)
+    routes = Routes()
+    routes.localized = is_localized(resolver)
+    for name in iter_route_names(resolver):
+        try:
+            routes[name] = reverse(name, urlconf=urlconf)
+        except NoReverseMatch:
+            pass
+    return routes
+
+
+def get_routes(urlconf=None):
+    urlconf = urlconf or get_urlconf()
+    resolver = get_resolver(urlconf)
+    tables = _tables.get(resolver)
+    if tables is None:
+        tables = _tables[resolver] = {}
+    prefix = get_script_prefix()
+    routes = tables.get((prefix, None))
+    if routes is None:
+        key = (prefix, get_language())
+        routes = tables.get(key)
+        if routes is None:
+            routes = build_routes(urlconf)
+            if not routes.localized:
+                key = (prefix, None)
+            tables[key] = routes
+    return routes
+
+
+def fast_reverse(viewname, urlconf=None, args=None, kwargs=None, current_app=None):
+    """`reverse()` with the URLs of argument-free routes looked up in a table."""
+    if args or kwargs or current_app or not isinstance(viewname, str):
+        return reverse(viewname, urlconf, args, kwargs, current_app)
+    url = get_routes(urlconf).get(viewname)
+    if url is None:
+        return reverse(viewname, urlconf)
+    return url
+
+
+def render_route(context, name):
+    """The URL of `{% route name %}`, the table is kept in the render context
+    of the template unless URLs depend on the language, which `{% language %}`
+    may change."""
+    routes = context.render_context.get(RENDER_CONTEXT_KEY)
+    if routes is None:
+        routes = get_routes()
+        if not routes.localized:
+            context.render_context[RENDER_CONTEXT_KEY] = routes
+    url = routes.get(name)
+    if url is None:
+        return fast_reverse(name)
+    return url
+
+
+def warm_routes():
+    """Build the tables of every language, e.g. before forking workers.
+    Returns the number of routes."""
+    from django.conf import settings
+    from django.utils import translation
+
+    routes = {}
+    for language, _ in settings.LANGUAGES:
+        with translation.override(language):
+            routes = get_routes()
+    return len(routes)
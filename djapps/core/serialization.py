@@ -0,0 +1,150 @@
+"""Compact and safe serialization of template values.
+
+Values are encoded as JSON, extended with a registry of additional types,
+optionally compressed with zlib and signed with `SECRET_KEY`, so unlike
+pickle the decoder can not be tricked into executing arbitrary code.
+
+Usage:
+
+    from djapps.core import serialization
+    token = serialization.dumps({'id': 1, 'created': timezone.now()})
+    data = serialization.loads(token)  # raises signing.BadSignature if tampered
+
+Register additional types with `register_type`:
+
+    serialization.register_type(Money, 'money', lambda m: [str(m.amount), m.currency],
+                                lambda v: Money(Decimal(v[0]), v[1]))
+"""
+import json
+from collections import namedtuple
+from django.core import signing
+
+
+DEFAULT_SALT = 'djapps.core.serialization'
+TYPE_KEY = '__t'
+VALUE_KEY = 'v'
+# Tags dicts of the data which contain TYPE_KEY themselves
+ESCAPED_TAG = 'dict'
+
+Codec = namedtuple('Codec', ['cls', 'tag', 'encode', 'decode'])
+
+_codecs_by_type = {}
+_codecs_by_tag = {}
+
+
+def register_type(cls, tag, encode, decode):
+    """Register a codec for `cls`. `encode` must return a JSON-compatible value
+    and `decode` must build the instance back from it."""
+    codec = Codec(cls, tag, encode, decode)
+    _codecs_by_type[cls] = codec
+    _codecs_by_tag[tag] = codec
+    return codec
+
+
+def _find_codec(obj):
+    codec = _codecs_by_type.get(type(obj))
+    if codec is None:
+        # Subclasses of the registered types (e.g. a lazy string of `str`) are rare,
+        # so walk the MRO only when the exact type is not registered
+        for cls in type(obj).__mro__[1:]:
+            codec = _codecs_by_type.get(cls)
+            if codec is not None:
+                break
+    return codec
+
+
+def _default(obj):
+    codec = _find_codec(obj)
+    if codec is None:
+        raise TypeError('Object of type %s is not serializable' % type(obj).__name__)
+    return {TYPE_KEY: codec.tag, VALUE_KEY: codec.encode(obj)}
+
+
+def _escape(obj):
+    """Replace dicts which contain `TYPE_KEY` with tagged lists of their items,
+    so the decoder does not take them for typed values. Containers without
+    such dicts are returned as they are."""
+    if isinstance(obj, dict):
+        escaped = None
+        for key, value in obj.items():
+            new_value = _escape(value)
+            if new_value is not value:
+                if escaped is None:
+                    escaped = dict(obj)
+                escaped[key] = new_value
+        if escaped is None:
+            escaped = obj
+        if TYPE_KEY in obj:
+            return {TYPE_KEY: ESCAPED_TAG, VALUE_KEY: [[k, v] for k, v in escaped.items()]}
+        return escaped
+    if isinstance(obj, (list, tuple)):
+        escaped = None
+        for i, value in enumerate(obj):
+            new_value = _escape(value)
+            if new_value is not value:
+                if escaped is None:
+                    escaped = list(obj)
+                escaped[i] = new_value
+        return obj if escaped is None else escaped
+    return obj
+
+
+def _object_hook(obj):
+    if len(obj) == 2 and TYPE_KEY in obj:
+        if obj[TYPE_KEY] == ESCAPED_TAG:
+            return dict(obj[VALUE_KEY])
+        codec = _codecs_by_tag.get(obj[TYPE_KEY])
+        if codec is not None:
+            return codec.decode(obj[VALUE_KEY])
+    return obj
+
+
+class JSONSerializer:
+    """A compact JSON serializer which supports the registered types.
+    Compatible with the `serializer` argument of `django.core.signing`.
+    """
+    def dumps(self, obj):
+        return json.dumps(_escape(obj), separators=(',', ':'), default=_default).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'), object_hook=_object_hook)
+
+
+def dumps(obj, salt=DEFAULT_SALT, compress=True):
+    """Return a signed URL-safe string with the serialized object."""
+    return signing.dumps(obj, salt=salt, serializer=JSONSerializer, compress=compress)
+
+
+def loads(value, salt=DEFAULT_SALT, max_age=None):
+    """Decode a value produced by `dumps`. Raises `signing.BadSignature`
+    if the value was modified or signed with another key or salt."""
+    return signing.loads(value, salt=salt, serializer=JSONSerializer, max_age=max_age)
+
+
+def _register_default_types():
+    import base64
+    import datetime
+    import decimal
+    import uuid
+    from django.utils.functional import Promise
+
+    register_type(datetime.datetime, 'dt', datetime.datetime.isoformat, datetime.datetime.fromisoformat)
+    register_type(datetime.date, 'd', datetime.date.isoformat, datetime.date.fromisoformat)
+    register_type(datetime.time, 't', datetime.time.isoformat, datetime.time.fromisoformat)
+    register_type(
+        datetime.timedelta, 'td',
+        lambda x: [x.days, x.seconds, x.microseconds],
+        lambda x: datetime.timedelta(*x))
+    register_type(decimal.Decimal, 'dec', str, decimal.Decimal)
+    register_type(uuid.UUID, 'uuid', lambda x: x.hex, uuid.UUID)
+    register_type(set, 'set', list, set)
+    register_type(frozenset, 'fset', list, frozenset)
+    register_type(
+        bytes, 'b',
+        lambda x: base64.b64encode(x).decode('ascii'),
+        base64.b64decode)
+    # Lazy translations are stored as plain strings
+    register_type(Promise, 'str', str, str)
+
+
+_register_default_types()
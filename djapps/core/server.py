@@ -0,0 +1,115 @@
+"""Helpers of the gunicorn configuration in `gunicorn.conf.py`.
+
+With `preload_app` the master process loads Django, compiles templates
+and fills URL resolvers once with `warmup()`. Forked workers share these
+memory pages copy-on-write until they write to them. `gc.freeze()` keeps
+the garbage collector from touching, and so copying, the shared objects.
+
+Workers whose resident memory grows over `GUNICORN_MAX_RSS_MB` (plus
+a random jitter, so they do not restart at once) exit after the current
+request, see `MemoryRecycler`.
+"""
+import os
+import time
+import random
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_cpu_count():
+    """CPUs available to the process, which may be limited in containers."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_rss():
+    """The resident memory of the process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import sys
+        import resource
+        # The peak, not the current memory. Kilobytes on Linux, bytes on macOS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def iter_template_names(loader):
+    for directory in loader.get_dirs():
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(('.html', '.txt')):
+                    yield os.path.relpath(os.path.join(root, filename), directory)
+
+
+def warm_templates():
+    """Compile all templates into the cache of the cached template loaders.
+    Does nothing without them, e.g. in development."""
+    from django.template import TemplateSyntaxError, TemplateDoesNotExist, engines
+    from django.template.loaders.cached import Loader as CachedLoader
+
+    count = 0
+    for engine in engines.all():
+        for loader in getattr(getattr(engine, 'engine', None), 'template_loaders', ()):
+            if not isinstance(loader, CachedLoader):
+                continue
+            for inner in loader.loaders:
+                if not hasattr(inner, 'get_dirs'):
+                    continue
+                for name in iter_template_names(inner):
+                    try:
+                        loader.get_template(name)
+                        count += 1
+                    except (TemplateSyntaxError, TemplateDoesNotExist, UnicodeDecodeError):
+                        pass
+    return count
+
+
+def warm_urls():
+    """Import the URLconf and views, and fill the reverse lookups of every language."""
+    from django.conf import settings
+    from django.urls import get_resolver
+    from django.utils import translation
+
+    resolver = get_resolver()
+    for language, _ in settings.LANGUAGES:
+        with translation.override(language):
+            resolver.reverse_dict
+    return len(resolver.reverse_dict)
+
+
+def warmup():
+    """Load everything requests need which can be shared by forked workers."""
+    from django.db import connections
+    from .routes import warm_routes
+
+    started = time.perf_counter()
+    templates = warm_templates()
+    urls = warm_urls()
+    routes = warm_routes()
+    # Forked workers must not share the database connections of the master
+    connections.close_all()
+    logger.info(
+        'Warmed up %d templates, %d URL names and %d routes in %.2fs',
+        templates, urls, routes, time.perf_counter() - started)
+
+
+class MemoryRecycler:
+    """Tell a worker to exit when its resident memory exceeds `max_rss` bytes
+    increased by a random share up to `jitter`. The memory is checked every
+    `interval` requests."""
+    def __init__(self, max_rss, jitter=0.1, interval=10):
+        self.limit = int(max_rss * (1 + random.uniform(0, jitter)))
+        self.interval = interval
+        self.requests = 0
+
+    def should_exit(self):
+        self.requests += 1
+        if not self.limit or self.requests % self.interval:
+            return False
+        return get_rss() > self.limit
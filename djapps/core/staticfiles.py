@@ -0,0 +1,289 @@
+"""Hashed, pre-compressed static files served with far-future caching.
+
+`collectstatic` with `CompressedManifestStaticFilesStorage` stores every file
+under a name with the hash of its content, and writes `.gz` (and `.br` when
+`brotli` is installed) variants next to it in a pool of processes.
+
+`StaticFilesMiddleware` serves `STATIC_ROOT` from the application, picking
+the variant by `Accept-Encoding`. Hashed files never change, so they are
+cached by browsers and CDNs for a year:
+
+    /static/css/app.3f2a9c1b04e2.css  Cache-Control: max-age=31536000, public, immutable
+    /static/css/app.css                Cache-Control: max-age=60, public
+
+Libraries loaded from CDNs are listed in `VENDOR_ASSETS`, see `vendor_asset`.
+"""
+import os
+import json
+import gzip
+import logging
+import functools
+import mimetypes
+import posixpath
+from urllib.parse import urlparse
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Formats which are compressed already
+SKIP_EXTENSIONS = frozenset((
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'woff', 'woff2',
+    'zip', 'gz', 'tgz', 'bz2', 'xz', 'br', 'mp3', 'mp4', 'webm', 'ogg',
+))
+
+# Content encodings by preference, with the suffix of the variant and the compressor
+COMPRESSORS = {}
+if brotli is not None:
+    COMPRESSORS['br'] = ('.br', functools.partial(brotli.compress, quality=11))
+COMPRESSORS['gzip'] = ('.gz', functools.partial(gzip.compress, compresslevel=9, mtime=0))
+
+VARIANT_SUFFIXES = ('.gz', '.br')
+
+
+def should_compress(name):
+    return name.rsplit('.', 1)[-1].lower() not in SKIP_EXTENSIONS and not name.endswith(VARIANT_SUFFIXES)
+
+
+def compress_file(path, min_size=None):
+    """Write compressed variants of the file and return `(path, size, {encoding: size})`.
+
+    Variants which would not save at least 5% are not kept.
+    """
+    if min_size is None:
+        min_size = settings.STATIC_COMPRESS_MIN_SIZE
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {}
+    for encoding, (suffix, compress) in COMPRESSORS.items():
+        if len(data) >= min_size:
+            compressed = compress(data)
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+                continue
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return path, len(data), sizes
+
+
+def compress_files(paths, processes=None):
+    """Compress the files in a pool of `STATIC_COMPRESS_PROCESSES` processes."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or settings.STATIC_COMPRESS_PROCESSES or os.cpu_count() or 1
+    min_size = settings.STATIC_COMPRESS_MIN_SIZE
+    # Daemonic processes (e.g. Celery or parallel test workers) cannot have children
+    if processes == 1 or len(paths) < 2 or multiprocessing.current_process().daemon:
+        return [compress_file(path, min_size) for path in paths]
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(
+            functools.partial(compress_file, min_size=min_size), paths,
+            chunksize=max(1, len(paths) // (processes * 4))))
+
+
+def compression_report(root):
+    """Sizes of the files in `root` and of their compressed variants."""
+    report = {'files': 0, 'compressed': 0, 'size': 0}
+    report.update({encoding: 0 for encoding in COMPRESSORS})
+    for directory, _, filenames in os.walk(root):
+        names = set(filenames)
+        for filename in filenames:
+            if filename.endswith(VARIANT_SUFFIXES) and filename.rsplit('.', 1)[0] in names:
+                continue
+            size = os.path.getsize(os.path.join(directory, filename))
+            report['files'] += 1
+            report['size'] += size
+            compressed = False
+            for encoding, (suffix, _) in COMPRESSORS.items():
+                if filename + suffix in names:
+                    compressed = True
+                    report[encoding] += os.path.getsize(os.path.join(directory, filename + suffix))
+                else:
+                    report[encoding] += size
+            report['compressed'] += compressed
+    return report
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """`ManifestStaticFilesStorage` which also writes compressed variants of
+    the original and the hashed files."""
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        results = compress_files(sorted(self.path(name) for name in names if should_compress(name)))
+        size = sum(x[1] for x in results)
+        for encoding in COMPRESSORS:
+            saved = sum(x[1] - x[2][encoding] for x in results if encoding in x[2])
+            logger.info(
+                'Compressed %d of %d static files with %s, saved %d of %d bytes.',
+                sum(encoding in x[2] for x in results), len(results), encoding, saved, size)
+
+
+def parse_accept_encoding(header):
+    """Content codings of an `Accept-Encoding` header with their q-values,
+    `'br;q=0, gzip'` gives `{'br': 0.0, 'gzip': 1.0}`."""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def etag_matches(etag, if_none_match):
+    """The weak comparison of `If-None-Match`, which ignores the `W/` prefix."""
+    from django.utils.http import parse_etags
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in (x[2:] if x.startswith('W/') else x for x in etags)
+
+
+def load_hashed_names(root):
+    """Names of the hashed files in the manifest of `collectstatic`."""
+    try:
+        with open(os.path.join(root, ManifestStaticFilesStorage.manifest_name)) as f:
+            return frozenset(json.load(f).get('paths', {}).values())
+    except (OSError, ValueError):
+        return frozenset()
+
+
+class StaticFile:
+    """A file of `STATIC_ROOT` with the stats of its compressed variants."""
+    def __init__(self, path, immutable):
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in (
+                'application/javascript', 'application/json', 'image/svg+xml'):
+            self.content_type += '; charset=utf-8'
+        self.immutable = immutable
+        # (encoding, path, stat) by preference, the original file goes last
+        self.variants = []
+        for encoding, (suffix, _) in COMPRESSORS.items():
+            if os.path.isfile(path + suffix):
+                self.variants.append((encoding, path + suffix, os.stat(path + suffix)))
+        self.variants.append((None, path, os.stat(path)))
+
+    def get_variant(self, accept_encoding):
+        """The acceptable variant with the highest q-value, the original file
+        if none is."""
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_q = self.variants[-1], 0
+        for variant in self.variants[:-1]:
+            q = codings.get(variant[0], codings.get('*', 0))
+            if q > best_q:
+                best, best_q = variant, q
+        return best
+
+
+class StaticFilesMiddleware:
+    """Serve `STATIC_ROOT` before the rest of the middleware chain.
+
+    Put it right after `SecurityMiddleware`. Files which are not found are
+    passed to the application, so it does not hide `runserver` static files
+    in development.
+    """
+    def __init__(self, get_response):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.prefix = urlparse(settings.STATIC_URL or '').path
+        # Files served by a CDN or another host
+        if not self.prefix.startswith('/') or urlparse(settings.STATIC_URL).netloc or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.root = os.path.abspath(settings.STATIC_ROOT)
+        self.hashed_names = load_hashed_names(self.root)
+        self.files = {}
+
+    def __call__(self, request):
+        if request.path.startswith(self.prefix) and request.method in ('GET', 'HEAD'):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def find(self, name):
+        static_file = self.files.get(name)
+        if static_file is None:
+            normalized = posixpath.normpath(name).lstrip('/')
+            if normalized != name or normalized.startswith('..'):
+                return None
+            path = os.path.join(self.root, *normalized.split('/'))
+            if not os.path.isfile(path):
+                return None
+            # Only files which exist are kept, unknown names must not fill the memory
+            static_file = self.files[name] = StaticFile(path, name in self.hashed_names)
+        return static_file
+
+    def serve(self, request, name):
+        from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+        from django.utils.http import http_date
+
+        static_file = self.find(name)
+        if static_file is None:
+            return None
+        encoding, path, stat = static_file.get_variant(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+        if etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+            response['Content-Length'] = stat.st_size
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            del response['Content-Disposition']
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if len(static_file.variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        if static_file.immutable:
+            response['Cache-Control'] = 'max-age=%d, public, immutable' % IMMUTABLE_MAX_AGE
+        else:
+            response['Cache-Control'] = 'max-age=%d, public' % settings.STATIC_MAX_AGE
+        return response
+
+
+def vendor_asset_url(name):
+    """The URL of a `VENDOR_ASSETS` file, local when `VENDOR_ASSETS_LOCAL` is on."""
+    if settings.VENDOR_ASSETS_LOCAL:
+        from django.templatetags.static import static
+        return static('vendor/' + name)
+    return settings.VENDOR_ASSETS[name]['url']
+
+
+def render_vendor_asset(name):
+    from django.utils.html import format_html
+    from django.utils.safestring import mark_safe
+
+    asset = settings.VENDOR_ASSETS[name]
+    attrs = []
+    if asset.get('integrity'):
+        attrs.append(format_html(' integrity="{}"', asset['integrity']))
+    if not settings.VENDOR_ASSETS_LOCAL:
+        attrs.append(' crossorigin="anonymous"')
+    attrs = mark_safe(''.join(attrs))
+    if name.endswith('.css'):
+        return format_html('<link rel="stylesheet" href="{}"{}>', vendor_asset_url(name), attrs)
+    return format_html('<script src="{}"{}></script>', vendor_asset_url(name), attrs)
@@ -0,0 +1,16 @@
+from celery import shared_task
+
+
+@shared_task
+def generate_thumbnails_task(label, field_name, name, aliases=None):
+    """Generate the missing thumbnails of a stored image, e.g. after an upload.
+
+    `label` is the model label like `accounts.User`, `name` is the file name
+    in the storage of the field.
+    """
+    from django.apps import apps
+    from .thumbnails import generate_aliases, thumbnail_target
+
+    model = apps.get_model(label)
+    field = model._meta.get_field(field_name)
+    return generate_aliases(field.storage, name, thumbnail_target(model, field_name), aliases)
@@ -0,0 +1,152 @@
+"""Sentry error reporting and performance tracing.
+
+`init_sentry` is called by the production settings with rates from the
+environment:
+
+    SENTRY_SAMPLE_RATE=1.0                 share of errors to send
+    SENTRY_TRACES_SAMPLE_RATE=0.05         share of requests and tasks to trace
+    SENTRY_ROUTE_SAMPLE_RATES=login=1,register=1,index=0.01
+                                           rates by URL name or Celery task name
+    SENTRY_EVENTS_PER_MINUTE=10            the same error is sent this many times a minute
+
+`CoreConfig.ready()` calls `init_sentry` with the `SENTRY_DSN` and
+`SENTRY_OPTIONS` settings, so importing the settings does not import
+sentry_sdk. Only the integrations named in `SENTRY_INTEGRATIONS` are
+imported: processes which neither serve requests nor run tasks, like the
+slim settings of cron commands, do without them.
+"""
+import time
+import threading
+import functools
+from django.utils.module_loading import import_string
+
+
+INTEGRATIONS = {
+    'django': 'sentry_sdk.integrations.django.DjangoIntegration',
+    'celery': 'sentry_sdk.integrations.celery.CeleryIntegration',
+    'redis': 'sentry_sdk.integrations.redis.RedisIntegration',
+}
+
+
+def parse_rates(value):
+    """Parse `name=rate,...` into a dict, e.g. `login=1,index=0.01`."""
+    rates = {}
+    for item in value.split(','):
+        if item.strip():
+            name, _, rate = item.partition('=')
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve_route(path):
+    """The URL name of the path, or None."""
+    from django.urls import Resolver404, resolve
+    try:
+        return resolve(path).url_name
+    except Resolver404:
+        return None
+
+
+class TracesSampler:
+    """Sample transactions by URL name or Celery task name, other ones with
+    the default rate. Distributed traces keep the decision of their parent."""
+    def __init__(self, default_rate=0.0, rates=None):
+        self.default_rate = default_rate
+        self.rates = dict(rates or {})
+
+    def get_route(self, sampling_context):
+        environ = sampling_context.get('wsgi_environ')
+        if environ is not None:
+            return resolve_route(environ.get('PATH_INFO', '/'))
+        job = sampling_context.get('celery_job')
+        if job is not None:
+            return job.get('task')
+        return None
+
+    def __call__(self, sampling_context):
+        if sampling_context.get('parent_sampled') is not None:
+            return sampling_context['parent_sampled']
+        return self.rates.get(self.get_route(sampling_context), self.default_rate)
+
+
+class EventLimiter:
+    """A `before_send` hook which sends the same error at most `limit` times
+    per `window` seconds. The number of suppressed repeats is reported with
+    the next event of the error."""
+    max_keys = 10000
+
+    def __init__(self, limit=10, window=60, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> [window start, sent, suppressed]
+        self.counters = {}
+
+    @staticmethod
+    def get_key(event, hint):
+        """Errors are the same when the exception type and the raising line match."""
+        exc_info = hint and hint.get('exc_info')
+        if exc_info and exc_info[2] is not None:
+            tb = exc_info[2]
+            while tb.tb_next is not None:
+                tb = tb.tb_next
+            return (exc_info[0].__name__, tb.tb_frame.f_code.co_filename, tb.tb_lineno)
+        logentry = event.get('logentry') or {}
+        return (event.get('logger'), logentry.get('message') or event.get('message'))
+
+    def __call__(self, event, hint):
+        key = self.get_key(event, hint)
+        now = self.clock()
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                if len(self.counters) >= self.max_keys:
+                    self.counters.clear()
+                suppressed = counter[2] if counter else 0
+                counter = self.counters[key] = [now, 0, 0]
+            else:
+                suppressed = counter[2]
+            if counter[1] >= self.limit:
+                counter[2] += 1
+                return None
+            counter[1] += 1
+            counter[2] = 0
+        if suppressed:
+            event.setdefault('extra', {})['suppressed_repeats'] = suppressed
+        return event
+
+
+def get_sentry_options(sample_rate=1.0, traces_sample_rate=0.0, route_sample_rates=None,
+                       events_per_minute=10, **options):
+    """Keyword arguments of `sentry_sdk.init()` without integrations."""
+    options.update(
+        sample_rate=sample_rate,
+        traces_sampler=TracesSampler(traces_sample_rate, route_sample_rates),
+        before_send=EventLimiter(events_per_minute, 60),
+    )
+    return options
+
+
+def get_integrations(names):
+    """Integration instances by their names in `INTEGRATIONS`."""
+    from django.core.exceptions import ImproperlyConfigured
+    try:
+        return [import_string(INTEGRATIONS[x])() for x in names]
+    except KeyError as e:
+        raise ImproperlyConfigured('Unknown Sentry integration %s, use one of: %s' % (
+            e, ', '.join(INTEGRATIONS)))
+
+
+def init_sentry(dsn, integrations=tuple(INTEGRATIONS), **options):
+    import sentry_sdk
+
+    sentry_sdk.init(
+        dsn=dsn,
+        integrations=get_integrations(integrations),
+        # If you wish to associate users to errors (assuming you are using
+        # django.contrib.auth) you may enable sending PII data.
+        send_default_pii=True,
+        **get_sentry_options(**options))
+
@@ -0,0 +1,254 @@
+"""Guardrails for querysets evaluated by templates.
+
+Querysets passed to `{% for_queryset %}` / `{% guarded_queryset %}`:
+
+* are capped to `TEMPLATE_QUERYSET_LIMIT` rows (or an explicit limit);
+* get `select_related`/`prefetch_related`/`only` hints derived from the
+  attributes the template actually uses;
+* are executed at most once per request, memoized by their SQL and params;
+* are logged to the `djapps.core.template_queries` logger.
+
+Querysets returned by the queryset filters of `core_tags` (`order_by`,
+`filter_queryset` and others) are wrapped by `guard`, so iterating over them
+is capped and logged the same way.
+"""
+import time
+import logging
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.db.models import QuerySet
+
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CACHE_ATTR = '_template_query_cache'
+
+
+def _condition_expressions(condition):
+    """Filter expressions of an `{% if %}` condition, a tree of operators
+    with `TemplateLiteral` leaves."""
+    if condition is None:
+        # {% else %}
+        return
+    if condition.value is not None:
+        yield condition.value
+    for operand in (condition.first, condition.second):
+        if operand is not None:
+            yield from _condition_expressions(operand)
+
+
+def _filter_expressions(node):
+    """Filter expressions used by the node itself (not by its children),
+    or None if the node is not understood."""
+    from django.template.base import TextNode, VariableNode
+    from django.template.defaulttags import CommentNode, ForNode, IfNode, WithNode
+    if isinstance(node, (TextNode, CommentNode)):
+        return []
+    if isinstance(node, VariableNode):
+        return [node.filter_expression]
+    if isinstance(node, ForNode):
+        return [getattr(node.sequence, 'filter_expression', node.sequence)]
+    if isinstance(node, WithNode):
+        return list(node.extra_context.values())
+    if isinstance(node, IfNode):
+        return [x for condition, _ in node.conditions_nodelists for x in _condition_expressions(condition)]
+    return None
+
+
+def _variables(expression):
+    """The variable of the filter expression and variables of its filter arguments."""
+    yield expression.var
+    for _, args in expression.filters:
+        for lookup, arg in args:
+            if lookup:
+                yield arg
+
+
+def attribute_paths(nodelist, varname):
+    """Collect attribute lookups like `user.group.name` used in `{{ }}`,
+    `{% if %}`, `{% for %}` and `{% with %}` (with filter arguments) inside of
+    the nodelist for the given variable.
+
+    Any other tag could read any attribute, so it adds the empty path: the
+    whole object is used and no fields may be deferred.
+    """
+    from django.template.base import Node
+    paths = set()
+    for node in nodelist.get_nodes_by_type(Node):
+        expressions = _filter_expressions(node)
+        if expressions is None:
+            paths.add(())
+            continue
+        for expression in expressions:
+            for var in _variables(expression):
+                lookups = getattr(var, 'lookups', None)
+                if lookups and lookups[0] == varname:
+                    paths.add(tuple(lookups[1:]))
+    return paths
+
+
+def query_hints(model, paths):
+    """Return `(select_related, prefetch_related, only)` for the attribute paths.
+
+    `only` is None if any path uses something but a concrete field (a property,
+    a method or the object itself), since deferring fields then could cause
+    a query per row.
+    """
+    select, prefetch, only = set(), set(), set()
+    complete = True
+    for path in paths:
+        current, prefix = model, []
+        for name in path:
+            if name == 'pk':
+                break
+            try:
+                field = current._meta.get_field(name)
+            except FieldDoesNotExist:
+                complete = False
+                break
+            if field.is_relation and name == getattr(field, 'attname', None) != field.name:
+                # A foreign key column like `group_id`
+                name = field.name
+                field = None
+            lookup = '__'.join(prefix + [name])
+            if field is None or not field.is_relation:
+                only.add(lookup)
+                break
+            if field.concrete and (field.many_to_one or field.one_to_one):
+                select.add(lookup)
+                only.add(lookup)
+                prefix.append(name)
+                current = field.related_model
+                continue
+            # Reverse relations and many-to-many fields
+            prefetch.add(lookup)
+            break
+        else:
+            # The path ends with an object, e.g. {{ user }} or {{ user.group }}
+            complete = False
+    return select, prefetch, (only if complete and only else None)
+
+
+def apply_hints(queryset, paths):
+    if queryset._fields is not None:
+        # values() and values_list() querysets
+        return queryset
+    select, prefetch, only = query_hints(queryset.model, paths)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    if only and not queryset.query.deferred_loading[0]:
+        queryset = queryset.only(*sorted(only))
+    return queryset
+
+
+def query_key(queryset):
+    """A normalised key of the query: the database alias, SQL and params."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    return (
+        queryset.db, sql, tuple(params),
+        tuple(queryset._prefetch_related_lookups),
+    )
+
+
+def _get_cache(context):
+    request = context.get('request') if context is not None else None
+    if request is not None:
+        cache = getattr(request, REQUEST_CACHE_ATTR, None)
+        if cache is None:
+            cache = {}
+            setattr(request, REQUEST_CACHE_ATTR, cache)
+        return cache
+    if context is not None:
+        # Without a request, memoize for the duration of the render
+        return context.render_context.dicts[0].setdefault(REQUEST_CACHE_ATTR, {})
+    return {}
+
+
+def evaluate(queryset, context=None, limit=None, paths=None):
+    """Evaluate the queryset for a template and return a list of objects."""
+    if not isinstance(queryset, QuerySet):
+        return queryset
+    if limit is None:
+        limit = settings.TEMPLATE_QUERYSET_LIMIT
+    limit = int(limit)
+    if paths:
+        queryset = apply_hints(queryset, paths)
+    # Slicing a sliced queryset narrows it, so `users[:100000]` gets at most
+    # `limit` rows from its start as well
+    queryset = queryset[:limit]
+
+    key = query_key(queryset)
+    if key is None:
+        return []
+    cache = _get_cache(context)
+    if key in cache:
+        logger.debug('Template query cache hit: %s', key[1])
+        return cache[key]
+
+    started = time.monotonic()
+    result = list(queryset)
+    logger.info(
+        'Template query (%.1f ms, %d rows): %s',
+        (time.monotonic() - started) * 1000, len(result), key[1],
+        extra={'sql': key[1], 'params': key[2], 'rows': len(result)})
+    if len(result) >= limit:
+        logger.warning(
+            'Template query reached the limit of %d rows: %s', limit, key[1])
+    cache[key] = result
+    return result
+
+
+class GuardedSequence:
+    """A `FilterExpression` replacement for `ForNode` which evaluates
+    querysets through `evaluate`."""
+    def __init__(self, filter_expression, limit, paths):
+        self.filter_expression = filter_expression
+        self.limit = limit
+        self.paths = paths
+
+    def __str__(self):
+        return str(self.filter_expression)
+
+    def resolve(self, context, ignore_failures=False):
+        value = self.filter_expression.resolve(context, ignore_failures)
+        limit = self.limit.resolve(context) if self.limit is not None else None
+        return evaluate(value, context, limit, self.paths)
+
+
+class GuardedQuerySetMixin:
+    """Evaluates the queryset through `evaluate` when it is iterated."""
+    _unguarded_class = None
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            queryset = self._chain()
+            queryset.__class__ = self._unguarded_class
+            self._result_cache = evaluate(queryset)
+            # Lookups were prefetched by evaluating the clone
+            self._prefetch_done = True
+        super()._fetch_all()
+
+
+_guarded_classes = {}
+
+
+def guard(queryset):
+    """Return a clone of the queryset which is capped to
+    `TEMPLATE_QUERYSET_LIMIT` rows and logged when it is evaluated.
+    Counting and other queries are not affected."""
+    if not isinstance(queryset, QuerySet) or isinstance(queryset, GuardedQuerySetMixin):
+        return queryset
+    cls = type(queryset)
+    guarded_class = _guarded_classes.get(cls)
+    if guarded_class is None:
+        guarded_class = type(
+            'Guarded' + cls.__name__, (GuardedQuerySetMixin, cls), {'_unguarded_class': cls})
+        _guarded_classes[cls] = guarded_class
+    queryset = queryset._chain()
+    queryset.__class__ = guarded_class
+    return queryset
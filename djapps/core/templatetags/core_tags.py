@@ -1,15 +1,18 @@
+import logging
 from django import template
 from django.utils.safestring import mark_safe
 from django.conf import settings
+from ..public_settings import get_snapshot
 
 register = template.Library()
+logger = logging.getLogger(__name__)
 
 # Debugging
 
 @register.simple_tag
 def debug_print(*values):
     if settings.DEBUG:
-        print(*values)
+        logger.debug('debug_print: %s', ' '.join(str(x) for x in values))
         return values
     else:
         return ''
@@ -17,11 +20,13 @@ def debug_print(*values):
 
 @register.simple_tag(takes_context=True)
 def debug_context(context):
-    if settings.DEBUG:
-        print(context)
-        return context
-    else:
+    """
+    Renders context variables in a collapsible panel, see djapps.core.introspection
+    """
+    from ..introspection import context_items, is_enabled, render_panel
+    if not is_enabled():
         return ''
+    return render_panel('context', context_items(context))
 
 
 # Settings
@@ -29,7 +34,15 @@ def debug_context(context):
 
 @register.simple_tag
 def load_option(option, default=None):
-    return getattr(settings, option, default)
+    """
+    Usage: {% load_option "SITE_URL" as site_url %}
+
+    Only settings listed in PUBLIC_SETTINGS can be loaded.
+    """
+    snapshot = get_snapshot()
+    if option not in snapshot and settings.DEBUG:
+        logger.warning('%s is not listed in PUBLIC_SETTINGS.', option)
+    return snapshot.get(option, default)
 
 
 # Helpful tags and filters
@@ -77,7 +90,7 @@ def cast_elements(iterable, type_name):
         'float': float,
         'str': str,
     }
-    return [types[type_name](x) for x in iterable]
+    return list(map(types[type_name], iterable))
 
 
 @register.simple_tag
@@ -128,19 +141,34 @@ def ignore_none(value):
 
 @register.filter
 def sort(iterable):
-    return iterable.sort()
+    return sorted(iterable)
 
 
 @register.filter
 def sort_by_attr(iterable, attr):
-    result = sorted(iterable, key=lambda x: getattr(x, attr))
-    return result
+    """Sorts by one or more attributes, e.g. `"name,-date_joined"`.
+    Querysets are sorted by the database."""
+    from ..collection_utils import sort_items
+    return sort_items(iterable, attr)
 
 
 @register.filter
 def sort_by_key(iterable, key):
-    result = sorted(iterable, key=lambda x: x[key])
-    return result
+    from ..collection_utils import sort_items
+    return sort_items(iterable, key, by_key=True)
+
+
+@register.simple_tag
+def sort_items(iterable, keys, by_key=False, reverse=False, limit=None):
+    """Sorts items, selecting only the top `limit` items with a heap.
+    Usage:
+        {% sort_items players '-score' limit=10 as top_players %}
+        {% sort_items rows 'total,-name' by_key=True as rows %}
+    """
+    from .. import collection_utils
+    return collection_utils.sort_items(
+        iterable, keys, by_key=by_key, reverse=reverse,
+        limit=int(limit) if limit is not None else None)
 
 
 @register.filter
@@ -229,7 +257,8 @@ def beautify_comma_separation(value):
 
 @register.filter
 def comma_separated_attrs(value, attr):
-    return ','.join([getattr(x, attr) for x in value])
+    from ..collection_utils import iter_attrs
+    return ','.join(iter_attrs(value, attr))
 
 
 @register.filter
@@ -311,16 +340,24 @@ def create_dict():
 
 @register.filter
 def attrs_list(obj):
-    return dir(obj)
+    from ..introspection import attribute_names, is_enabled
+    if not is_enabled():
+        return ''
+    return attribute_names(obj)
 
 
 @register.filter
 def inspect(obj):
-    attrs = dir(obj)
-    result = dict()
-    for attr in attrs:
-        result[attr] = getattr(obj, attr)
-    return result
+    """
+    Usage: {{ user|inspect }}
+
+    Renders public attributes in a collapsible panel without running queries.
+    Can be used as a mapping as well: {{ user|inspect|length }}
+    """
+    from ..introspection import Inspection, is_enabled
+    if not is_enabled():
+        return ''
+    return Inspection(obj)
 
 
 @register.simple_tag
@@ -340,7 +377,8 @@ def strip_items(iterable):
 
 @register.filter
 def join_list(iterable, delimiter=','):
-    return delimiter.join([str(x) for x in iterable])
+    from ..collection_utils import join_values
+    return join_values(iterable, delimiter)
 
 
 @register.filter
@@ -350,61 +388,156 @@ def thousands_separator(value, separator=' '):
 
 @register.simple_tag
 def set_query_parameter(url, param_name, param_value):
-    from urllib.parse import (
-        urlencode,
-        parse_qs,
-        urlsplit,
-        urlunsplit,
-    )
-    scheme, netloc, path, query_string, fragment = urlsplit(url)
-    query_params = parse_qs(query_string)
-    if param_value:
-        query_params[param_name] = [param_value]
-    elif param_name in query_params:
-        del query_params[param_name]
-    new_query_string = urlencode(query_params, doseq=True)
-    return urlunsplit((scheme, netloc, path, new_query_string, fragment))
+    from ..querystring import parse_url
+    return parse_url(url).replace(**{param_name: param_value or None})
 
 
 @register.filter
 def get_query_parameter(url, param_name):
-    from urllib.parse import (
-        urlencode,
-        parse_qs,
-        urlsplit,
-        urlunsplit,
-    )
-    scheme, netloc, path, query_string, fragment = urlsplit(url)
-    query_params = parse_qs(query_string)
-    return ','.join(query_params.get(param_name))
-
-
-@register.filter(takes_context=True)
+    from ..querystring import parse_url
+    return parse_url(url).get(param_name)
+
+
+def _parsed_url(context, url=None):
+    from ..querystring import ParsedURL, parse_url, parsed_request_url
+    if isinstance(url, ParsedURL):
+        return url
+    if url:
+        return parse_url(str(url))
+    return parsed_request_url(context['request'])
+
+
+@register.simple_tag(takes_context=True)
+def query_url(context, *args, **kwargs):
+    """Builds a URL with replaced query parameters.
+    Usage:
+        {% query_url page=2 %}              # the current request URL
+        {% query_url qs page=2 sort=None %}  # a URL parsed by {% querystring %}
+    """
+    return _parsed_url(context, *args).replace(**kwargs)
+
+
+@register.simple_tag(takes_context=True)
+def sort_url(context, *args, param='sort'):
+    """Builds a URL which toggles sorting by a field.
+    Usage:
+        {% sort_url 'name' %}
+        {% sort_url qs 'name' param='order' %}
+    """
+    *url, field = args
+    return _parsed_url(context, *url).toggle_sort(field, param)
+
+
+@register.tag(name='querystring')
+def do_querystring(parser, token):
+    """
+    Parse a URL once and build many variants of it inside of the block.
+    Usage:
+    .. code-block:: html+django
+        {% querystring as qs %}..{% endquerystring %}      # the current request URL
+        {% querystring url as qs %}..{% endquerystring %}
+    For example:
+    .. code-block:: html+django
+        {% querystring as qs %}
+            {% for p in page_obj.paginator.page_range %}
+                <a href="{% query_url qs page=p %}"{% if qs.page == p|stringformat:"d" %} class="active"{% endif %}>{{ p }}</a>
+            {% endfor %}
+            <a href="{% sort_url qs 'name' %}">Name</a>
+        {% endquerystring %}
+    """
+    bits = token.split_contents()
+    if len(bits) == 3 and bits[1] == 'as':
+        url, var = None, bits[2]
+    elif len(bits) == 4 and bits[2] == 'as':
+        url, var = parser.compile_filter(bits[1]), bits[3]
+    else:
+        raise template.TemplateSyntaxError("'querystring' node expects '[url] as variable' syntax.")
+
+    nodelist = parser.parse(('endquerystring',))
+    parser.delete_first_token()
+    return QuerystringNode(nodelist, url, var)
+
+
+class QuerystringNode(template.Node):
+    def __init__(self, nodelist, url, varname):
+        self.nodelist = nodelist
+        self.url = url
+        self.varname = varname
+
+    def render(self, context):
+        url = self.url.resolve(context) if self.url is not None else None
+        with context.push(**{self.varname: _parsed_url(context, url)}):
+            return self.nodelist.render(context)
+
+
+@register.simple_tag(takes_context=True)
 def build_absolute_uri(context, location):
     return context['request'].build_absolute_uri(location)
 
 
+@register.simple_tag
+def thumbnail_url_or_placeholder(file, alias):
+    """
+    Usage: <img src="{% thumbnail_url_or_placeholder user.avatar 'avatar' %}">
+
+    Never resizes images while rendering, a placeholder of the alias size
+    is returned until the thumbnail is generated by Celery.
+    """
+    from ..thumbnails import thumbnail_url_or_placeholder
+    return thumbnail_url_or_placeholder(file, alias)
+
+
+@register.simple_tag
+def vendor_asset(name):
+    """
+    Usage: {% vendor_asset 'bootstrap.min.css' %}
+
+    Renders a <link> or <script> of a VENDOR_ASSETS library, loaded
+    from its CDN or from STATIC_URL/vendor/ with VENDOR_ASSETS_LOCAL.
+    """
+    from ..staticfiles import render_vendor_asset
+    return render_vendor_asset(name)
+
+
+@register.simple_tag(takes_context=True)
+def route(context, name):
+    """
+    Usage: {% route 'login' %}
+
+    The URL of a route without arguments, as {% url %} renders it, looked
+    up in a table instead of reversed on every render.
+    """
+    from ..routes import render_route
+    return render_route(context, name)
+
+
 # Querysets
+# Querysets returned by these filters are capped to TEMPLATE_QUERYSET_LIMIT rows
+# when iterated, see `template_queries.guard`
 
 @register.filter
 def order_by(queryset, values):
+    from ..template_queries import guard
     values_attrs = values.split(',')
-    return queryset.order_by(*values_attrs)
+    return guard(queryset.order_by(*values_attrs))
 
 
 @register.filter
 def select_related(queryset, value):
-    return queryset.select_related(value)
+    from ..template_queries import guard
+    return guard(queryset.select_related(value))
 
 
 @register.filter
 def prefetch_related(queryset, value):
-    return queryset.prefetch_related(value)
+    from ..template_queries import guard
+    return guard(queryset.prefetch_related(value))
 
 
 @register.filter
 def distinct(queryset):
-    return queryset.distinct()
+    from ..template_queries import guard
+    return guard(queryset.distinct())
 
 
 @register.simple_tag
@@ -424,7 +557,60 @@ def prepare_query_object(logic='AND', **kwargs):
 
 @register.filter
 def filter_queryset(queryset, query):
-    return queryset.filter(query)
+    from ..template_queries import guard
+    return guard(queryset.filter(query))
+
+
+@register.simple_tag(takes_context=True)
+def guarded_queryset(context, queryset, limit=None):
+    """Evaluates a queryset at most once per request, capped to `limit` rows
+    (`TEMPLATE_QUERYSET_LIMIT` by default).
+    Usage:
+        {% guarded_queryset users|order_by:'name' limit=20 as users %}
+    """
+    from ..template_queries import evaluate
+    return evaluate(queryset, context, limit)
+
+
+@register.tag(name='for_queryset')
+def do_for_queryset(parser, token):
+    """
+    A `for` loop over a guarded queryset. `select_related`, `prefetch_related`
+    and `only` are applied according to the attributes used inside of the loop.
+    Usage:
+    .. code-block:: html+django
+        {% for_queryset user in users limit 20 %}
+            {{ user.email }} {{ user.group.name }}
+        {% empty %}
+            No users
+        {% endfor_queryset %}
+    """
+    from django.template.defaulttags import ForNode
+    from ..template_queries import GuardedSequence, attribute_paths
+
+    bits = token.split_contents()
+    limit = None
+    if len(bits) == 6 and bits[4] == 'limit':
+        limit = parser.compile_filter(bits[5])
+    elif len(bits) != 4:
+        raise template.TemplateSyntaxError(
+            "'for_queryset' node expects 'item in queryset [limit N]' syntax.")
+    if bits[2] != 'in':
+        raise template.TemplateSyntaxError(
+            "'for_queryset' node expects 'item in queryset [limit N]' syntax.")
+    loopvar = bits[1]
+
+    nodelist_loop = parser.parse(('empty', 'endfor_queryset'))
+    token = parser.next_token()
+    if token.contents == 'empty':
+        nodelist_empty = parser.parse(('endfor_queryset',))
+        parser.delete_first_token()
+    else:
+        nodelist_empty = None
+
+    sequence = GuardedSequence(
+        parser.compile_filter(bits[3]), limit, attribute_paths(nodelist_loop, loopvar))
+    return ForNode([loopvar], sequence, False, nodelist_loop, nodelist_empty)
 
 
 @register.simple_tag
@@ -435,7 +621,8 @@ def exclude_from_str(value, *args):
 
 @register.filter
 def exclude_from_queryset(queryset, query):
-    return queryset.exclude(query)
+    from ..template_queries import guard
+    return guard(queryset.exclude(query))
 
 
 @register.filter
@@ -515,23 +702,43 @@ def upcase(value):
 
 @register.filter
 def surround_cyrillic(value, span_class='cyrillic-char'):
-    from ..utils import is_roman_chars
-    result = ''
-    for c in value:
-        if is_roman_chars(c):
-            result += c
-        else:
-            result += '<span class="%s">%s</span>' % (span_class, c)
-    return mark_safe(result)
+    from ..utils import surround_non_roman
+    return mark_safe(surround_non_roman(value, span_class))
 
 
 @register.filter
 def encodeobj(obj):
+    """Deprecated: the output can not be loaded back safely, use `signobj`."""
     import pickle
     import base64
     return mark_safe(base64.b64encode(pickle.dumps(obj)).decode('ascii'))
 
 
+@register.filter
+def signobj(obj):
+    """Serializes an object into a compact signed string.
+    Input
+        {{ data | signobj }}
+    Output
+        eyJpZCI6MX0:1nMPuI:...
+    Decode it with `djapps.core.serialization.loads`.
+    """
+    from ..serialization import dumps
+    return mark_safe(dumps(obj))
+
+
+@register.filter
+def decodeobj(value):
+    """Decodes a value produced by `signobj`. Returns None for invalid values."""
+    from django.core.signing import BadSignature
+    from ..serialization import loads
+    try:
+        return loads(value)
+    except (BadSignature, ValueError, TypeError):
+        # Also values signed by an older version which no codec can decode
+        return None
+
+
 @register.filter
 def is_hidden_input(field):
     from django.forms import HiddenInput
@@ -550,6 +757,8 @@ def do_capture(parser, token):
         {% capture silent %}..{% endcapture %}             # output in {{ capture }} only
         {% capture as varname %}..{% endcapture %}         # output in {{ varname }}
         {% capture as varname silent %}..{% endcapture %}  # output in {{ varname }} only
+        {% capture as varname cached var1 var2 %}..{% endcapture %}
+                                                           # rendered once per values of var1, var2
     For example:
     .. code-block:: html+django
         {# Allow templates to override the page title/description #}
@@ -558,9 +767,23 @@ def do_capture(parser, token):
         {# copy the values to the Social Media meta tags #}
         <meta property="og:description" content="{% block og-description %}{{ meta_description }}{% endblock %}" />
         <meta name="twitter:title" content="{% block twitter-title %}{{ meta_title }}{% endblock %}" />
+
+    `cached` blocks are rendered once per page template and values of the
+    variables after it, see djapps.core.fragment_cache. List every variable
+    the output depends on, e.g. a title which differs by object and language:
+    .. code-block:: html+django
+        {% capture as meta_title cached request.path LANGUAGE_CODE %}{% block meta-title %}{% endblock %}{% endcapture %}
     """
     bits = token.split_contents()
 
+    # `cached` and the varying variables come last
+    vary = None
+    start = 3 if bits[1:2] == ['as'] else 1
+    if 'cached' in bits[start:]:
+        index = bits.index('cached', start)
+        vary = [parser.compile_filter(x) for x in bits[index + 1:]]
+        bits = bits[:index]
+
     # tokens
     t_as = 'as'
     t_silent = 'silent'
@@ -569,7 +792,7 @@ def do_capture(parser, token):
 
     num_bits = len(bits)
     if len(bits) > 4:
-        raise template.TemplateSyntaxError("'capture' node supports '[as variable] [silent]' parameters.")
+        raise template.TemplateSyntaxError("'capture' node supports '[as variable] [silent] [cached ...]' parameters.")
     elif num_bits == 4:
         t_name, t_as, var, t_silent = bits
         silent = True
@@ -587,17 +810,32 @@ def do_capture(parser, token):
 
     nodelist = parser.parse(('endcapture',))
     parser.delete_first_token()
-    return CaptureNode(nodelist, var, silent)
+    return CaptureNode(nodelist, var, silent, vary)
 
 
 class CaptureNode(template.Node):
-    def __init__(self, nodelist, varname, silent):
+    def __init__(self, nodelist, varname, silent, vary=None):
         self.nodelist = nodelist
         self.varname = varname
         self.silent = silent
+        # None when not cached
+        self.vary = vary
+
+    def render_output(self, context):
+        if self.vary is None:
+            return self.nodelist.render(context)
+        from ..fragment_cache import get_fragment, make_key, set_fragment
+        key = make_key(self, context, [x.resolve(context) for x in self.vary])
+        if key is None:
+            return self.nodelist.render(context)
+        output = get_fragment(key)
+        if output is None:
+            output = self.nodelist.render(context)
+            set_fragment(key, output)
+        return mark_safe(output)
 
     def render(self, context):
-        output = self.nodelist.render(context)
+        output = self.render_output(context)
         context[self.varname] = output
         if self.silent:
             return ''
@@ -0,0 +1,39 @@
+from django.test.runner import DiscoverRunner, default_test_processes
+from sentry_sdk.transport import Transport
+
+
+class FastTestRunner(DiscoverRunner):
+    """A test runner which runs tests in parallel processes by default.
+
+    The test database is created (or migrated) once and cloned for every
+    worker process, and only the databases the selected tests use are set up,
+    so runs of `SimpleTestCase` tests do not touch a database at all.
+    Pass `--parallel 1` to run the tests in a single process.
+    """
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=default_test_processes())
+
+
+class FakeTransport(Transport):
+    """A Sentry transport which keeps events in memory instead of sending them:
+
+        sentry_sdk.init('https://key@sentry.invalid/1', transport=FakeTransport(), ...)
+    """
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.events = []
+        self.envelopes = []
+
+    def capture_event(self, event):
+        self.events.append(event)
+
+    def capture_envelope(self, envelope):
+        self.envelopes.append(envelope)
+
+    @property
+    def transactions(self):
+        return [
+            item.payload.json for envelope in self.envelopes for item in envelope.items
+            if item.headers.get('type') == 'transaction']
@@ -0,0 +1,22 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from ..benchmarks import core_tags as bench
+from ..templatetags.core_tags import register
+
+
+class CoreTagsBenchmarkTests(SimpleTestCase):
+    def test_cases_compile(self):
+        for name, source in bench.CASES.items():
+            with self.subTest(name=name):
+                Template('{% load core_tags %}' + source)
+
+    def test_cases_render(self):
+        data = bench.make_context()
+        for name, source in bench.CASES.items():
+            with self.subTest(name=name):
+                Template('{% load core_tags %}' + source).render(Context(data))
+
+    def test_all_tags_covered(self):
+        sources = ''.join(bench.CASES.values())
+        for name in sorted(set(register.filters) | set(register.tags)):
+            self.assertIn(name, sources)
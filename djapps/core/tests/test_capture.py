@@ -0,0 +1,87 @@
+from pathlib import Path
+from django.template import Context, Engine, Template
+from django.test import SimpleTestCase, override_settings
+from django.utils.autoreload import file_changed
+from ..fragment_cache import LRUCache, clear_fragments, get_lru
+
+TEMPLATES = {
+    'base.html': (
+        '{% load core_tags %}<title>{% capture as meta_title cached %}{% block meta-title %}Untitled'
+        '{% endblock %} {{ counter.next }}{% endcapture %}</title>{{ meta_title }}'),
+    'page.html': "{% extends 'base.html' %}{% block meta-title %}Page{% endblock %}",
+    'vary.html': '{% load core_tags %}{% capture silent cached name %}{{ name }} {{ counter.next }}{% endcapture %}{{ capture }}',
+}
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    @property
+    def next(self):
+        self.count += 1
+        return self.count
+
+
+class CaptureCacheTests(SimpleTestCase):
+    def setUp(self):
+        clear_fragments()
+        self.engine = Engine(
+            loaders=[('django.template.loaders.locmem.Loader', TEMPLATES)],
+            libraries={'core_tags': 'djapps.core.templatetags.core_tags'})
+        self.counter = Counter()
+
+    def render(self, template_name, **context):
+        return self.engine.get_template(template_name).render(Context(dict(context, counter=self.counter)))
+
+    def test_cached(self):
+        self.assertEqual(self.render('base.html'), '<title>Untitled 1</title>Untitled 1')
+        self.assertEqual(self.render('base.html'), '<title>Untitled 1</title>Untitled 1')
+        # Blocks are filled by the page template
+        self.assertEqual(self.render('page.html'), '<title>Page 2</title>Page 2')
+        self.assertEqual(self.render('page.html'), '<title>Page 2</title>Page 2')
+        self.assertEqual(self.counter.count, 2)
+
+    def test_vary(self):
+        self.assertEqual(
+            [self.render('vary.html', name=x) for x in ('a', 'b', 'a', '<b>')],
+            ['a 1', 'b 2', 'a 1', '&lt;b&gt; 3'])
+
+    def test_invalidation(self):
+        self.render('base.html')
+        with self.settings(CAPTURE_CACHE_SIZE=2):
+            self.assertEqual(self.render('base.html'), '<title>Untitled 2</title>Untitled 2')
+            for name in ('a', 'b', 'c'):
+                self.render('vary.html', name=name)
+            self.assertEqual(len(get_lru()), 2)
+            self.assertEqual(self.render('vary.html', name='c'), 'c 5')
+            self.assertEqual(self.render('base.html'), '<title>Untitled 6</title>Untitled 6')
+            file_changed.send(sender=None, file_path=Path('base.html'))
+            self.assertEqual(self.render('base.html'), '<title>Untitled 7</title>Untitled 7')
+
+    @override_settings(CACHES=LOCMEM_CACHES, CAPTURE_CACHE_ALIAS='fragments')
+    def test_shared_cache(self):
+        self.render('base.html')
+        get_lru().clear()
+        self.assertEqual(self.render('base.html'), '<title>Untitled 1</title>Untitled 1')
+        with self.settings(HTTP_CACHE_VERSION='2'):
+            self.assertEqual(self.render('base.html'), '<title>Untitled 2</title>Untitled 2')
+
+    def test_uncached(self):
+        template = Template(TEMPLATES['vary.html'])
+        outputs = [template.render(Context({'name': 'a', 'counter': self.counter})) for _ in range(2)]
+        self.assertEqual(outputs, ['a 1', 'a 2'])
+        template = Template('{% load core_tags %}{% capture as cached silent %}x{% endcapture %}{{ cached }}')
+        self.assertEqual(template.render(Context()), 'x')
+
+    def test_lru(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
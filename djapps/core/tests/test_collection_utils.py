@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from djapps.accounts.models import User
+from ..collection_utils import join_values, iter_strip, parse_sort_keys, sort_items
+
+
+class SortItemsTests(TestCase):
+    def setUp(self):
+        self.items = [
+            SimpleNamespace(name='b', group=1, score=3),
+            SimpleNamespace(name='a', group=2, score=1),
+            SimpleNamespace(name='c', group=1, score=2),
+        ]
+
+    def names(self, items):
+        return [x.name for x in items]
+
+    def test_parse_sort_keys(self):
+        self.assertEqual(parse_sort_keys('name, -date'), [('name', False), ('date', True)])
+        self.assertEqual(parse_sort_keys(0), [(0, False)])
+
+    def test_sort(self):
+        self.assertEqual(self.names(sort_items(self.items, 'name')), ['a', 'b', 'c'])
+        self.assertEqual(self.names(sort_items(self.items, '-score')), ['b', 'c', 'a'])
+        self.assertEqual(self.names(sort_items(self.items, 'score', reverse=True)), ['b', 'c', 'a'])
+        self.assertEqual(self.names(sort_items(self.items, 'group,name')), ['b', 'c', 'a'])
+        self.assertEqual(self.names(sort_items(self.items, 'group,-name')), ['c', 'b', 'a'])
+
+    def test_limit(self):
+        self.assertEqual(self.names(sort_items(self.items, '-score', limit=2)), ['b', 'c'])
+        self.assertEqual(self.names(sort_items(self.items, 'group,-score', limit=1)), ['b'])
+
+    def test_by_key(self):
+        rows = [vars(x) for x in self.items]
+        self.assertEqual([x['name'] for x in sort_items(rows, 'score', by_key=True)], ['a', 'c', 'b'])
+        self.assertEqual(sort_items([(2, 'x'), (1, 'y')], 0, by_key=True), [(1, 'y'), (2, 'x')])
+
+    def test_queryset(self):
+        User.objects.create_user('b@mail.com', 'B', 'demo')
+        User.objects.create_user('a@mail.com', 'A', 'demo')
+        with CaptureQueriesContext(connection) as queries:
+            users = sort_items(User.objects.all(), '-email', limit=1)
+        self.assertIn('ORDER BY "accounts_user"."email" DESC', queries[0]['sql'])
+        self.assertEqual([u.email for u in users], ['b@mail.com'])
+        # Properties can not be sorted by the database
+        self.assertEqual([u.email for u in sort_items(User.objects.all(), 'days_on_site')], ['a@mail.com', 'b@mail.com'])
+
+    def test_queryset_relations(self):
+        permissions = Permission.objects.filter(content_type__app_label__in=['auth', 'accounts'])
+        with CaptureQueriesContext(connection) as queries:
+            result = sort_items(permissions, 'content_type.app_label,codename')
+        self.assertIn('ORDER BY', queries[0]['sql'])
+        self.assertIsInstance(result, list)
+        self.assertEqual(result[0].content_type.app_label, 'accounts')
+        # ContentType.name is a property, so the database can not sort by it
+        names = [p.content_type.name for p in sort_items(permissions, '-content_type.name')]
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertEqual(sort_items(User.objects.all(), 'groups.name'), [])
+
+    def test_helpers(self):
+        self.assertEqual(join_values(iter_strip([' a', 'b '])), 'a,b')
+
+    def test_filters(self):
+        context = Context({'items': self.items, 'values': [3, 1, 2]})
+        self.assertEqual(
+            Template(
+                '{% load core_tags %}{{ values|sort|join_list }} '
+                '{% for x in items|sort_by_attr:"group,-score" %}{{ x.name }}{% endfor %} '
+                '{% sort_items items "-score" limit=2 as top %}{{ top|comma_separated_attrs:"name" }}'
+            ).render(context),
+            '1,2,3 bca b,c')
@@ -0,0 +1,100 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from djapps.accounts.factories import UserFactory
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class HttpCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory.create(name='John Doe')
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_user_page(self):
+        url = reverse('personal_information')
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertIn('Accept-Language', response['Vary'])
+
+        # The ETag is checked before the view renders anything
+        with self.assertTemplateNotUsed('accounts/personal_information.html'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('private', response['Cache-Control'])
+
+        # Saving the user changes the version and the ETag
+        self.user.name = 'Jane Doe'
+        self.user.save(update_fields=['name'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Jane Doe')
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Other users get other ETags
+        self.client.force_login(UserFactory.create())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_anonymous_cache(self):
+        url = reverse('index')
+        with self.assertTemplateUsed('index.html'):
+            response = self.client.get(url)
+        self.assertIn('Accept-Language', response['Vary'])
+        with self.assertTemplateNotUsed('index.html'):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # Every language is cached separately
+        with self.settings(LANGUAGES=[('en', 'English'), ('uk', 'Ukrainian')]):
+            with self.assertTemplateUsed('index.html'):
+                self.client.get(url, HTTP_ACCEPT_LANGUAGE='uk')
+
+        # Authenticated users are never served from the cache
+        self.client.force_login(self.user)
+        with self.assertTemplateUsed('index.html'):
+            response = self.client.get(url)
+        self.assertContains(response, 'John Doe')
+
+    def test_private_anonymous_pages(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.contrib.messages import get_messages
+        from django.contrib.messages.storage.cookie import CookieStorage
+        from django.http import HttpResponse
+        from django.middleware.csrf import get_token
+        from django.test import RequestFactory
+        from ..http_cache import anonymous_cache_page
+
+        calls = []
+
+        @anonymous_cache_page()
+        def view(request):
+            calls.append(request)
+            if 'csrf' in request.GET:
+                return HttpResponse(get_token(request))
+            return HttpResponse(' '.join(str(x) for x in get_messages(request)))
+
+        def get(url):
+            request = RequestFactory().get(url)
+            request.user = AnonymousUser()
+            request._messages = CookieStorage(request)
+            return view(request)
+
+        # A CSRF token or messages belong to one visitor
+        for url in ('/?csrf', '/'):
+            get(url)
+            get(url)
+        self.assertEqual(len(calls), 4)
+
+    def test_robots(self):
+        self.assertEqual(self.client.get('/robots.txt').status_code, 200)
+        with self.assertTemplateNotUsed('robots.txt'):
+            response = self.client.get('/robots.txt')
+        self.assertEqual(response['Content-Type'], 'text/plain')
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import Group, Permission
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from djapps.accounts.factories import UserFactory
+from djapps.accounts.models import User
+from ..introspection import Inspection, TemplateDebugMiddleware, iter_attributes, safe_repr
+
+
+def render(source, **context):
+    return Template('{% load core_tags %}' + source).render(Context(context))
+
+
+@override_settings(DEBUG=True)
+class IntrospectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory.create(name='John Doe')
+        cls.user.groups.add(Group.objects.create(name='Editors'))
+
+    def test_no_queries(self):
+        user = User.objects.only('name').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            attrs = dict(iter_attributes(user))
+        self.assertEqual(attrs['name'], "'John Doe'")
+        self.assertEqual(attrs['pk'], str(user.pk))
+        self.assertEqual(attrs['email'], '<deferred field>')
+        self.assertEqual(attrs['groups'], '<related manager>')
+        self.assertEqual(attrs['days_on_site'], '<property>')
+        self.assertEqual(attrs['get_first_name'], '<method>')
+
+    def test_relations(self):
+        permission = Permission.objects.select_related('content_type').first()
+        with self.assertNumQueries(0):
+            self.assertNotIn('not loaded', Inspection(permission)['content_type'])
+        permission = Permission.objects.first()
+        with self.assertNumQueries(0):
+            self.assertEqual(Inspection(permission)['content_type'], '<relation, not loaded>')
+
+    def test_querysets(self):
+        users = User.objects.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(safe_repr(users), '<UserQuerySet of User, not evaluated>')
+            self.assertEqual(safe_repr({'users': users}), "{'users': <UserQuerySet of User, not evaluated>}")
+            self.assertIn('model', Inspection(users).keys())
+            render('{{ users|inspect }}{{ users|attrs_list|length }}', users=users)
+        list(users)
+        self.assertEqual(safe_repr(users), '<UserQuerySet of 1 User>')
+
+    def test_limits(self):
+        self.assertEqual(safe_repr({'a': {'b': {'c': 1}}}), "{'a': {'b': {...}}}")
+        self.assertLess(len(safe_repr('x' * 1000)), 250)
+        self.assertEqual(len(Inspection(self.user, limit=5)), 5)
+
+    def test_tags(self):
+        html = render('{{ user|inspect }}', user=self.user)
+        self.assertTrue(html.startswith('<details class="template-debug"><summary>&lt;User: John Doe&gt;'))
+        self.assertIn('<tr><th>name</th><td><code>&#x27;John Doe&#x27;</code></td></tr>', html)
+        self.assertEqual(render('{{ user|inspect|length }}', user=self.user), str(len(Inspection(self.user))))
+        self.assertIn('email', render('{{ user|attrs_list|join:"," }}', user=self.user))
+
+        html = render('{% with title="<b>Demo</b>" %}{% debug_context %}{% endwith %}', users=[1, 2])
+        self.assertIn('<th>title</th><td><code>&#x27;&lt;b&gt;Demo&lt;/b&gt;&#x27;</code>', html)
+        self.assertIn('<th>users</th><td><code>[1, 2]</code>', html)
+        self.assertNotIn('<th>True</th>', html)
+
+    @override_settings(DEBUG=False)
+    def test_disabled(self):
+        self.assertEqual(render('{{ user|inspect }}{{ user|attrs_list }}{% debug_context %}', user=self.user), '')
+
+    @override_settings(DEBUG=False)
+    def test_middleware(self):
+        from django.contrib.auth.models import AnonymousUser
+        middleware = TemplateDebugMiddleware(lambda request: render('{{ user|inspect }}', user=self.user))
+        admin = UserFactory.build(is_superuser=True)
+        request = RequestFactory().get('/?template_debug=1')
+        request.user = admin
+        self.assertIn('<details', middleware(request))
+        self.assertTrue(request.template_debug)
+        # Only superusers may enable it
+        request.user = AnonymousUser()
+        self.assertEqual(middleware(request), '')
+        request = RequestFactory().get('/')
+        request.user = admin
+        self.assertEqual(middleware(request), '')
+        # The flag does not leak to following requests
+        self.assertEqual(render('{{ user|inspect }}', user=self.user), '')
@@ -0,0 +1,53 @@
+import functools
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from ..loadtest.clients import InProcessClient
+from ..loadtest.runner import parse_mix, percentile, run_load
+from ..loadtest.seed import SEED_PASSWORD, delete_seeded_users, get_seeded_users, seed_users
+
+
+class LoadTestTests(TestCase):
+    def test_seed_users(self):
+        self.assertEqual(seed_users(5), 5)
+        self.assertEqual(seed_users(7), 2)
+        users = get_seeded_users(3)
+        self.assertEqual(len(users), 3)
+        self.assertTrue(users[0].check_password(SEED_PASSWORD))
+        self.assertEqual(delete_seeded_users(), 7)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('index=3, login'), {'index': 3, 'login': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('unknown=1')
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run_load(self):
+        seed_users(1)
+        report = run_load(
+            functools.partial(InProcessClient, 'testserver'),
+            get_seeded_users(1), SEED_PASSWORD,
+            parse_mix('index=1,personal_information=1'), clients=1, requests=20)
+        self.assertEqual(report['total']['requests'], 20)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertEqual(
+            sum(x['requests'] for x in report['routes'].values()), 20)
+        profile = report['routes']['personal_information']
+        self.assertEqual(profile['statuses'], {'200': profile['requests']})
+        self.assertGreater(profile['queries_per_request'], 0)
+
+    def test_command(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', requests=1)
+        out = StringIO()
+        call_command(
+            'loadtest', users=2, clients=1, requests=4, mix='index', host='testserver',
+            allow_without_debug=True, stdout=out)
+        self.assertIn('Deleted 2 seeded users.', out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(email__startswith='loadtest-').exists())
@@ -0,0 +1,113 @@
+import io
+import sys
+import json
+import logging
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from ..log import (
+    _handlers, JSONFormatter, QueueHandler, RequestIDFilter, RequestIDMiddleware, RingBufferHandler, SamplingFilter)
+
+
+class LogTests(TestCase):
+    def make_logger(self, **kwargs):
+        stream = io.StringIO()
+        handler = QueueHandler(stream=stream, **kwargs)
+        handler.addFilter(RequestIDFilter())
+        self.addCleanup(handler.close)
+        logger = logging.getLogger('djapps.tests.log')
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+        return logger, handler, stream
+
+    def read(self, handler, stream):
+        handler.flush()
+        return [json.loads(x) for x in stream.getvalue().splitlines()]
+
+    def test_json_formatter(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            record = logging.makeLogRecord({
+                'name': 'demo', 'levelno': logging.ERROR, 'levelname': 'ERROR',
+                'msg': 'Failed %s', 'args': ('job',), 'job_id': 7, 'exc_info': sys.exc_info()})
+        data = json.loads(JSONFormatter().format(record))
+        self.assertEqual(data['message'], 'Failed job')
+        self.assertEqual(data['level'], 'ERROR')
+        self.assertEqual(data['job_id'], 7)
+        self.assertIn('ZeroDivisionError', data['exception'])
+        self.assertTrue(data['time'].endswith('Z'))
+
+    def test_queue_handler(self):
+        logger, handler, stream = self.make_logger(output_level=logging.WARNING, buffer_size=10)
+        logger.info('Not written')
+        logger.warning('Written %d', 1, extra={'obj': object()})
+        records = self.read(handler, stream)
+        self.assertEqual([x['message'] for x in records], ['Written 1'])
+        self.assertTrue(records[0]['obj'].startswith('<object object'))
+        self.assertNotIn('request_id', records[0])
+
+        # The records of the request are written before its error
+        def view(request):
+            logger.info('Step %d', 1)
+            logger.error('Failed')
+            return HttpResponse()
+
+        RequestIDMiddleware(view)(RequestFactory().get('/', HTTP_X_REQUEST_ID='r1'))
+        records = self.read(handler, stream)[1:]
+        self.assertEqual([(x['message'], x.get('buffered')) for x in records], [('Step 1', True), ('Failed', None)])
+        self.assertEqual({x['request_id'] for x in records}, {'r1'})
+
+    def test_flush(self):
+        logger, handler, stream = self.make_logger()
+        thread = handler.listener._thread
+        for i in range(100):
+            logger.warning('Record %d', i)
+        self.assertEqual(len(self.read(handler, stream)), 100)
+        # The listener keeps running
+        self.assertIs(handler.listener._thread, thread)
+        self.assertIn(handler, _handlers)
+
+    def test_django_logger(self):
+        # Records of Django go through the queue of the root logger only
+        django_logger = logging.getLogger('django')
+        self.assertEqual(django_logger.handlers, [])
+        self.assertTrue(django_logger.propagate)
+
+    def test_ring_buffer_of_concurrent_requests(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setLevel(logging.WARNING)
+        handler = RingBufferHandler(target)
+        record = lambda msg, level, request_id: logging.makeLogRecord(
+            {'msg': msg, 'levelno': level, 'request_id': request_id})
+        handler.handle(record('r1 step', logging.INFO, 'r1'))
+        handler.handle(record('r2 step', logging.INFO, 'r2'))
+        handler.handle(record('r1 failed', logging.ERROR, 'r1'))
+        # The error of one request keeps the records of the other one
+        self.assertEqual(stream.getvalue().splitlines(), ['r1 step'])
+        handler.handle(record('r2 failed', logging.ERROR, 'r2'))
+        self.assertEqual(stream.getvalue().splitlines(), ['r1 step', 'r2 step'])
+        self.assertEqual(len(handler.buffer), 0)
+
+    def test_queue_full(self):
+        logger, handler, stream = self.make_logger(maxsize=1)
+        handler.stop()
+        for i in range(3):
+            logger.warning('Record %d', i)
+        self.assertEqual(handler.dropped, 2)
+
+    def test_sampling_filter(self):
+        sampling = SamplingFilter({'noisy': 0.0, 'noisy.kept': 1.0})
+        record = lambda name, level: logging.makeLogRecord({'name': name, 'levelno': level})
+        self.assertFalse(sampling.filter(record('noisy.child', logging.WARNING)))
+        self.assertTrue(sampling.filter(record('noisy.child', logging.ERROR)))
+        self.assertTrue(sampling.filter(record('noisy.kept.child', logging.INFO)))
+        self.assertTrue(sampling.filter(record('other', logging.INFO)))
+
+    def test_request_id_middleware(self):
+        response = self.client.get('/robots.txt', HTTP_X_REQUEST_ID='edge-42')
+        self.assertEqual(response['X-Request-ID'], 'edge-42')
+        response = self.client.get('/robots.txt', HTTP_X_REQUEST_ID='<script>')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
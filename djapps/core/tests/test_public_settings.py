@@ -0,0 +1,46 @@
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from ..context_processors import public_settings
+from ..public_settings import get_snapshot, is_secret
+
+
+def render(source, **context):
+    return Template('{% load core_tags %}' + source).render(Context(context))
+
+
+@override_settings(PUBLIC_SETTINGS=['SITE_URL', 'GOOGLE_TAG_MANAGER', 'SECRET_KEY', 'MISSING'])
+class PublicSettingsTests(TestCase):
+    @override_settings(SITE_URL='https://example.com')
+    def test_snapshot(self):
+        with self.assertLogs('djapps.core.public_settings', 'WARNING'):
+            snapshot = get_snapshot()
+        self.assertEqual(snapshot['SITE_URL'], 'https://example.com')
+        self.assertNotIn('SECRET_KEY', snapshot)
+        self.assertNotIn('MISSING', snapshot)
+        self.assertIs(get_snapshot(), snapshot)
+        with self.assertRaises(TypeError):
+            snapshot['SITE_URL'] = 'https://evil.com'
+
+    def test_reload(self):
+        with self.assertLogs('djapps.core.public_settings', 'WARNING'):
+            with self.settings(SITE_URL='https://one.com'):
+                self.assertEqual(get_snapshot()['SITE_URL'], 'https://one.com')
+            with self.settings(SITE_URL='https://two.com'):
+                self.assertEqual(get_snapshot()['SITE_URL'], 'https://two.com')
+
+    def test_is_secret(self):
+        for name in ('SECRET_KEY', 'EMAIL_HOST_PASSWORD', 'AWS_SECRET_ACCESS_KEY', 'DATABASES', 'SENTRY_DSN', 'API_KEY'):
+            self.assertTrue(is_secret(name), name)
+        for name in ('SITE_URL', 'GOOGLE_TAG_MANAGER', 'MONKEY_MODE', 'KEYBOARD_LAYOUT'):
+            self.assertFalse(is_secret(name), name)
+
+    @override_settings(SITE_URL='https://example.com', GOOGLE_TAG_MANAGER='GTM-1')
+    def test_tags(self):
+        with self.assertLogs('djapps.core.public_settings', 'WARNING'):
+            self.assertEqual(
+                render('{% load_option "SITE_URL" %} {% load_option "SECRET_KEY" "-" %}'),
+                'https://example.com -')
+        context = public_settings(RequestFactory().get('/'))
+        self.assertEqual(
+            Template('{{ settings.GOOGLE_TAG_MANAGER }}{{ settings.SECRET_KEY }}').render(Context(context)),
+            'GTM-1')
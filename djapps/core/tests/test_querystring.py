@@ -0,0 +1,59 @@
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import RequestFactory, SimpleTestCase
+from ..querystring import ParsedURL, parse_url, parsed_request_url
+
+
+class ParsedURLTests(SimpleTestCase):
+    def test_replace(self):
+        qs = ParsedURL('/users/?q=john&page=2#top')
+        self.assertEqual(qs.replace(page=3), '/users/?q=john&page=3#top')
+        self.assertEqual(qs.replace(page=None), '/users/?q=john#top')
+        self.assertEqual(qs.replace(sort='name'), '/users/?q=john&page=2&sort=name#top')
+        self.assertEqual(qs.replace(q=['a b', 'c']), '/users/?q=a+b&q=c&page=2#top')
+        self.assertEqual(qs.remove('q', 'page'), '/users/#top')
+
+    def test_get(self):
+        qs = ParsedURL('/users/?status=active&status=staff')
+        self.assertEqual(qs.get('status'), 'active,staff')
+        self.assertEqual(qs.getlist('status'), ['active', 'staff'])
+        self.assertEqual(qs.get('page'), '')
+        self.assertEqual(qs.get('page', '1'), '1')
+        self.assertNotIn('page', qs)
+
+    def test_toggle_sort(self):
+        self.assertEqual(ParsedURL('/users/').toggle_sort('name'), '/users/?sort=name')
+        self.assertEqual(ParsedURL('/users/?sort=name').toggle_sort('name'), '/users/?sort=-name')
+        self.assertEqual(ParsedURL('/users/?sort=-name').toggle_sort('name'), '/users/?sort=name')
+
+    def test_parse_cache(self):
+        self.assertIs(parse_url('/a/?b=1'), parse_url('/a/?b=1'))
+        request = RequestFactory().get('/users/?page=2')
+        self.assertIs(parsed_request_url(request), parsed_request_url(request))
+
+
+class QueryTagsTests(SimpleTestCase):
+    def render(self, source, **context):
+        request = RequestFactory().get('/users/?sort=name&page=2')
+        return Template('{% load core_tags %}' + source).render(Context(dict(context, request=request)))
+
+    def test_legacy_tags(self):
+        self.assertEqual(
+            self.render('{% set_query_parameter "/a/?x=1" "y" 2 %}'), '/a/?x=1&amp;y=2')
+        self.assertEqual(self.render('{% set_query_parameter "/a/?x=1" "x" "" %}'), '/a/')
+        self.assertEqual(self.render('{{ "/a/?x=1&x=2"|get_query_parameter:"x" }}'), '1,2')
+        self.assertEqual(self.render('{{ "/a/"|get_query_parameter:"x" }}'), '')
+
+    def test_querystring_block(self):
+        self.assertEqual(
+            self.render(
+                '{% querystring as qs %}{% for p in pages %}'
+                '{% query_url qs page=p %} {% endfor %}{{ qs.page }} {% sort_url qs "name" %}'
+                '{% endquerystring %}',
+                pages=[1, 2]),
+            '/users/?sort=name&amp;page=1 /users/?sort=name&amp;page=2 2 /users/?sort=-name&amp;page=2')
+        self.assertEqual(
+            self.render('{% querystring "/a/?x=1" as qs %}{% query_url qs x=2 %}{% endquerystring %}'),
+            '/a/?x=2')
+        self.assertEqual(self.render('{% query_url page=None %}'), '/users/?sort=name')
+        with self.assertRaises(TemplateSyntaxError):
+            self.render('{% querystring %}{% endquerystring %}')
@@ -0,0 +1,63 @@
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from django.conf.urls.i18n import i18n_patterns
+from django.urls import NoReverseMatch, clear_script_prefix, path, reverse, set_script_prefix
+from django.utils import translation
+from ..routes import build_routes, fast_reverse, get_routes
+
+urlpatterns = [
+    path('entrar/', lambda request: HttpResponse(), name='login'),
+]
+
+
+class LocalizedURLs:
+    urlpatterns = i18n_patterns(path('login/', lambda request: HttpResponse(), name='login'))
+
+
+class RouteTests(SimpleTestCase):
+    def test_fast_reverse(self):
+        routes = build_routes()
+        self.assertIn('admin:index', routes)
+        self.assertNotIn('avatar', routes)
+        for name in routes:
+            self.assertEqual(fast_reverse(name), reverse(name))
+        self.assertEqual(fast_reverse('avatar', args=['0' * 32]), reverse('avatar', args=['0' * 32]))
+        with self.assertRaises(NoReverseMatch):
+            fast_reverse('avatar')
+        with self.assertRaises(NoReverseMatch):
+            fast_reverse('missing')
+
+    def test_script_prefix(self):
+        set_script_prefix('/app/')
+        self.addCleanup(clear_script_prefix)
+        self.assertEqual(fast_reverse('login'), '/app/login/')
+        clear_script_prefix()
+        self.assertEqual(fast_reverse('login'), '/login/')
+
+    def test_urlconf_changes(self):
+        routes = get_routes()
+        self.assertEqual(fast_reverse('login'), '/login/')
+        with override_settings(ROOT_URLCONF=__name__):
+            self.assertEqual(fast_reverse('login'), '/entrar/')
+            self.assertEqual(list(get_routes()), ['login'])
+        self.assertEqual(fast_reverse('login', urlconf=__name__), '/entrar/')
+        self.assertIsNot(get_routes(), routes)
+        self.assertEqual(get_routes(), routes)
+
+    def test_localized(self):
+        self.assertFalse(get_routes().localized)
+        for language in ('en', 'de', 'en'):
+            with translation.override(language):
+                self.assertEqual(fast_reverse('login', urlconf=LocalizedURLs), '/%s/login/' % language)
+                template = Template("{% load core_tags %}{% route 'login' %}")
+                with self.settings(ROOT_URLCONF=LocalizedURLs):
+                    self.assertEqual(template.render(Context()), '/%s/login/' % language)
+        template = Template(
+            "{% load i18n core_tags %}{% route 'login' %} {% language 'de' %}{% route 'login' %}{% endlanguage %}")
+        with translation.override('en'), self.settings(ROOT_URLCONF=LocalizedURLs):
+            self.assertEqual(template.render(Context()), '/en/login/ /de/login/')
+
+    def test_route_tag(self):
+        template = Template("{% load core_tags %}{% route 'personal_information' %} {% route 'logout' as url %}{{ url }}")
+        self.assertEqual(template.render(Context()), '/profile/personal-information/ /logout/')
@@ -0,0 +1,65 @@
+import uuid
+import datetime
+from decimal import Decimal
+from django.core import signing
+from django.core.signing import BadSignature
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from .. import serialization
+
+
+class SerializationTests(SimpleTestCase):
+    def test_roundtrip(self):
+        value = {
+            'id': 1,
+            'uuid': uuid.UUID(int=1),
+            'balance': Decimal('10.50'),
+            'date_joined': datetime.datetime(2020, 3, 5, 14, 2, tzinfo=datetime.timezone.utc),
+            'birthday': datetime.date(1990, 1, 1),
+            'duration': datetime.timedelta(days=1, seconds=5),
+            'tags': {'a', 'b'},
+            'raw': b'\x00\x01',
+            'nested': [{'x': None}],
+        }
+        for compress in (True, False):
+            self.assertEqual(serialization.loads(serialization.dumps(value, compress=compress)), value)
+
+    def test_reserved_key(self):
+        value = {'a': [{'__t': 'd', 'v': 'x'}], 'b': {'__t': 'dict', 'v': [1]}, 'c': ({'__t': 1},)}
+        self.assertEqual(
+            serialization.loads(serialization.dumps(value)),
+            {'a': [{'__t': 'd', 'v': 'x'}], 'b': {'__t': 'dict', 'v': [1]}, 'c': [{'__t': 1}]})
+        plain = {'a': [1, {'b': 2}]}
+        self.assertIs(serialization._escape(plain), plain)
+
+    def test_tampered(self):
+        token = serialization.dumps({'is_staff': False})
+        with self.assertRaises(BadSignature):
+            serialization.loads(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+        with self.assertRaises(BadSignature):
+            serialization.loads(token, salt='other')
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            serialization.dumps(object())
+
+    def test_register_type(self):
+        class Point:
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        serialization.register_type(Point, 'test-point', lambda p: [p.x, p.y], lambda v: Point(*v))
+        p = serialization.loads(serialization.dumps(Point(1, 2)))
+        self.assertEqual((p.x, p.y), (1, 2))
+
+    def test_filters(self):
+        template = Template('{% load core_tags %}{{ value|signobj }}')
+        token = template.render(Context({'value': {'id': 1}}))
+        self.assertEqual(serialization.loads(token), {'id': 1})
+
+        template = Template('{% load core_tags %}{% with value|decodeobj as obj %}{{ obj.id }}{% endwith %}')
+        self.assertEqual(template.render(Context({'value': token})), '1')
+        self.assertEqual(template.render(Context({'value': 'invalid'})), '')
+        # A signed value which the codec can not decode
+        token = signing.dumps({'__t': 'd', 'v': 'not a date'}, salt=serialization.DEFAULT_SALT)
+        self.assertEqual(template.render(Context({'value': token})), '')
@@ -0,0 +1,44 @@
+from unittest.mock import patch
+from django.db import DatabaseError
+from django.test import TestCase
+from ..server import MemoryRecycler, get_rss, warm_templates, warm_urls
+
+CACHED_LOADERS = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+class ServerTests(TestCase):
+    def test_warmup(self):
+        self.assertEqual(warm_templates(), 0)
+        with self.settings(TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [], 'OPTIONS': {'loaders': CACHED_LOADERS}}]):
+            from django.template import engines
+            count = warm_templates()
+            self.assertGreater(count, 10)
+            loader = engines['django'].engine.template_loaders[0]
+            self.assertIn('accounts/login.html', loader.get_template_cache)
+        self.assertGreater(warm_urls(), 10)
+
+    def test_memory_recycler(self):
+        self.assertGreater(get_rss(), 1024 * 1024)
+        recycler = MemoryRecycler(1, jitter=0, interval=3)
+        self.assertEqual([recycler.should_exit() for _ in range(6)], [False, False, True] * 2)
+        recycler = MemoryRecycler(10 * 2 ** 40, jitter=0.5, interval=1)
+        self.assertGreaterEqual(recycler.limit, 10 * 2 ** 40)
+        self.assertFalse(recycler.should_exit())
+        self.assertFalse(MemoryRecycler(0, interval=1).should_exit())
+
+    def test_readiness(self):
+        response = self.client.get('/readiness/')
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertIn('no-cache', response['Cache-Control'])
+        with patch('django.db.backends.utils.CursorWrapper.execute', side_effect=DatabaseError('down')):
+            with self.assertLogs('djapps.core.views', 'ERROR'):
+                response = self.client.get('/readiness/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'status': 'unavailable'})
@@ -0,0 +1,55 @@
+from io import StringIO
+import sentry_sdk
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from ..importtime import group_by_package, parse_importtime
+from ..telemetry import get_integrations
+from ..testing import FakeTransport
+
+OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils.version
+import time:       300 |        420 |   django.utils
+import time:        80 |        500 | django
+import time:        50 |         50 | celery
+'''
+
+
+class StartupTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        records = parse_importtime(OUTPUT.splitlines())
+        self.assertEqual([(x.name, x.depth) for x in records], [
+            ('django.utils.version', 2), ('django.utils', 1), ('django', 0), ('celery', 0)])
+        self.assertEqual(records[1].cumulative, 420)
+        self.assertEqual(group_by_package(records), [('django', 500, 3), ('celery', 50, 1)])
+
+    def test_import_profile(self):
+        stdout = StringIO()
+        call_command('import_profile', command='clear_cache', limit=20, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertRegex(lines[0], r'^\d+ modules imported in [\d.]+ ms$')
+        self.assertEqual(lines[1].split(), ['module', 'cumul.', 'ms', 'self', 'ms'])
+        self.assertEqual(len(lines), 22)
+        for line in lines[2:]:
+            self.assertRegex(line, r'^ *[\w.]+ +[\d.]+ +[\d.]+$')
+        # The order of the modules depends on timing
+        self.assertIn('django', stdout.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_profile', command='missing')
+
+    def test_sentry_integrations(self):
+        self.assertEqual(
+            [type(x).__name__ for x in get_integrations(['django', 'celery'])],
+            ['DjangoIntegration', 'CeleryIntegration'])
+        with self.assertRaises(ImproperlyConfigured):
+            get_integrations(['flask'])
+
+        transport = FakeTransport()
+        with self.settings(SENTRY_DSN='https://key@sentry.invalid/1',
+                           SENTRY_OPTIONS={'transport': transport, 'integrations': []}):
+            apps.get_app_config('core').ready()
+        self.addCleanup(sentry_sdk.Hub.current.bind_client, None)
+        sentry_sdk.capture_message('Started')
+        self.assertEqual(transport.events[0]['message'], 'Started')
@@ -0,0 +1,152 @@
+import os
+import gzip
+import base64
+import shutil
+import hashlib
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from ..staticfiles import (
+    compression_report, etag_matches, load_hashed_names, parse_accept_encoding)
+
+CSS = 'body { background: url("logo.svg"); }\n' + ''.join(
+    '.col-%d { padding: %dpx; }\n' % (i, i) for i in range(100))
+SVG = '<svg xmlns="http://www.w3.org/2000/svg"></svg>'
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        with open(os.path.join(cls.source, 'app.css'), 'w') as f:
+            f.write(CSS)
+        with open(os.path.join(cls.source, 'logo.svg'), 'w') as f:
+            f.write(SVG)
+        with override_settings(
+                STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root,
+                STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+                STATICFILES_STORAGE='djapps.core.staticfiles.CompressedManifestStaticFilesStorage',
+                STATIC_COMPRESS_PROCESSES=2):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_css = next(x for x in load_hashed_names(cls.root) if x.endswith('.css'))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def test_collectstatic(self):
+        for name in ('app.css', self.hashed_css):
+            with gzip.open(os.path.join(self.root, name + '.gz'), 'rt') as f:
+                self.assertEqual(f.read(), open(os.path.join(self.root, name)).read())
+        # Files smaller than STATIC_COMPRESS_MIN_SIZE are not compressed
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'logo.svg.gz')))
+        with open(os.path.join(self.root, self.hashed_css)) as f:
+            self.assertRegex(f.read(), r'url\("logo\.[0-9a-f]{12}\.svg"\)')
+
+    def test_report(self):
+        report = compression_report(self.root)
+        # The original and the hashed files, and staticfiles.json
+        self.assertEqual(report['files'], 5)
+        self.assertEqual(report['compressed'], 2)
+        self.assertLess(report['gzip'], report['size'] - len(CSS))
+
+        out = StringIO()
+        call_command('static_report', root=self.root, stdout=out)
+        self.assertIn('Files: 5, compressed: 2', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('static_report', root=os.path.join(self.root, 'missing'))
+
+    def test_middleware(self):
+        with self.settings(STATIC_ROOT=self.root, STATIC_MAX_AGE=60):
+            response = self.client.get('/static/' + self.hashed_css, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(response['Cache-Control'], 'max-age=31536000, public, immutable')
+            self.assertNotIn('Set-Cookie', response)
+            with open(os.path.join(self.root, self.hashed_css), 'rb') as f:
+                self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), f.read())
+
+            response = self.client.get(
+                '/static/' + self.hashed_css, HTTP_IF_NONE_MATCH=response['ETag'],
+                HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 304)
+
+            etag = response['ETag']
+            for header in ('"%s"' % etag, etag[:-2] + '"'):
+                response = self.client.get(
+                    '/static/' + self.hashed_css, HTTP_IF_NONE_MATCH=header, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response.status_code, 200)
+
+            for header in ('gzip;q=0, deflate', 'gzip; q=0.000', '*;q=0', 'deflate'):
+                response = self.client.get('/static/' + self.hashed_css, HTTP_ACCEPT_ENCODING=header)
+                self.assertNotIn('Content-Encoding', response)
+            response = self.client.get('/static/' + self.hashed_css, HTTP_ACCEPT_ENCODING='*;q=0.5')
+            self.assertIn(response['Content-Encoding'], ('br', 'gzip'))
+
+            response = self.client.get('/static/app.css')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(response['Cache-Control'], 'max-age=60, public')
+            self.assertEqual(b''.join(response.streaming_content).decode(), CSS)
+
+            self.assertEqual(self.client.get('/static/missing.css').status_code, 404)
+            self.assertEqual(self.client.get('/static/../settings.py').status_code, 404)
+
+
+class HeadersTests(SimpleTestCase):
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('br;q=0, GZIP ;q=0.8,deflate, x;q=bad'),
+            {'br': 0.0, 'gzip': 0.8, 'deflate': 1.0, 'x': 0.0})
+        self.assertEqual(parse_accept_encoding(''), {})
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a-1"', '"b", "a-1"'))
+        self.assertTrue(etag_matches('"a-1"', 'W/"a-1"'))
+        self.assertTrue(etag_matches('"a-1"', '*'))
+        self.assertFalse(etag_matches('"a-1"', '"a-10"'))
+        self.assertFalse(etag_matches('"a-1"', 'a-1'))
+        self.assertFalse(etag_matches('"a-1"', ''))
+
+
+class VendorAssetsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source = os.path.join(self.directory, 'lib.js')
+        with open(self.source, 'wb') as f:
+            f.write(b'var lib = {};')
+        self.integrity = 'sha384-' + base64.b64encode(
+            hashlib.sha384(b'var lib = {};').digest()).decode('ascii')
+
+    def render(self):
+        return Template('{% load core_tags %}{% vendor_asset "lib.js" %}').render(Context())
+
+    def test_vendor_asset(self):
+        assets = {'lib.js': {'url': 'https://cdn.example.com/lib.js', 'integrity': self.integrity}}
+        with self.settings(VENDOR_ASSETS=assets):
+            self.assertEqual(self.render(), (
+                '<script src="https://cdn.example.com/lib.js" integrity="%s" '
+                'crossorigin="anonymous"></script>' % self.integrity))
+            with self.settings(VENDOR_ASSETS_LOCAL=True):
+                self.assertEqual(self.render(), (
+                    '<script src="/static/vendor/lib.js" integrity="%s"></script>' % self.integrity))
+
+    def test_bundle(self):
+        target = os.path.join(self.directory, 'vendor')
+        assets = {'lib.js': {'url': 'file://' + self.source, 'integrity': self.integrity}}
+        with self.settings(VENDOR_ASSETS=assets, VENDOR_ASSETS_DIR=target):
+            call_command('bundle_vendor_assets', stdout=StringIO())
+            with open(os.path.join(target, 'lib.js'), 'rb') as f:
+                self.assertEqual(f.read(), b'var lib = {};')
+
+            assets['lib.js']['integrity'] = 'sha384-invalid'
+            with self.assertRaisesMessage(CommandError, 'does not match its integrity'):
+                call_command('bundle_vendor_assets', force=True, stdout=StringIO())
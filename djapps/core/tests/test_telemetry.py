@@ -0,0 +1,58 @@
+import sentry_sdk
+from django.test import SimpleTestCase
+from ..testing import FakeTransport
+from ..telemetry import EventLimiter, TracesSampler, get_sentry_options, parse_rates
+
+
+def fail():
+    raise ValueError('Repeated error')
+
+
+class TelemetryTests(SimpleTestCase):
+    def init_sentry(self, **options):
+        transport = FakeTransport()
+        sentry_sdk.init(
+            'https://key@sentry.invalid/1', transport=transport, default_integrations=False,
+            **get_sentry_options(**options))
+        self.addCleanup(sentry_sdk.Hub.current.bind_client, None)
+        return transport
+
+    def test_parse_rates(self):
+        self.assertEqual(parse_rates('login=1, index=0.01,'), {'login': 1.0, 'index': 0.01})
+        self.assertEqual(parse_rates(''), {})
+
+    def test_traces_sampler(self):
+        sampler = TracesSampler(0.05, {'login': 1.0, 'index': 0.0, 'djapps.search.tasks.update_index_task': 0.5})
+        request = lambda path: {'parent_sampled': None, 'wsgi_environ': {'PATH_INFO': path}}
+        self.assertEqual(sampler(request('/login/')), 1.0)
+        self.assertEqual(sampler(request('/')), 0.0)
+        self.assertEqual(sampler(request('/missing/')), 0.05)
+        self.assertEqual(sampler(dict(request('/'), parent_sampled=True)), True)
+        self.assertEqual(sampler({
+            'parent_sampled': None, 'celery_job': {'task': 'djapps.search.tasks.update_index_task'}}), 0.5)
+
+    def test_event_limiter(self):
+        now = [0]
+        limiter = EventLimiter(limit=2, window=60, clock=lambda: now[0])
+        event = lambda: {'logger': 'demo', 'logentry': {'message': 'Failed %s'}}
+        self.assertEqual([limiter(event(), {}) is not None for _ in range(4)], [True, True, False, False])
+        self.assertIsNotNone(limiter({'logger': 'demo', 'logentry': {'message': 'Other'}}, {}))
+        now[0] = 60
+        self.assertEqual(limiter(event(), {})['extra'], {'suppressed_repeats': 2})
+        self.assertNotIn('extra', limiter(event(), {}))
+
+    def test_fake_transport(self):
+        transport = self.init_sentry(events_per_minute=3, traces_sample_rate=0.0, route_sample_rates={'login': 1})
+        for _ in range(10):
+            try:
+                fail()
+            except ValueError:
+                sentry_sdk.capture_exception()
+        self.assertEqual(len(transport.events), 3)
+        self.assertEqual(transport.events[0]['exception']['values'][0]['value'], 'Repeated error')
+
+        for path in ('/login/', '/'):
+            with sentry_sdk.start_transaction(
+                    name=path, custom_sampling_context={'wsgi_environ': {'PATH_INFO': path}}):
+                pass
+        self.assertEqual([x['transaction'] for x in transport.transactions], ['/login/'])
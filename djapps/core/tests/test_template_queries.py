@@ -0,0 +1,143 @@
+from django.contrib.auth.models import Group, Permission
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import RequestFactory, TestCase, override_settings
+from djapps.accounts.factories import UserFactory
+from djapps.accounts.models import User
+from ..template_queries import evaluate, query_hints
+
+
+class QueryHintsTests(TestCase):
+    def test_fields(self):
+        self.assertEqual(
+            query_hints(User, {('email',), ('name',), ('pk',)}),
+            (set(), set(), {'email', 'name'}))
+
+    def test_foreign_key(self):
+        self.assertEqual(
+            query_hints(Permission, {('codename',), ('content_type', 'app_label')}),
+            ({'content_type'}, set(), {'codename', 'content_type', 'content_type__app_label'}))
+        self.assertEqual(
+            query_hints(Permission, {('content_type_id',)}),
+            (set(), set(), {'content_type'}))
+
+    def test_many_to_many(self):
+        self.assertEqual(
+            query_hints(User, {('email',), ('groups', 'all')}),
+            (set(), {'groups'}, {'email'}))
+
+    def test_incomplete(self):
+        # Properties, methods and objects themselves need all fields
+        self.assertEqual(query_hints(User, {('email',), ('days_on_site',)}), (set(), set(), None))
+        self.assertEqual(query_hints(User, {()}), (set(), set(), None))
+        self.assertEqual(
+            query_hints(Permission, {('content_type',)}),
+            ({'content_type'}, set(), None))
+
+
+class TemplateQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([
+            UserFactory.build(email='user%d@mail.com' % i, name='User %d' % i)
+            for i in range(5)])
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def render(self, source, **context):
+        return Template('{% load core_tags %}' + source).render(
+            Context(dict(context, request=self.request)))
+
+    def test_memoized_per_request(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(len(evaluate(User.objects.all(), Context({'request': self.request}))), 5)
+            self.assertEqual(len(evaluate(User.objects.all(), Context({'request': self.request}))), 5)
+        with self.assertNumQueries(1):
+            evaluate(User.objects.all(), Context({'request': RequestFactory().get('/')}))
+
+    @override_settings(TEMPLATE_QUERYSET_LIMIT=3)
+    def test_limit(self):
+        with self.assertLogs('djapps.core.template_queries', 'WARNING') as logs:
+            self.assertEqual(len(evaluate(User.objects.all())), 3)
+            self.assertEqual(len(evaluate(User.objects.all(), limit=2)), 2)
+            self.assertEqual(len(evaluate(User.objects.all()[:4])), 3)
+            self.assertEqual(len(evaluate(User.objects.order_by('pk')[1:100000])), 3)
+        self.assertEqual(len(evaluate(User.objects.all()[:2])), 2)
+        self.assertEqual(len(logs.records), 4)
+
+    @override_settings(TEMPLATE_QUERYSET_LIMIT=3)
+    def test_queryset_filters(self):
+        with self.assertNumQueries(1), self.assertLogs('djapps.core.template_queries', 'WARNING'):
+            result = self.render(
+                '{% for user in users|order_by:"email"|distinct %}{{ user.email }},{% endfor %}',
+                users=User.objects.all())
+        self.assertEqual(result, 'user0@mail.com,user1@mail.com,user2@mail.com,')
+        users = self.render(
+            '{% prepare_query_object email__startswith="user" as q %}'
+            '{% with users|filter_queryset:q|prefetch_related:"groups" as rows %}'
+            '{{ rows.count }} {{ rows|length }} {{ rows|class_name }}{% endwith %}',
+            users=User.objects.all())
+        self.assertEqual(users, '5 3 GuardedUserQuerySet')
+
+    def test_for_queryset(self):
+        users = User.objects.order_by('email')
+        with self.assertNumQueries(1), self.assertLogs('djapps.core.template_queries'):
+            result = self.render(
+                '{% for_queryset user in users limit 2 %}{{ user.email }},{% endfor_queryset %}'
+                '{% for_queryset user in users limit 2 %}{{ user.email }},{% endfor_queryset %}',
+                users=users)
+        self.assertEqual(result, 'user0@mail.com,user1@mail.com,' * 2)
+        self.assertEqual(
+            self.render(
+                '{% for_queryset user in users %}{{ user }}{% empty %}empty{% endfor_queryset %}',
+                users=User.objects.none()),
+            'empty')
+        with self.assertRaises(TemplateSyntaxError):
+            self.render('{% for_queryset user users %}{% endfor_queryset %}')
+
+    def test_attribute_paths(self):
+        from django.template import engines
+        from ..template_queries import attribute_paths
+
+        def paths(source):
+            nodelist = engines['django'].from_string(source).template.nodelist
+            return attribute_paths(nodelist, 'user')
+
+        self.assertEqual(
+            paths('{{ user.email }}{% if user.is_staff and not user.name %}{% else %}{% endif %}'
+                  '{{ x|default:user.last_login }}'),
+            {('email',), ('is_staff',), ('name',), ('last_login',)})
+        # Any other tag could read any attribute of the object
+        self.assertIn((), paths('{{ user.email }}{% include "x.html" %}'))
+
+    def test_for_queryset_if(self):
+        with self.assertNumQueries(1):
+            result = self.render(
+                '{% for_queryset user in users %}{{ user.email }}{% if user.is_staff %}S{% endif %},'
+                '{% endfor_queryset %}',
+                users=User.objects.order_by('email'))
+        self.assertEqual(result.count(','), 5)
+        with self.assertNumQueries(1):
+            self.render(
+                '{% for_queryset user in users %}{{ user.email }}{% firstof user.is_staff %}'
+                '{% endfor_queryset %}',
+                users=User.objects.all())
+
+    def test_for_queryset_prefetch(self):
+        group = Group.objects.create(name='Editors')
+        for u in User.objects.all():
+            u.groups.add(group)
+        with self.assertNumQueries(2):
+            result = self.render(
+                '{% for_queryset user in users %}{% for g in user.groups.all %}{{ g.name }}{% endfor %}'
+                '{% endfor_queryset %}',
+                users=User.objects.all())
+        self.assertEqual(result, 'Editors' * 5)
+
+    def test_guarded_queryset(self):
+        with self.assertNumQueries(1), self.assertLogs('djapps.core.template_queries'):
+            result = self.render(
+                '{% guarded_queryset users limit=2 as rows %}{{ rows|length }}'
+                '{% guarded_queryset users limit=2 as rows %}{{ rows|length }}',
+                users=User.objects.all())
+        self.assertEqual(result, '22')
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from djapps.accounts.factories import UserFactory
+from ..thumbnails import draft_size, pil_draft_image, placeholder_url
+
+
+def make_image(size=(800, 600), fmt='JPEG', color='#3366cc'):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class ThumbnailsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def render(self, user):
+        return Template(
+            "{% load core_tags %}{% thumbnail_url_or_placeholder user.avatar 'avatar' %}"
+        ).render(Context({'user': user}))
+
+    def test_draft_size(self):
+        self.assertEqual(draft_size((200, 100)), (400, 400))
+        self.assertEqual(draft_size((0, 150)), (300, 300))
+        self.assertIsNone(draft_size(None))
+
+    def test_pil_draft_image(self):
+        jpeg = pil_draft_image(BytesIO(make_image((4000, 3000))), size=(200, 200))
+        # Decoded at 1/4 scale, still at least twice the thumbnail size
+        self.assertEqual(jpeg.size, (1000, 750))
+        png = pil_draft_image(BytesIO(make_image((4000, 3000), 'PNG')), size=(200, 200))
+        self.assertEqual(png.size, (572, 429))
+        small = pil_draft_image(BytesIO(make_image((300, 300))), size=(200, 200))
+        self.assertEqual(small.size, (300, 300))
+
+    def test_pil_draft_image_truncated(self):
+        from PIL import ImageFile
+        data = make_image((4000, 3000))
+        with patch.object(ImageFile, 'LOAD_TRUNCATED_IMAGES', False):
+            image = pil_draft_image(BytesIO(data[:len(data) // 2]), size=(200, 200))
+            self.assertEqual(image.size, (1000, 750))
+            png = make_image(fmt='PNG')
+            with self.assertRaises(OSError):
+                pil_draft_image(BytesIO(png[:len(png) // 2]), size=(200, 200))
+
+    def test_stored_file_digest(self):
+        from django.core.files.storage import FileSystemStorage
+        from ..thumbnails import _stored_file_digest, file_digest
+        storage = FileSystemStorage(self.media_root)
+        storage.save('photo.jpg', ContentFile(b'first'))
+        self.assertEqual(_stored_file_digest(storage, 'photo.jpg'), file_digest(BytesIO(b'first')))
+        with open(storage.path('photo.jpg'), 'wb') as f:
+            f.write(b'second content')
+        self.assertEqual(_stored_file_digest(storage, 'photo.jpg'), file_digest(BytesIO(b'second content')))
+
+    def test_content_addressed_storage(self):
+        first = UserFactory.create()
+        second = UserFactory.create()
+        with patch('djapps.core.tasks.generate_thumbnails_task.delay'):
+            first.avatar.save('Photo.JPG', ContentFile(make_image()))
+            second.avatar.save('copy.jpg', ContentFile(make_image()))
+        self.assertRegex(first.avatar.name, r'^avatars/[0-9a-f]{2}/[0-9a-f]{40}\.jpg$')
+        # The same content is stored once
+        self.assertEqual(first.avatar.name, second.avatar.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.avatar.path))), 1)
+
+    def test_upload_queues_thumbnails(self):
+        from ..tasks import generate_thumbnails_task
+        user = UserFactory.create()
+        with patch('djapps.core.tasks.generate_thumbnails_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                user.avatar = ContentFile(make_image(), name='photo.jpg')
+                user.save()
+        delay.assert_called_once_with('accounts.User', 'avatar', user.avatar.name)
+        # Templates render a placeholder until the task is done
+        self.assertEqual(self.render(user), placeholder_url(200, 200, '#cccccc'))
+
+        self.assertEqual(generate_thumbnails_task(*delay.call_args[0]), 1)
+        self.assertEqual(generate_thumbnails_task(*delay.call_args[0]), 0)
+        url = self.render(user)
+        digest = os.path.splitext(os.path.basename(user.avatar.name))[0]
+        self.assertRegex(url, r'^/media/thumbs/avatars/%s/%s_200x200_[\w-]{8}\.jpg$' % (digest[:2], digest))
+
+    def test_placeholder(self):
+        self.assertTrue(self.render(UserFactory.build()).startswith('data:image/svg+xml,'))
+        with self.assertRaises(ValueError):
+            Template(
+                "{% load core_tags %}{% thumbnail_url_or_placeholder user.avatar 'unknown' %}"
+            ).render(Context({'user': UserFactory.build()}))
+
+    def test_command(self):
+        from io import StringIO
+        users = [UserFactory.create() for _ in range(3)]
+        with patch('djapps.core.tasks.generate_thumbnails_task.delay'):
+            for i, user in enumerate(users):
+                user.avatar.save('photo.png', ContentFile(make_image(fmt='PNG', color='#00000%d' % i)))
+        out = StringIO()
+        call_command('generate_thumbnails', 'accounts.User.avatar', processes=1, stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Processed 3 images, created 3 thumbnails, 0 errors.')
+        for user in users:
+            self.assertIn('/thumbs/', self.render(user))
@@ -0,0 +1,83 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+import sys
+from collections import OrderedDict
+from ..utils import flatten, is_roman_chars, iter_flatten, surround_non_roman, unflatten
+
+
+class RomanCharsTests(SimpleTestCase):
+    def test_is_roman_chars(self):
+        self.assertTrue(is_roman_chars(''))
+        self.assertTrue(is_roman_chars('Hello, World! 123'))
+        self.assertTrue(is_roman_chars('Crème brûlée — Łódź\n'))
+        self.assertFalse(is_roman_chars('Привет'))
+        self.assertFalse(is_roman_chars('Hello, мир'))
+        self.assertFalse(is_roman_chars('日本'))
+
+    def test_surround_groups_runs(self):
+        self.assertEqual(surround_non_roman('Hello'), 'Hello')
+        self.assertEqual(
+            surround_non_roman('Hi, Привет мир!', 'cy'),
+            'Hi, <span class="cy">Привет мир</span>!')
+        self.assertEqual(
+            surround_non_roman('Ы a Ы'),
+            '<span class="cyrillic-char">Ы</span> a <span class="cyrillic-char">Ы</span>')
+
+    def test_surround_long_text(self):
+        text = 'abc Где ' * 1000
+        result = surround_non_roman(text)
+        self.assertEqual(result.count('<span'), 1000)
+        self.assertEqual(result, surround_non_roman(text))
+
+    def test_filter(self):
+        template = Template('{% load core_tags %}{{ value|surround_cyrillic }}')
+        self.assertEqual(
+            template.render(Context({'value': 'Demo Демо'})),
+            'Demo <span class="cyrillic-char">Демо</span>')
+
+
+class FlattenTests(SimpleTestCase):
+    data = {'db': {'host': 'localhost', 'ports': [5432, {'replica': 5433}]}, 'debug': False, 'tags': ()}
+
+    def test_iter_flatten(self):
+        self.assertEqual(list(iter_flatten(self.data)), [
+            ('db.host', 'localhost'), ('db.ports.0', 5432), ('db.ports.1.replica', 5433),
+            ('debug', False), ('tags', ())])
+        self.assertEqual(
+            dict(iter_flatten(self.data, 'app', '/', max_depth=2)),
+            {'app/db/host': 'localhost', 'app/db/ports': [5432, {'replica': 5433}], 'app/debug': False, 'app/tags': ()})
+        self.assertEqual(list(iter_flatten(OrderedDict(a={1: 'b'}))), [('a.1', 'b')])
+        self.assertEqual(list(iter_flatten({})), [])
+
+    def test_leaves_without_truth_value(self):
+        class Leaf:
+            def __bool__(self):
+                raise ValueError('The truth value is ambiguous')
+
+        leaf = Leaf()
+        self.assertEqual(list(iter_flatten({'a': [leaf], 'b': leaf})), [('a.0', leaf), ('b', leaf)])
+
+    def test_flatten(self):
+        self.assertEqual(flatten(self.data), {
+            'db.host': 'localhost', 'db.ports': [5432, {'replica': 5433}], 'debug': False, 'tags': ()})
+        self.assertEqual(flatten(self.data, max_depth=1), self.data)
+
+    def test_unflatten(self):
+        self.assertEqual(unflatten(iter_flatten(self.data)), self.data)
+        self.assertEqual(unflatten({'0': 'a', '1.x': 'b'}), ['a', {'x': 'b'}])
+        self.assertEqual(unflatten({'0': 'a', '2': 'b'}, sequences=False), {'0': 'a', '2': 'b'})
+        self.assertEqual(unflatten(flatten(self.data, sep='/'), sep='/'), self.data)
+        for items in ({'a': 1, 'a.b': 2}, {'a.b': 2, 'a': 1}, {'a': None, 'a.b': 2}):
+            with self.subTest(items=items), self.assertRaises(ValueError):
+                unflatten(items)
+
+    def test_deep(self):
+        depth = sys.getrecursionlimit() * 2
+        data = value = {}
+        for _ in range(depth):
+            value['x'] = value = {}
+        value['x'] = 1
+        [(key, leaf)] = iter_flatten(data)
+        self.assertEqual((key.count('.'), leaf), (depth, 1))
+        # Comparing the dicts would recurse, compare them flattened
+        self.assertEqual(list(iter_flatten(unflatten({key: leaf}))), [(key, leaf)])
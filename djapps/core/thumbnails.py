@@ -0,0 +1,222 @@
+"""Thumbnail generation outside of the request path.
+
+* uploads are stored once under content-addressed names
+  (`avatars/ab/ab12...ef.jpg`) by `ContentAddressedStorage`, and the
+  `content_hashed` namer derives thumbnail names from the source content and
+  the options, so identical uploads share their thumbnails;
+* all aliases of a saved image are generated by a Celery task
+  (see `queue_thumbnails`), backfills use a process pool
+  (`./manage.py generate_thumbnails`);
+* the `pil_draft_image` source generator decodes JPEGs at a reduced scale
+  with `Image.draft()` and shrinks other formats with `Image.reduce()`;
+* templates use `{% thumbnail_url_or_placeholder %}`, which never generates
+  a thumbnail and renders a placeholder while it is missing.
+"""
+import os
+import re
+import base64
+import hashlib
+import functools
+from urllib.parse import quote
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{40}')
+# Decode sources to at least this multiple of the thumbnail size, so that the
+# final antialiased resize keeps its quality
+DRAFT_FACTOR = 2
+CHUNK_SIZE = 64 * 1024
+JPEG_SOI, JPEG_EOI = b'\xff\xd8', b'\xff\xd9'
+
+
+def file_digest(fileobj):
+    """Return the SHA-1 hex digest of the file content, reading it by chunks."""
+    sha = hashlib.sha1()
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    for chunk in iter(functools.partial(fileobj.read, CHUNK_SIZE), b''):
+        sha.update(chunk)
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    return sha.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores files under the digest of their content, inside of the
+    directory given by `upload_to`. A file which is already stored is not
+    written again, the existing name is returned instead."""
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = file_digest(content)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + extension).replace('\\', '/')
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_file_digest(storage, name, size, modified_time):
+    with storage.open(name) as f:
+        return file_digest(f)
+
+
+def _stored_file_digest(storage, name):
+    """The digest is cached by the size and modification time of the file,
+    so a file written again under the same name is read again."""
+    try:
+        version = storage.size(name), storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        with storage.open(name) as f:
+            return file_digest(f)
+    return _cached_file_digest(storage, name, *version)
+
+
+def source_digest(thumbnailer):
+    """The content digest of the thumbnailer source. It is taken from
+    content-addressed names, other files are read once per process and version."""
+    match = DIGEST_RE.match(os.path.basename(thumbnailer.name))
+    if match:
+        return match.group(0)
+    return _stored_file_digest(thumbnailer.source_storage, thumbnailer.name)
+
+
+def content_hashed(thumbnailer, prepared_options, thumbnail_extension, **kwargs):
+    """A `THUMBNAIL_NAMER` which names thumbnails by the source content and
+    the options: `ab12...ef_200x200_QHCa6G1l.jpg`."""
+    options_sha = hashlib.sha1(':'.join(prepared_options[1:]).encode('utf-8')).digest()
+    options_hash = base64.urlsafe_b64encode(options_sha[:6]).decode('utf-8')
+    return '%s_%s_%s.%s' % (
+        source_digest(thumbnailer), prepared_options[0], options_hash, thumbnail_extension)
+
+
+def draft_size(size, factor=DRAFT_FACTOR):
+    """The smallest decoded size that is still good enough for a thumbnail
+    of the given size, in any orientation; None if the size is unknown."""
+    dimensions = [int(x) for x in size or () if x and int(x) > 0]
+    if not dimensions:
+        return None
+    side = max(dimensions) * factor
+    return side, side
+
+
+def pil_draft_image(source, exif_orientation=True, size=None, **options):
+    """A `THUMBNAIL_SOURCE_GENERATORS` replacement of
+    `easy_thumbnails.source_generators.pil_image` which decodes large images
+    at a reduced scale."""
+    from io import BytesIO
+    from PIL import Image, ImageFile
+    from easy_thumbnails import utils
+
+    if not source:
+        return
+    data = source.read()
+    target = draft_size(size)
+
+    def load(data):
+        image = Image.open(BytesIO(data))
+        if target and image.format == 'JPEG':
+            # Let libjpeg skip the DCT coefficients of 1/2, 1/4 or 1/8 scale
+            image.draft('RGB' if image.mode not in ('L', 'CMYK') else image.mode, target)
+        image.load()
+        return image
+
+    try:
+        image = load(data)
+    except OSError:
+        if not data.startswith(JPEG_SOI) or data.endswith(JPEG_EOI):
+            raise
+        # A truncated JPEG: with the end of image marker libjpeg decodes it and
+        # fills the missing rows. The process-global
+        # `ImageFile.LOAD_TRUNCATED_IMAGES` is not changed, since other threads
+        # decode images too.
+        image = load(data + JPEG_EOI)
+
+    if target:
+        factor = min(image.size[0] // target[0], image.size[1] // target[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+
+    if exif_orientation:
+        image = utils.exif_orientation(image)
+    return image
+
+
+def thumbnail_target(model, field_name):
+    return '%s.%s.%s' % (model._meta.app_label, model._meta.object_name, field_name)
+
+
+def get_aliases(target, names=None):
+    from easy_thumbnails.alias import aliases
+    options = aliases.all(target, include_global=True)
+    if names:
+        options = {k: v for k, v in options.items() if k in names}
+    return options
+
+
+def generate_aliases(storage, name, target, names=None):
+    """Generate the missing thumbnails of all aliases for the stored file
+    and return the number of thumbnails created."""
+    from easy_thumbnails.files import get_thumbnailer
+    thumbnailer = get_thumbnailer(storage, name)
+    created = 0
+    for alias, options in get_aliases(target, names).items():
+        options = dict(options, ALIAS=alias)
+        if not thumbnailer.get_existing_thumbnail(options):
+            thumbnailer.get_thumbnail(options, generate=True)
+            created += 1
+    return created
+
+
+def queue_thumbnails(sender, fieldfile, **kwargs):
+    """A `saved_file` signal handler which generates the aliases of saved
+    images in Celery, once the transaction is committed."""
+    from django.db import transaction
+    from django.db.models import ImageField
+    from .tasks import generate_thumbnails_task
+
+    if not isinstance(fieldfile.field, ImageField):
+        return
+    target = thumbnail_target(sender, fieldfile.field.name)
+    if not get_aliases(target):
+        return
+    label = sender._meta.label
+    field_name, name = fieldfile.field.name, fieldfile.name
+    transaction.on_commit(
+        lambda: generate_thumbnails_task.delay(label, field_name, name))
+
+
+@functools.lru_cache(maxsize=64)
+def placeholder_url(width, height, background='#cccccc'):
+    """A data URI of a plain SVG rectangle of the thumbnail size."""
+    svg = (
+        "<svg xmlns='http://www.w3.org/2000/svg' width='%d' height='%d'>"
+        "<rect width='100%%' height='100%%' fill='%s'/></svg>"
+    ) % (width, height, background)
+    return 'data:image/svg+xml,' + quote(svg, safe='/:= ')
+
+
+def thumbnail_url_or_placeholder(fieldfile, alias):
+    """Return the URL of an existing thumbnail or a placeholder of the same size."""
+    from easy_thumbnails.alias import aliases
+    from easy_thumbnails.files import get_thumbnailer
+
+    target = None
+    if getattr(fieldfile, 'field', None) is not None:
+        target = thumbnail_target(fieldfile.instance.__class__, fieldfile.field.name)
+    options = aliases.get(alias, target=target)
+    if options is None:
+        raise ValueError('Unknown thumbnail alias "%s".' % alias)
+    if fieldfile:
+        thumbnail = get_thumbnailer(fieldfile).get_existing_thumbnail(dict(options, ALIAS=alias))
+        if thumbnail:
+            return thumbnail.url
+    width, height = (int(x) for x in options['size'])
+    return placeholder_url(width or height, height or width, options.get('background') or '#cccccc')
@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('readiness/', views.readiness, name='readiness'),
 ]
\ No newline at end of file
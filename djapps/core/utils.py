@@ -1,6 +1,9 @@
 from django.conf import settings
 from typing import Optional
 from collections import namedtuple
+from collections.abc import Mapping
+import functools
+import re
 
 
 SLUG_SAVE_AS_DASH = '.,/'
@@ -41,6 +44,49 @@ def get_unique_slug(
     return _slug
 
 
+# Basic Latin, Latin-1 Supplement, Latin Extended-A/B, Latin Extended Additional
+# and General Punctuation, i.e. everything a Latin font is expected to render
+ROMAN_CHARS = r'\x00-\u024f\u1e00-\u1eff\u2000-\u206f'
+ROMAN_CHARS_RE = re.compile('[%s]*' % ROMAN_CHARS)
+# A run of non-roman characters, possibly separated by whitespace,
+# e.g. a whole phrase in Cyrillic
+NON_ROMAN_RUN_RE = re.compile(r'[^%s]+(?:\s+[^%s]+)*' % (ROMAN_CHARS, ROMAN_CHARS))
+SURROUND_CACHE_MAX_LENGTH = 1024
+
+
+def is_roman_chars(value):
+    """Check that the string contains roman (Latin) characters, digits,
+    punctuation and whitespace only."""
+    return ROMAN_CHARS_RE.fullmatch(value) is not None
+
+
+def iter_surround_non_roman(value, span_class='cyrillic-char'):
+    """Yield chunks of the string where every run of non-roman characters
+    is wrapped into a `<span>` with the given class."""
+    pos = 0
+    for match in NON_ROMAN_RUN_RE.finditer(value):
+        start, end = match.span()
+        if start > pos:
+            yield value[pos:start]
+        yield '<span class="%s">%s</span>' % (span_class, match.group())
+        pos = end
+    if pos < len(value):
+        yield value[pos:]
+
+
+@functools.lru_cache(maxsize=512)
+def _surround_non_roman_cached(value, span_class):
+    return ''.join(iter_surround_non_roman(value, span_class))
+
+
+def surround_non_roman(value, span_class='cyrillic-char'):
+    """Wrap runs of non-roman characters into `<span>`s.
+    Results for short strings (titles, menu items) are cached."""
+    if len(value) <= SURROUND_CACHE_MAX_LENGTH:
+        return _surround_non_roman_cached(str(value), span_class)
+    return ''.join(iter_surround_non_roman(value, span_class))
+
+
 def markdown_to_html(source):
     import markdown
     html = markdown.markdown(
@@ -88,13 +134,93 @@ def send_mail(
     return result
 
 
-def flatten(d, parent_key='', sep='.'):
-    import collections
-    items = []
-    for k, v in d.items():
-        new_key = parent_key + sep + k if parent_key else k
-        if isinstance(v, collections.MutableMapping):
-            items.extend(flatten(v, new_key, sep=sep).items())
+def _iter_children(value, sequences):
+    """Items of a non-empty mapping, or of a list or tuple with `sequences`,
+    otherwise None."""
+    # Types first: the truth value of a leaf may run a query (a QuerySet)
+    # or raise (a numpy array)
+    if type(value) is dict or isinstance(value, Mapping):
+        return iter(value.items()) if value else None
+    if sequences and isinstance(value, (list, tuple)):
+        return enumerate(value) if value else None
+    return None
+
+
+def iter_flatten(data, parent_key='', sep='.', max_depth=None, sequences=True):
+    """Yield `(key, value)` of the leaves of nested mappings, with the keys of
+    every level joined by `sep`, e.g. `{'a': {'b': [1]}}` yields `('a.b.0', 1)`.
+
+    Lists and tuples are flattened with index keys unless `sequences` is
+    false. Keys have at most `max_depth` parts, deeper values are yielded as
+    they are. Empty containers are yielded as values, so `unflatten` restores
+    them. Walks an explicit stack: the depth is not limited by recursion.
+    """
+    items = _iter_children(data, sequences)
+    if items is None:
+        return
+    root = parent_key + sep if parent_key else ''
+    # Keys of the parents, joined once for the leaves of a level: prefixes
+    # of every level would take memory quadratic in the depth
+    path = []
+    # [items, prefix of the keys or None until a leaf is found]
+    stack = [[items, root]]
+    while stack:
+        frame = stack[-1]
+        for key, value in frame[0]:
+            children = None
+            if max_depth is None or len(stack) < max_depth:
+                children = _iter_children(value, sequences)
+            if children is not None:
+                path.append(str(key))
+                stack.append([children, None])
+                break
+            prefix = frame[1]
+            if prefix is None:
+                prefix = frame[1] = root + sep.join(path) + sep
+            yield prefix + str(key), value
         else:
-            items.append((new_key, v))
-    return dict(items)
+            stack.pop()
+            if path:
+                path.pop()
+
+
+def flatten(d, parent_key='', sep='.', max_depth=None, sequences=False):
+    """Flatten nested mappings into a dict, see `iter_flatten`. Lists are
+    kept as values unless `sequences` is true."""
+    return dict(iter_flatten(d, parent_key, sep, max_depth, sequences))
+
+
+def unflatten(items, sep='.', sequences=True):
+    """Nest the `(key, value)` pairs (or a dict) of `iter_flatten` back into
+    dicts, splitting keys by `sep`. With `sequences`, dicts whose keys are
+    `'0'`, `'1'`, ... become lists, so tuples come back as lists. Keys which
+    contain `sep` themselves can not be told from nested ones."""
+    if isinstance(items, Mapping):
+        items = items.items()
+    root = {}
+    # (parent, key, dict) in the order of creation, parents first
+    created = [(None, None, root)]
+    nodes = {id(root)}
+    for key, value in items:
+        parts = key.split(sep)
+        node = root
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is None and part not in node:
+                child = node[part] = {}
+                created.append((node, part, child))
+                nodes.add(id(child))
+            elif id(child) not in nodes:
+                raise ValueError('%r conflicts with the value of %r.' % (key, part))
+            node = child
+        if parts[-1] in node:
+            raise ValueError('%r is set twice or conflicts with a nested key.' % key)
+        node[parts[-1]] = value
+    if sequences:
+        for parent, key, node in reversed(created):
+            if node and list(node) == [str(i) for i in range(len(node))]:
+                node = list(node.values())
+                if parent is None:
+                    return node
+                parent[key] = node
+    return root
@@ -1,5 +1,27 @@
+import logging
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+from .http_cache import anonymous_cache_page
 
 
+logger = logging.getLogger(__name__)
+
+
+@anonymous_cache_page()
 def index(request):
     return render(request, 'index.html', {})
+
+
+@never_cache
+def readiness(request):
+    """For load balancers and orchestrators: 200 when the database answers."""
+    from django.db import DatabaseError, connection
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        # Details of the database are logged, not shown to callers
+        logger.exception('Readiness check failed')
+        return JsonResponse({'status': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ok'})
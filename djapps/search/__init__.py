@@ -0,0 +1 @@
+default_app_config = 'djapps.search.apps.SearchConfig'
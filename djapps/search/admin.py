@@ -0,0 +1,23 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class SearchAdminMixin:
+    """Search the changelist with the search index of the model instead of
+    `icontains` lookups of `search_fields`, which scan the whole table.
+    The `search_fields` lookups are used when the backend is not enabled
+    or not available."""
+    def get_search_results(self, request, queryset, search_term):
+        from django.conf import settings
+        from .indexes import is_enabled, search
+
+        if not search_term.strip() or not is_enabled():
+            return super().get_search_results(request, queryset, search_term)
+        try:
+            pks = search(self.model, search_term, limit=settings.SEARCH_ADMIN_LIMIT)
+        except Exception:
+            logger.exception('Search backend is not available, falling back to search_fields')
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=pks), False
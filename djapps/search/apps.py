@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class SearchConfig(AppConfig):
+    name = 'djapps.search'
+    verbose_name = _('Search')
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from django.utils.module_loading import autodiscover_modules
+        from .indexes import get_indexes
+        from .signals import queue_update
+
+        # Indexes are declared in the `search_indexes` modules of the apps
+        autodiscover_modules('search_indexes')
+        for index in get_indexes():
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    queue_update, sender=index.model,
+                    dispatch_uid='djapps.search.queue_update.%s' % index.name)
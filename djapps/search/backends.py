@@ -0,0 +1,216 @@
+"""Search backends, selected by the `SEARCH_BACKEND` setting.
+
+`ElasticsearchBackend` is used in production. `InMemoryBackend` keeps an
+inverted index in the process, it is meant for tests and development.
+"""
+import re
+import time
+import bisect
+import functools
+from collections import defaultdict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+class BaseBackend:
+    # Whether `index_documents` may be called from several processes at once
+    supports_parallel_indexing = True
+
+    def reset(self, index):
+        """Replace the index with an empty one."""
+        self.finish_rebuild(index, self.start_rebuild(index))
+
+    def start_rebuild(self, index):
+        """Create a new empty index next to the live one and return its name.
+        Searches use the live index until `finish_rebuild`."""
+        raise NotImplementedError
+
+    def finish_rebuild(self, index, name):
+        """Make the index created by `start_rebuild` live and drop the old one."""
+        raise NotImplementedError
+
+    def refresh(self, index, name=None):
+        """Make recent changes visible to search."""
+
+    def index_documents(self, index, documents, name=None):
+        """Add or replace `(pk, document)` pairs, in the live index or the
+        index `name` of a rebuild."""
+        raise NotImplementedError
+
+    def delete_documents(self, index, pks):
+        raise NotImplementedError
+
+    def search(self, index, query, limit):
+        """Return primary keys of up to `limit` matching objects, the best first."""
+        raise NotImplementedError
+
+
+class InvertedIndex:
+    """Words of the documents, with the sorted list of words for prefix lookups."""
+    def __init__(self):
+        self.documents = {}
+        self.postings = defaultdict(set)
+        self._words = None
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = sorted(self.postings)
+        return self._words
+
+    def add(self, pk, words):
+        self.remove(pk)
+        self.documents[pk] = words
+        for word in words:
+            if word not in self.postings:
+                self._words = None
+            self.postings[word].add(pk)
+
+    def remove(self, pk):
+        for word in self.documents.pop(pk, ()):
+            postings = self.postings[word]
+            postings.discard(pk)
+            if not postings:
+                del self.postings[word]
+                self._words = None
+
+    def match(self, prefix):
+        words = self.words
+        matches = set()
+        for i in range(bisect.bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix):
+                break
+            matches |= self.postings[words[i]]
+        return matches
+
+
+class InMemoryBackend(BaseBackend):
+    supports_parallel_indexing = False
+    indexes = defaultdict(InvertedIndex)
+
+    def start_rebuild(self, index):
+        name = '%s-%d' % (index.name, time.time_ns())
+        self.indexes[name] = InvertedIndex()
+        return name
+
+    def finish_rebuild(self, index, name):
+        self.indexes[index.name] = self.indexes.pop(name)
+
+    def index_documents(self, index, documents, name=None):
+        inverted_index = self.indexes[name or index.name]
+        for pk, document in documents:
+            inverted_index.add(pk, frozenset(
+                word for field in index.fields for word in tokenize(str(document[field]))))
+
+    def delete_documents(self, index, pks):
+        inverted_index = self.indexes[index.name]
+        for pk in pks:
+            inverted_index.remove(pk)
+
+    def search(self, index, query, limit):
+        inverted_index = self.indexes[index.name]
+        words = set(tokenize(query))
+        if not words:
+            return []
+        matches = None
+        # Longer words match fewer documents, start with them
+        for word in sorted(words, key=len, reverse=True):
+            found = inverted_index.match(word)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        # Whole word matches go first
+        documents = inverted_index.documents
+        return sorted(matches, key=lambda pk: (-len(words & documents[pk]), pk))[:limit]
+
+
+class ElasticsearchBackend(BaseBackend):
+    """Indexes in the `ELASTICSEARCH_URLS` cluster, searched through aliases
+    named `ELASTICSEARCH_INDICES_PREFIX-<app>-<model>`. A rebuild fills a new
+    index `<alias>-<time in ns>` and then moves the alias to it, so searches
+    keep working meanwhile. Fields are `search_as_you_type`, so words also
+    match as prefixes."""
+    def __init__(self):
+        from elasticsearch import Elasticsearch
+        self.client = Elasticsearch(settings.ELASTICSEARCH_URLS, timeout=settings.ELASTICSEARCH_TIMEOUT)
+
+    def get_index_name(self, index):
+        return '%s-%s' % (settings.ELASTICSEARCH_INDICES_PREFIX, index.name)
+
+    def start_rebuild(self, index):
+        name = '%s-%d' % (self.get_index_name(index), time.time_ns())
+        self.client.indices.create(index=name, body={
+            'settings': {'refresh_interval': -1},
+            'mappings': {
+                'dynamic': False,
+                'properties': {field: {'type': 'search_as_you_type'} for field in index.fields},
+            },
+        })
+        return name
+
+    def finish_rebuild(self, index, name):
+        alias = self.get_index_name(index)
+        self.client.indices.put_settings(index=name, body={'refresh_interval': None})
+        self.client.indices.refresh(index=name)
+        old = []
+        actions = [{'add': {'index': name, 'alias': alias}}]
+        if self.client.indices.exists_alias(name=alias):
+            old = list(self.client.indices.get_alias(name=alias))
+            actions = [{'remove': {'index': x, 'alias': alias}} for x in old] + actions
+        elif self.client.indices.exists(index=alias):
+            # An index created without an alias, e.g. by indexing before the first rebuild
+            actions.insert(0, {'remove_index': {'index': alias}})
+        # Moved in one atomic step
+        self.client.indices.update_aliases(body={'actions': actions})
+        for x in old:
+            self.client.indices.delete(index=x, ignore=[404])
+
+    def refresh(self, index, name=None):
+        self.client.indices.refresh(index=name or self.get_index_name(index))
+
+    def index_documents(self, index, documents, name=None):
+        from elasticsearch.helpers import bulk
+        name = name or self.get_index_name(index)
+        bulk(self.client, (
+            {'_index': name, '_id': pk, '_source': document} for pk, document in documents))
+
+    def delete_documents(self, index, pks):
+        from elasticsearch.helpers import bulk
+        name = self.get_index_name(index)
+        # Documents which were never indexed are not errors
+        bulk(self.client, (
+            {'_op_type': 'delete', '_index': name, '_id': pk} for pk in pks), raise_on_error=False)
+
+    def search(self, index, query, limit):
+        fields = []
+        for field in index.fields:
+            fields += [field, field + '._2gram', field + '._3gram']
+        result = self.client.search(index=self.get_index_name(index), body={
+            'query': {'multi_match': {
+                'query': query, 'type': 'bool_prefix', 'operator': 'and', 'fields': fields,
+            }},
+            '_source': False,
+            'size': limit,
+        })
+        to_python = index.model._meta.pk.to_python
+        return [to_python(hit['_id']) for hit in result['hits']['hits']]
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    if setting in ('SEARCH_BACKEND', 'ELASTICSEARCH_URLS', 'ELASTICSEARCH_TIMEOUT'):
+        get_backend.cache_clear()
@@ -0,0 +1,81 @@
+"""Search indexes of models.
+
+An index lists the fields of a model which are searched, it is declared
+in the `search_indexes` module of an app:
+
+    @register
+    class UserIndex(SearchIndex):
+        model = User
+        fields = ('email', 'name')
+
+Indexes are updated on save and delete (see `djapps.search.signals`) and
+rebuilt with `./manage.py search_reindex`. Nothing is indexed unless
+`SEARCH_BACKEND` is set.
+"""
+from django.conf import settings
+
+
+class SearchIndex:
+    model = None
+    fields = ()
+
+    @property
+    def name(self):
+        return self.model._meta.label_lower.replace('.', '-')
+
+    def get_queryset(self):
+        """Objects which are searchable, other objects are removed from the index."""
+        return self.model._default_manager.only(*self.fields)
+
+    def to_document(self, obj):
+        return {field: getattr(obj, field) or '' for field in self.fields}
+
+    def iter_documents(self, queryset, chunk_size=2000):
+        """Yield `(pk, document)` of the objects."""
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield obj.pk, self.to_document(obj)
+
+
+_registry = {}
+
+
+def register(index_class):
+    """Register the index of a model, can be used as a class decorator."""
+    index = index_class()
+    _registry[index.model._meta.label] = index
+    return index_class
+
+
+def get_index(model_or_label):
+    label = model_or_label if isinstance(model_or_label, str) else model_or_label._meta.label
+    return _registry[label]
+
+
+def get_indexes():
+    return list(_registry.values())
+
+
+def is_enabled():
+    return bool(settings.SEARCH_BACKEND)
+
+
+def search(model, query, limit=None):
+    """Return primary keys of the objects matching all words of the query,
+    the best matches first. Every word also matches as a prefix."""
+    from .backends import get_backend
+    return get_backend().search(get_index(model), query, limit or settings.SEARCH_LIMIT)
+
+
+def update_index(index, pks):
+    """Index the objects with the primary keys, and remove the ones which
+    were deleted or are not searchable any more."""
+    from .backends import get_backend
+
+    backend = get_backend()
+    documents = list(index.iter_documents(index.get_queryset().filter(pk__in=pks)))
+    if documents:
+        backend.index_documents(index, documents)
+    missing = set(pks) - {pk for pk, _ in documents}
+    if missing:
+        backend.delete_documents(index, sorted(missing))
+    return len(documents), len(missing)
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _init_worker():
+    from ...backends import get_backend
+    # The client of the parent, with its pooled sockets, must not be shared
+    get_backend.cache_clear()
+
+
+def _index_range(label, start, end, name=None):
+    from ...backends import get_backend
+    from ...indexes import get_index
+
+    index = get_index(label)
+    documents = list(index.iter_documents(index.get_queryset().filter(pk__gte=start, pk__lt=end)))
+    if documents:
+        get_backend().index_documents(index, documents, name)
+    return len(documents)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search indexes from the database in parallel chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.Model',
+            help='Models to reindex. All indexes are rebuilt by default.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Number of primary keys per chunk.')
+        parser.add_argument(
+            '--processes', type=int,
+            help='Number of worker processes. Defaults to the number of CPU cores.')
+        parser.add_argument(
+            '--no-reset', action='store_false', dest='reset',
+            help='Update documents in place instead of building a new index.')
+
+    def handle(self, *args, **options):
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+        from django.db.models import Max, Min
+        from ...backends import get_backend
+        from ...indexes import get_index, get_indexes, is_enabled
+
+        if not is_enabled():
+            raise CommandError('SEARCH_BACKEND is not set.')
+        try:
+            indexes = [get_index(x) for x in options['models']] or get_indexes()
+        except KeyError as e:
+            raise CommandError('No search index for %s' % e)
+
+        backend = get_backend()
+        processes = options['processes'] or os.cpu_count() or 1
+        if not backend.supports_parallel_indexing:
+            processes = 1
+        chunk_size = options['chunk_size']
+        for index in indexes:
+            # A new index is built and replaces the live one when it is complete
+            name = backend.start_rebuild(index) if options['reset'] else None
+            # Ranges of primary keys are cheap to select, unlike offsets
+            bounds = index.get_queryset().aggregate(start=Min('pk'), end=Max('pk'))
+            if bounds['start'] is None:
+                ranges = []
+            else:
+                ranges = [
+                    (x, x + chunk_size) for x in range(bounds['start'], bounds['end'] + 1, chunk_size)]
+            label = index.model._meta.label
+            if processes == 1 or len(ranges) < 2:
+                counts = [_index_range(label, start, end, name) for start, end in ranges]
+            else:
+                # Forked workers must not share the database connections of the parent
+                connections.close_all()
+                with ProcessPoolExecutor(processes, initializer=_init_worker) as executor:
+                    counts = list(executor.map(
+                        _index_range, [label] * len(ranges), *zip(*ranges), [name] * len(ranges)))
+            if name is None:
+                backend.refresh(index)
+            else:
+                backend.finish_rebuild(index, name)
+            if options['verbosity'] > 0:
+                self.stdout.write(
+                    '%s: indexed %d objects in %d chunks.' % (label, sum(counts), len(ranges)))
@@ -0,0 +1,46 @@
+"""Incremental indexing on save and delete.
+
+Changed primary keys are collected until the transaction commits, then
+a single `update_index_task` per model updates the index. Updates which
+bypass signals, like `QuerySet.update()` and `bulk_create()`, are only
+indexed by `./manage.py search_reindex`.
+"""
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+
+
+_local = threading.local()
+
+
+def get_pending():
+    if not hasattr(_local, 'pending'):
+        _local.pending = defaultdict(set)
+    return _local.pending
+
+
+def queue_update(sender, instance, **kwargs):
+    from .indexes import is_enabled
+    if not is_enabled() or kwargs.get('raw'):
+        return
+    get_pending()[sender._meta.label].add(instance.pk)
+    # Callbacks of the same transaction find nothing left to flush.
+    # Keys of rolled back transactions are flushed with the next commit,
+    # the task reads the actual rows anyway.
+    transaction.on_commit(flush)
+
+
+def flush():
+    from .tasks import update_index_task
+
+    pending = get_pending()
+    while pending:
+        label, pks = pending.popitem()
+        pks = sorted(pks)
+        for i in range(0, len(pks), settings.SEARCH_INDEX_BATCH_SIZE):
+            batch = pks[i:i + settings.SEARCH_INDEX_BATCH_SIZE]
+            if settings.SEARCH_INDEX_ASYNC:
+                update_index_task.delay(label, batch)
+            else:
+                update_index_task(label, batch)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task
+def update_index_task(label, pks):
+    """Index the objects of the model `label` (e.g. `accounts.User`), and
+    remove the deleted ones. Returns the numbers of indexed and removed objects."""
+    from .indexes import get_index, update_index
+    return update_index(get_index(label), pks)
@@ -0,0 +1,192 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from djapps.accounts.factories import UserFactory
+from djapps.accounts.models import User
+from djapps.accounts.search_indexes import UserIndex
+from ..backends import ElasticsearchBackend, InMemoryBackend, get_backend
+from ..indexes import get_index, search
+
+
+@override_settings(SEARCH_BACKEND='djapps.search.backends.InMemoryBackend', SEARCH_INDEX_ASYNC=False)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.index = get_index(User)
+        get_backend().reset(self.index)
+
+    def test_signals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            john = User.objects.create_user('john.doe@mail.com', 'John Doe', 'demo')
+            jane = User.objects.create_user('jane@mail.com', 'Jane Johnson', 'demo')
+        self.assertEqual(search(User, 'joh'), [john.pk, jane.pk])
+        self.assertEqual(search(User, 'JOHN doe'), [john.pk])
+        self.assertEqual(search(User, 'john.doe@mail.com'), [john.pk])
+        self.assertEqual(search(User, 'mail', limit=1), [john.pk])
+        self.assertEqual(search(User, 'smith'), [])
+        self.assertEqual(search(User, '  '), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            john.name = 'Jack Smith'
+            john.save()
+            jane.delete()
+        self.assertEqual(search(User, 'jane'), [])
+        self.assertEqual(search(User, 'jack smi'), [john.pk])
+
+    def test_batched_tasks(self):
+        with self.settings(SEARCH_INDEX_ASYNC=True, SEARCH_INDEX_BATCH_SIZE=2):
+            with patch('djapps.search.tasks.update_index_task.delay') as delay:
+                with self.captureOnCommitCallbacks(execute=True):
+                    users = [UserFactory.create() for _ in range(3)]
+                    users[0].save()
+        pks = sorted(x.pk for x in users)
+        self.assertEqual(
+            [x[0] for x in delay.call_args_list], [('accounts.User', pks[:2]), ('accounts.User', pks[2:])])
+
+    def test_reindex(self):
+        # bulk_create() sends no signals
+        UserFactory.create_batch(5)
+        users = list(User.objects.all())
+        self.assertEqual(search(User, users[0].email), [])
+        out = StringIO()
+        call_command('search_reindex', 'accounts.User', chunk_size=2, processes=2, verbosity=0, stdout=out)
+        self.assertEqual(out.getvalue(), '')
+        for user in users:
+            self.assertEqual(search(User, user.email), [user.pk])
+        call_command('search_reindex', 'accounts.User', stdout=out)
+        self.assertEqual(out.getvalue(), 'accounts.User: indexed 5 objects in 1 chunks.\n')
+        with self.assertRaises(CommandError):
+            call_command('search_reindex', 'accounts.Missing')
+        with self.settings(SEARCH_BACKEND=''), self.assertRaises(CommandError):
+            call_command('search_reindex')
+
+    @override_settings(SEARCH_BACKEND='djapps.search.tests.test_search.ParallelInMemoryBackend')
+    def test_reindex_parallel(self):
+        UserFactory.create_batch(3)
+        user = User.objects.latest('pk')
+        parent_backend = get_backend()
+        with patch('concurrent.futures.ProcessPoolExecutor', InlineExecutor):
+            call_command('search_reindex', 'accounts.User', chunk_size=1, processes=2, verbosity=0)
+        # Workers create their own backend instead of the one of the parent
+        self.assertIsNot(get_backend(), parent_backend)
+        self.assertEqual(search(User, user.email), [user.pk])
+
+    def test_rebuild(self):
+        user = UserFactory.create()
+        backend = get_backend()
+        backend.index_documents(self.index, [(user.pk, self.index.to_document(user))])
+        name = backend.start_rebuild(self.index)
+        # The live index is searched until the new one is complete
+        self.assertEqual(search(User, user.email), [user.pk])
+        backend.finish_rebuild(self.index, name)
+        self.assertEqual(search(User, user.email), [])
+
+    def test_admin(self):
+        admin = User.objects.create_superuser('admin@mail.com', 'Admin', 'demo')
+        user = UserFactory.create(name='Zachary Quinn')
+        self.client.force_login(admin)
+        get_backend().index_documents(self.index, [(user.pk, self.index.to_document(user))])
+
+        response = self.client.get('/admin/accounts/user/', {'q': 'zach qu'})
+        self.assertEqual(list(response.context['cl'].result_list), [user])
+        # search_fields are used when the backend is not available
+        with patch.object(InMemoryBackend, 'search', side_effect=OSError):
+            with self.assertLogs('djapps.search.admin', 'ERROR'):
+                response = self.client.get('/admin/accounts/user/', {'q': 'Zachary'})
+        self.assertEqual(list(response.context['cl'].result_list), [user])
+        with self.settings(SEARCH_BACKEND=''):
+            response = self.client.get('/admin/accounts/user/', {'q': 'Zachary'})
+        self.assertEqual(list(response.context['cl'].result_list), [user])
+
+
+class ParallelInMemoryBackend(InMemoryBackend):
+    supports_parallel_indexing = True
+
+
+class InlineExecutor:
+    """Runs the tasks of ProcessPoolExecutor in the test process, the
+    workers of a real pool do not see the test transaction."""
+    def __init__(self, processes, initializer=None):
+        self.initializer = initializer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def map(self, func, *iterables):
+        self.initializer()
+        return map(func, *iterables)
+
+
+class FakeIndices:
+    def __init__(self, aliases=None, indices=()):
+        self.aliases = dict(aliases or {})
+        self.indices = set(indices) | set(self.aliases.values())
+        self.actions = []
+        self.deleted = []
+
+    def exists_alias(self, name):
+        return name in self.aliases
+
+    def get_alias(self, name):
+        return {self.aliases[name]: {'aliases': {name: {}}}}
+
+    def exists(self, index):
+        return index in self.indices
+
+    def put_settings(self, index, body):
+        pass
+
+    def refresh(self, index):
+        pass
+
+    def update_aliases(self, body):
+        self.actions = body['actions']
+
+    def delete(self, index, ignore=None):
+        self.deleted.append(index)
+
+
+class FakeElasticsearch:
+    def __init__(self, hits=(), indices=None):
+        self.hits = hits
+        self.requests = []
+        self.indices = indices
+
+    def search(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'hits': {'hits': [{'_id': str(x)} for x in self.hits]}}
+
+
+class ElasticsearchBackendTests(TestCase):
+    def test_search(self):
+        backend = ElasticsearchBackend.__new__(ElasticsearchBackend)
+        backend.client = FakeElasticsearch([3, 1])
+        with self.settings(ELASTICSEARCH_INDICES_PREFIX='demo'):
+            self.assertEqual(backend.search(UserIndex(), 'john do', 10), [3, 1])
+        request = backend.client.requests[0]
+        self.assertEqual(request['index'], 'demo-accounts-user')
+        self.assertEqual(request['body']['size'], 10)
+        self.assertEqual(request['body']['query']['multi_match']['type'], 'bool_prefix')
+        self.assertIn('name._2gram', request['body']['query']['multi_match']['fields'])
+
+    def test_finish_rebuild(self):
+        backend = ElasticsearchBackend.__new__(ElasticsearchBackend)
+        with self.settings(ELASTICSEARCH_INDICES_PREFIX='demo'):
+            backend.client = FakeElasticsearch(indices=FakeIndices({'demo-accounts-user': 'demo-accounts-user-1'}))
+            backend.finish_rebuild(UserIndex(), 'demo-accounts-user-2')
+            self.assertEqual(backend.client.indices.actions, [
+                {'remove': {'index': 'demo-accounts-user-1', 'alias': 'demo-accounts-user'}},
+                {'add': {'index': 'demo-accounts-user-2', 'alias': 'demo-accounts-user'}},
+            ])
+            self.assertEqual(backend.client.indices.deleted, ['demo-accounts-user-1'])
+
+            # An index in place of the alias is replaced in the same step
+            backend.client = FakeElasticsearch(indices=FakeIndices(indices=['demo-accounts-user']))
+            backend.finish_rebuild(UserIndex(), 'demo-accounts-user-2')
+            self.assertEqual(backend.client.indices.actions, [
+                {'remove_index': {'index': 'demo-accounts-user'}},
+                {'add': {'index': 'demo-accounts-user-2', 'alias': 'demo-accounts-user'}},
+            ])
@@ -0,0 +1,64 @@
+"""Gunicorn configuration, read from the working directory:
+
+    DJANGO_SETTINGS_MODULE=demo.settings.production gunicorn demo.wsgi
+
+Everything is tuned by environment variables, see djapps.core.server.
+"""
+import gc
+import random
+# Not `config`, which is a setting of gunicorn
+from decouple import config as env
+from djapps.core.server import MemoryRecycler, get_cpu_count
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:%s' % env('PORT', default='8000'))
+
+# Load Django in the master, workers share its memory copy-on-write
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+threads = env('GUNICORN_THREADS', default=1, cast=int)
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread' if threads > 1 else 'sync')
+workers = env(
+    'WEB_CONCURRENCY',
+    default=min(2 * get_cpu_count() + 1, env('GUNICORN_MAX_WORKERS', default=8, cast=int)),
+    cast=int)
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Workers exit after this many requests, or when their memory grows over
+# GUNICORN_MAX_RSS_MB. Both limits get a random jitter, so workers do not
+# restart at the same time. 0 disables them.
+max_requests = env('GUNICORN_MAX_REQUESTS', default=0, cast=int)
+max_requests_jitter = max_requests // 10
+max_rss = env('GUNICORN_MAX_RSS_MB', default=0, cast=int) * 1024 * 1024
+max_rss_jitter = env('GUNICORN_MAX_RSS_JITTER', default=0.1, cast=float)
+
+accesslog = env('GUNICORN_ACCESS_LOG', default=None)
+errorlog = '-'
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from djapps.core.server import warmup
+        warmup()
+        # Objects of the master are never collected, so the collector does
+        # not write to their pages in the workers
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    random.seed()
+    worker.recycler = MemoryRecycler(max_rss, max_rss_jitter)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        from djapps.core.server import warmup
+        warmup()
+
+
+def post_request(worker, req, environ, resp):
+    if worker.recycler.should_exit():
+        worker.log.info('Worker %s exceeded %d MB of memory, restarting', worker.pid, max_rss // 2 ** 20)
+        worker.alive = False